@@ -0,0 +1,194 @@
+"""Synthetic source trees and catalogs for the benchmarks.
+
+generate_corpus writes a tree of python files calling every gettext
+signature, through aliases and with complex arguments, next to a locale
+folder holding a .po and a .mo catalog per language. Catalog completeness
+and plural rules vary per language so validation has failures to report.
+"""
+import os
+import random
+import struct
+from typing import Dict, List, NamedTuple
+from pychecktext.mo_catalog import LE_MAGIC, hash_string
+
+# One plural rule per number of forms, cycled through the generated languages
+PLURAL_RULES = [
+    ('nplurals=2; plural=n != 1;', 2),
+    ('nplurals=1; plural=0;', 1),
+    ('nplurals=3; plural=(n==1 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2);', 3),
+    ('nplurals=6; plural=(n==0 ? 0 : n==1 ? 1 : n==2 ? 2 : n%100>=3 && n%100<=10 ? 3 : n%100>=11 ? 4 : 5);', 6),
+]
+
+ALIASES = {'_': 'gettext', '_n': 'ngettext', '_p': 'pgettext'}
+
+DOMAIN = 'bench'
+
+
+class Corpus(NamedTuple):
+    source_path: str
+    locale_path: str
+    domain: str
+    languages: List[str]
+    aliases: Dict[str, str]
+
+
+def _next_prime(value: int) -> int:
+    value = max(value, 3)
+    while any(value % divisor == 0 for divisor in range(2, int(value ** 0.5) + 1)):
+        value += 1
+    return value
+
+
+def write_mo(file_path: str, messages: Dict[bytes, bytes]):
+    """Write messages as a little endian .mo file with a hash table, the way GNU msgfmt does.
+
+    Plural entries are keyed by their msgid and plural msgid joined by a
+    NUL, and hold their forms joined the same way.
+    """
+    keys = sorted(messages)
+    hash_size = _next_prime(len(keys) * 4 // 3)
+    hash_table = [0] * hash_size
+    for entry, key in enumerate(keys):
+        hval = hash_string(key.split(b'\0', 1)[0])
+        index = hval % hash_size
+        increment = 1 + hval % (hash_size - 2)
+        while hash_table[index] != 0:
+            index = index - hash_size + increment if index >= hash_size - increment else index + increment
+        hash_table[index] = entry + 1
+    strings_offset = 28 + 16 * len(keys) + 4 * hash_size
+    tables = ([], [])
+    strings = []
+    position = strings_offset
+    for table, values in zip(tables, (keys, [messages[key] for key in keys])):
+        for value in values:
+            table.extend((len(value), position))
+            strings.append(value + b'\0')
+            position += len(value) + 1
+    with open(file_path, 'wb') as f:
+        f.write(struct.pack('<7I', LE_MAGIC, 0, len(keys), 28, 28 + 8 * len(keys), hash_size,
+                            28 + 16 * len(keys)))
+        for table in tables:
+            f.write(struct.pack('<{}I'.format(len(table)), *table))
+        f.write(struct.pack('<{}I'.format(hash_size), *hash_table))
+        f.write(b''.join(strings))
+
+
+def _po_string(value: str) -> str:
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def _source_call(rng: random.Random, message: tuple, complex_ratio: float) -> str:
+    context, msgid, plural = message
+    if rng.random() < complex_ratio:
+        return rng.choice([
+            "gettext('{}' + suffix)".format(msgid),
+            "pgettext(context, '{}'.format(index))".format(msgid),
+            "ngettext(msgids[index], '{}', count)".format(plural or msgid)])
+    if context is None and plural is None:
+        return rng.choice([
+            "gettext('{0}')", "_('{0}')", "dgettext('{1}', '{0}')", "lgettext('{0}')", "ldgettext('{1}', '{0}')"
+        ]).format(msgid, DOMAIN)
+    if context is None:
+        return rng.choice([
+            "ngettext('{0}', '{1}', count)", "_n('{0}', '{1}', count)", "dngettext('{2}', '{0}', '{1}', count)",
+            "lngettext('{0}', '{1}', count)", "ldngettext('{2}', '{0}', '{1}', count)"
+        ]).format(msgid, plural, DOMAIN)
+    if plural is None:
+        return rng.choice([
+            "pgettext('{0}', '{1}')", "_p('{0}', '{1}')", "dpgettext('{2}', '{0}', '{1}')"
+        ]).format(context, msgid, DOMAIN)
+    return rng.choice([
+        "npgettext('{0}', '{1}', '{2}', count)", "dnpgettext('{3}', '{0}', '{1}', '{2}', count)"
+    ]).format(context, msgid, plural, DOMAIN)
+
+
+def _write_sources(source_path: str, rng: random.Random, messages: List[tuple], files: int,
+                   calls_per_file: int, density: float, complex_ratio: float):
+    for file_index in range(files):
+        folder = os.path.join(source_path, 'package_{}'.format(file_index // 50))
+        os.makedirs(folder, exist_ok=True)
+        lines = ['import os', '', '']
+        has_calls = rng.random() < density
+        for function_index in range(max(1, calls_per_file // 5)):
+            lines.append('def function_{}(count, index, context, suffix, msgids):'.format(function_index))
+            lines.append('    values = [os.path.join(str(count), str(index)) for _ in range(count)]')
+            for _ in range(5):
+                if has_calls:
+                    lines.append('    print({})'.format(_source_call(rng, rng.choice(messages), complex_ratio)))
+                else:
+                    lines.append('    print(values[index] if values else str(count).zfill(index))')
+            lines.append('    return values')
+            lines.append('')
+            lines.append('')
+        with open(os.path.join(folder, 'module_{}.py'.format(file_index)), 'w') as f:
+            f.write('\n'.join(lines))
+
+
+def _write_catalogs(locale_path: str, rng: random.Random, messages: List[tuple], languages: List[str],
+                    completeness: float):
+    for language_index, language in enumerate(languages):
+        rule, nplurals = PLURAL_RULES[language_index % len(PLURAL_RULES)]
+        # Completeness drops off a little for each language
+        language_completeness = completeness ** (1 + language_index * 0.1)
+        header = 'Content-Type: text/plain; charset=UTF-8\nLanguage: {}\nPlural-Forms: {}\n'.format(language, rule)
+        mo_messages = {b'': header.encode()}
+        po_lines = ['msgid ""', 'msgstr ""'] + [_po_string(line + '\n') for line in header.splitlines()] + ['']
+        for context, msgid, plural in messages:
+            if rng.random() > language_completeness:
+                continue
+            key = msgid if context is None else context + '\x04' + msgid
+            if context is not None:
+                po_lines.append('msgctxt {}'.format(_po_string(context)))
+            po_lines.append('msgid {}'.format(_po_string(msgid)))
+            if plural is None:
+                translation = '{} [{}]'.format(msgid, language)
+                po_lines.append('msgstr {}'.format(_po_string(translation)))
+                mo_messages[key.encode()] = translation.encode()
+            else:
+                forms = ['{} [{}:{}]'.format(msgid, language, index) if rng.random() <= language_completeness else ''
+                         for index in range(nplurals)]
+                po_lines.append('msgid_plural {}'.format(_po_string(plural)))
+                po_lines.extend('msgstr[{}] {}'.format(index, _po_string(form)) for index, form in enumerate(forms))
+                mo_messages[(key + '\0' + plural).encode()] = '\0'.join(forms).encode()
+            po_lines.append('')
+        folder = os.path.join(locale_path, language, 'LC_MESSAGES')
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, DOMAIN + '.po'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(po_lines))
+        write_mo(os.path.join(folder, DOMAIN + '.mo'), mo_messages)
+
+
+def generate_corpus(root: str, files: int = 1000, calls_per_file: int = 20, density: float = 0.5,
+                    complex_ratio: float = 0.05, messages: int = 5000, languages: int = 4,
+                    completeness: float = 0.95, seed: int = 0) -> Corpus:
+    """Write a synthetic source tree and matching catalogs under root.
+
+    density is the fraction of files that call gettext at all, complex_ratio
+    the fraction of those calls with non-literal arguments and completeness
+    the fraction of messages, and of plural forms, translated in the first
+    language.
+    """
+    rng = random.Random(seed)
+    message_list = []
+    for index in range(messages):
+        context = 'context_{}'.format(index % 7) if index % 4 == 0 else None
+        plural = 'message_{}.plural'.format(index) if index % 3 == 0 else None
+        message_list.append((context, 'message_{}'.format(index), plural))
+    source_path = os.path.join(root, 'src')
+    locale_path = os.path.join(root, 'locale')
+    language_codes = ['lang{}'.format(index) for index in range(languages)]
+    _write_sources(source_path, rng, message_list, files, calls_per_file, density, complex_ratio)
+    _write_catalogs(locale_path, rng, message_list, language_codes, completeness)
+    return Corpus(source_path, locale_path, DOMAIN, language_codes, dict(ALIASES))
+
+
+def complex_call_module(calls: int) -> str:
+    """Return the source of a single module making calls gettext calls with complex arguments."""
+    lines = ['from gettext import gettext, ngettext', '', '', 'def labels(prefix, count):', '    return [']
+    for index in range(calls):
+        if index % 2:
+            lines.append("        ngettext(prefix + 'item_{0}', prefix + 'items_{0}', count),".format(index))
+        else:
+            lines.append("        gettext('label_{0}.' + prefix),".format(index))
+    lines.append('    ]')
+    return '\n'.join(lines) + '\n'
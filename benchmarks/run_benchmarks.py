@@ -0,0 +1,155 @@
+"""Time parsing, catalog loading and validation over a synthetic corpus.
+
+Results are written as JSON so two versions can be compared:
+
+    python benchmarks/run_benchmarks.py --output before.json
+    git checkout <other version>
+    python benchmarks/run_benchmarks.py --output after.json --compare before.json
+"""
+import argparse
+import ast
+import contextlib
+import gettext
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.corpus import complex_call_module, generate_corpus  # noqa: E402
+from pychecktext import checktext_parser, validator  # noqa: E402
+from pychecktext.mo_catalog import MoCatalog  # noqa: E402
+from pychecktext.po_catalog import PoCatalog  # noqa: E402
+
+
+def time_phase(function: Callable[[], object], repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        # Reporting is not what is measured here
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+    return {'min': min(timings), 'median': statistics.median(timings)}
+
+
+def load_catalogs(corpus, class_: type):
+    # gettext caches catalogs by path, drop them so every repeat reads the files
+    gettext._translations.clear()
+    return validator.get_translation_object(corpus.locale_path, corpus.domain, corpus.languages, class_=class_)
+
+
+def run_benchmarks(corpus, repeat: int, jobs: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    results['parse'] = time_phase(lambda: checktext_parser.parse_folder(corpus.source_path, corpus.aliases), repeat)
+    if jobs > 1:
+        results['parse_jobs_{}'.format(jobs)] = time_phase(
+            lambda: checktext_parser.parse_folder(corpus.source_path, corpus.aliases, workers=jobs), repeat)
+    with contextlib.redirect_stdout(io.StringIO()):
+        calls = checktext_parser.parse_folder(corpus.source_path, corpus.aliases)
+    for name, class_ in [('gettext', validator.CheckTextTranslation), ('mmap', MoCatalog), ('po', PoCatalog)]:
+        results['load_{}'.format(name)] = time_phase(lambda: load_catalogs(corpus, class_), repeat)
+        with contextlib.redirect_stdout(io.StringIO()):
+            translators = load_catalogs(corpus, class_)
+        results['validate_{}'.format(name)] = time_phase(
+            lambda: validator.validate_translations(translators, calls), repeat)
+    # Against the .po catalogs, building the suggestion index of every language and querying each missing msgid
+    results['validate_suggest'] = time_phase(
+        lambda: validator.validate_translations(translators, calls, suggest=3), repeat)
+    return results
+
+
+def run_complex_call_benchmarks(sizes: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    """Time the argument extraction of modules with many complex calls, which should grow linearly with size."""
+    results = {}
+    for size in sizes:
+        source = complex_call_module(size)
+        tree = ast.parse(source)
+
+        def extract():
+            visitor = checktext_parser.CheckTextVisitor()
+            visitor.visit(tree)
+            visitor.process_calls(source)
+
+        results['complex_calls_{}'.format(size)] = time_phase(extract, repeat)
+    return results
+
+
+def revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_comparison(baseline: Dict[str, object], current: Dict[str, object]):
+    print('{:<24}{:>12}{:>12}{:>10}'.format('phase', baseline['revision'][:12], current['revision'][:12], 'ratio'))
+    for phase, timings in current['timings'].items():
+        before = baseline['timings'].get(phase)
+        if before is None:
+            print('{:<24}{:>12}{:>12.4f}{:>10}'.format(phase, '-', timings['min'], '-'))
+        else:
+            print('{:<24}{:>12.4f}{:>12.4f}{:>10.2f}'.format(phase, before['min'], timings['min'],
+                                                             timings['min'] / before['min']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='pyCheckText benchmarks')
+    parser.add_argument('--files', type=int, default=1000, help="Number of source files generated")
+    parser.add_argument('--calls', type=int, default=20, help="Calls per file that calls gettext")
+    parser.add_argument('--density', type=float, default=0.5, help="Fraction of files calling gettext")
+    parser.add_argument('--complex', type=float, default=0.05, help="Fraction of calls with complex arguments")
+    parser.add_argument('--messages', type=int, default=5000, help="Number of distinct messages")
+    parser.add_argument('--languages', type=int, default=4, help="Number of catalogs generated")
+    parser.add_argument('--completeness', type=float, default=0.95, help="Fraction of messages translated")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per phase, the fastest is compared")
+    parser.add_argument('--complex-sizes', type=int, nargs='*', default=[1000, 4000],
+                        help="Complex calls per module for the extraction scaling benchmark")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="Workers for the parallel parse")
+    parser.add_argument('--corpus', help="Folder to generate the corpus in, kept after the run")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="Compare the results with an earlier JSON file")
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        root = args.corpus or stack.enter_context(tempfile.TemporaryDirectory())
+        parameters = {key: getattr(args, key) for key in
+                      ('files', 'calls', 'density', 'complex', 'messages', 'languages', 'completeness')}
+        corpus = generate_corpus(root, args.files, args.calls, args.density, args.complex, args.messages,
+                                 args.languages, args.completeness)
+        results = {
+            'revision': revision(),
+            'python': platform.python_version(),
+            'parameters': parameters,
+            'timings': run_benchmarks(corpus, args.repeat, args.jobs)
+        }
+        results['timings'].update(run_complex_call_benchmarks(args.complex_sizes, args.repeat))
+    for phase, timings in results['timings'].items():
+        print('{:<24}min {:.4f}s  median {:.4f}s'.format(phase, timings['min'], timings['median']))
+    sizes = sorted(args.complex_sizes)
+    if len(sizes) > 1:
+        smallest = results['timings']['complex_calls_{}'.format(sizes[0])]['min']
+        largest = results['timings']['complex_calls_{}'.format(sizes[-1])]['min']
+        print('complex call extraction: {:.1f}x the time for {:.1f}x the calls'.format(
+            largest / smallest, sizes[-1] / sizes[0]))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['parameters'] != results['parameters']:
+            print('Warning: the corpus parameters differ from {}'.format(args.compare))
+        print_comparison(baseline, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,25 @@
-import datetime
-from dateutil import tz
-import teamcity.messages as tc
-
-try:
-    from teamcity import is_running_under_teamcity
-    if is_running_under_teamcity():
-        teamcity = True
-    else:
-        teamcity = False
-except ImportError:
-    teamcity = False
-
-teamcity_messages = tc.TeamcityServiceMessages()
+import functools
+import importlib.util
+import os
+
+
+@functools.lru_cache(maxsize=None)
+def running_under_teamcity() -> bool:
+    # What teamcity.is_running_under_teamcity checks, without importing teamcity-messages
+    return bool(os.environ.get('TEAMCITY_VERSION')) and importlib.util.find_spec('teamcity') is not None
+
+
+@functools.lru_cache(maxsize=None)
+def get_teamcity_messages():
+    """Return the TeamcityServiceMessages shared by the whole run, importing teamcity-messages on first use."""
+    import teamcity.messages as tc
+    return tc.TeamcityServiceMessages()
+
+
+def __getattr__(name: str):
+    # Kept for callers of the former module attributes, which were set up on import
+    if name == 'teamcity':
+        return running_under_teamcity()
+    if name == 'teamcity_messages':
+        return get_teamcity_messages()
+    raise AttributeError("module 'pychecktext' has no attribute '{}'".format(name))
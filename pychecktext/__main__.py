@@ -0,0 +1,4 @@
+import sys
+from pychecktext.cli import main
+
+sys.exit(main())
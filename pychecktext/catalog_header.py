@@ -0,0 +1,40 @@
+from typing import Callable, Dict, Tuple, Union
+import gettext
+
+
+def parse_header(header: str) -> Tuple[Dict[str, str], Union[str, None], Union[Callable[[int], int], None]]:
+    """Return the fields of a catalog header by lowercase name, its charset and its plural function.
+
+    The header, the translation of the empty msgid, is read the way
+    GNUTranslations._parse reads it. The charset and plural function are
+    None when the header does not give them.
+    """
+    info = {}
+    charset = None
+    plural = None
+    for item in header.split('\n'):
+        item = item.strip()
+        if ':' not in item:
+            continue
+        key, value = item.split(':', 1)
+        key = key.strip().lower()
+        value = value.strip()
+        info[key] = value
+        if key == 'content-type' and 'charset=' in value:
+            charset = value.split('charset=')[1]
+        elif key == 'plural-forms':
+            plural = gettext.c2py(value.split(';')[1].split('plural=')[1])
+    return info, charset, plural
+
+
+class CatalogHeader(object):
+    """The info and charset methods of GNUTranslations, for catalog readers keeping parse_header's results."""
+
+    _info = None
+    _charset = None
+
+    def info(self) -> Dict[str, str]:
+        return self._info or {}
+
+    def charset(self) -> Union[str, None]:
+        return self._charset
@@ -1,108 +1,385 @@
 import _ast
 import ast
-from typing import Dict, Union
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, NamedTuple, Pattern, Sequence, Tuple, Union
+import collections
+import functools
+import importlib.util
+import itertools
 import os
-from pychecktext import teamcity, teamcity_messages
+import re
+import sys
+import time
+from pychecktext.file_walker import walk_python_files
+from pychecktext.reporting import get_reporter
+from pychecktext.sharding import Shard
+from pychecktext.timing import timings
+
+# Only needed for annotations, importing them would slow down the start of every run
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from pychecktext.parse_cache import ParseCache
+
+# Bump whenever the calls found in a file change, so parse results cached by an older version are redone
+EXTRACTOR_VERSION = 2
+
+FUNCTION_SIGNATURES = {
+    "dgettext": [0, 1],
+    "dngettext": [0, 1, 2],
+    "dnpgettext": [0, 1, 2, 3],
+    "dpgettext": [0, 1, 2],
+    "gettext": [0],
+    "ldgettext": [0, 1],
+    "ldngettext": [0, 1, 2],
+    "lgettext": [0],
+    "lngettext": [0, 1],
+    "ngettext": [0, 1],
+    "npgettext": [0, 1, 2],
+    "pgettext": [0, 1]}
+
+# Line endings as the ast module counts them, form feeds do not end a line
+NEWLINE_PATTERN = re.compile(b'\r\n|\r|\n')
+
+# Files scanned by the last parse_folder call, and how each was handled
+scan_statistics = collections.Counter()
+
+
+# Files handed to a worker process at a time
+SCAN_BATCH_SIZE = 16
+
+
+class CallSite(NamedTuple):
+    """A call to a gettext function, args holds the message arguments only.
+
+    Complex calls hold the source text of their non-literal arguments.
+    lineno and col_offset locate the call as in the ast module.
+    """
+    function: str
+    args: Tuple[object, ...]
+    lineno: int
+    col_offset: int
+
+    def interned(self) -> 'CallSite':
+        """Return the call with its function name and string arguments interned.
+
+        The same few function names and msgids recur across thousands of
+        files, interning keeps a single copy of each in memory.
+        """
+        return CallSite(sys.intern(self.function),
+                        tuple(sys.intern(arg) if type(arg) is str else arg for arg in self.args),
+                        self.lineno, self.col_offset)
+
+
+class FileScan(NamedTuple):
+    """Result of scanning one file, calls is None when parsing raised error.
+
+    status is one of 'parsed', 'prefiltered' or 'cached'. signature is the
+    content_signature of the bytes scanned, when asked for.
+    """
+    calls: Union[Dict[str, List[CallSite]], None]
+    error: Union[SyntaxError, None]
+    status: str
+    seconds: float = 0.0
+    signature: Union[Tuple[int, int, str], None] = None
 
 
 class CheckTextVisitor(ast.NodeVisitor):
+    """Collects the calls to gettext functions and their aliases in a module.
+
+    The tree is walked once, iteratively, so calls are found wherever they
+    appear: in keyword arguments, lambdas, f-strings, comprehensions or the
+    receiver of another call. Functions are matched by name, either called
+    directly or as an attribute such as translation.gettext or self._.
+    """
+
     def __init__(self, aliases: Dict[str, str] = {}):
         self.literal_calls = []
         self.expression_calls = []
         self.aliases = aliases
-        self.function_signatures = {
-            "dgettext": [0, 1],
-            "dngettext": [0, 1, 2],
-            "dnpgettext": [0, 1, 2, 3],
-            "dpgettext": [0, 1, 2],
-            "gettext": [0],
-            "ldgettext": [0, 1],
-            "ldngettext": [0, 1, 2],
-            "lgettext": [0],
-            "lngettext": [0, 1],
-            "ngettext": [0, 1],
-            "npgettext": [0, 1, 2],
-            "pgettext": [0, 1]}
+        self.function_signatures = dict(FUNCTION_SIGNATURES)
         for alias, source in aliases.items():
             self.function_signatures[alias] = self.function_signatures[source]
 
-    def visit_Call(self, node: _ast.Call):
-        func_object = node.func
-        if hasattr(node, 'args'):
-            for arg in node.args:
-                if isinstance(arg, _ast.Call):
-                    self.visit_Call(arg)
-        if hasattr(func_object, 'id') and func_object.id in self.function_signatures:
-            # Get the calling function name, resolve aliases here
-            if func_object.id in self.aliases:
-                calling_name = self.aliases[func_object.id]
-            else:
-                calling_name = func_object.id
-            # A call to gettext or one of its aliases, check if we have a literal
-            called_args = []
-            message_args = [node.args[index] for index in self.function_signatures[func_object.id]]
-            if not isinstance(message_args, list):
-                message_args = [message_args]
-            has_complex_arg = False
-            for arg in message_args:
-                if isinstance(arg, _ast.Constant):
-                    called_args.append(arg.value)
+    def visit(self, node: ast.AST):
+        """Collect the calls in node and every node below it, in source order."""
+        function_signatures = self.function_signatures
+        ast_type = ast.AST
+        call_type = _ast.Call
+        name_type = _ast.Name
+        attribute_type = _ast.Attribute
+        # Load, Store and Del are shared leaves, there is nothing below them
+        context_types = (_ast.Load, _ast.Store, _ast.Del)
+        found = len(self.literal_calls), len(self.expression_calls)
+        stack = [node]
+        pop = stack.pop
+        push = stack.append
+        extend = stack.extend
+        while stack:
+            node = pop()
+            if type(node) is call_type:
+                func_object = node.func
+                if type(func_object) is name_type:
+                    name = func_object.id
+                elif type(func_object) is attribute_type:
+                    name = func_object.attr
                 else:
-                    has_complex_arg = True
-                    called_args.append(arg)
-            call_struct = {
-                "function": calling_name,
-                "args": called_args
-            }
-            if has_complex_arg:
-                self.expression_calls.append(call_struct)
+                    name = None
+                if name in function_signatures:
+                    self.visit_Call(node, name)
+            # Lists may also hold names or None, which have no fields to walk
+            for field in getattr(node, '_fields', ()):
+                value = getattr(node, field, None)
+                if type(value) is list:
+                    extend(value)
+                elif isinstance(value, ast_type) and not isinstance(value, context_types):
+                    push(value)
+        # The stack pops children last to first, put the calls found back in source order
+        for calls, start in zip((self.literal_calls, self.expression_calls), found):
+            calls[start:] = sorted(calls[start:], key=_call_position)
+
+    def visit_Call(self, node: _ast.Call, name: str):
+        """Record a call to the gettext function or alias name."""
+        message_indexes = self.function_signatures[name]
+        if len(node.args) <= message_indexes[-1]:
+            # Message arguments passed by keyword or unpacked can not be checked
+            return
+        # Get the calling function name, resolve aliases here
+        calling_name = self.aliases.get(name, name)
+        # A call to gettext or one of its aliases, check if we have a literal
+        called_args = []
+        has_complex_arg = False
+        for arg in (node.args[index] for index in message_indexes):
+            if isinstance(arg, _ast.Starred):
+                return
+            if isinstance(arg, _ast.Constant):
+                called_args.append(arg.value)
             else:
-                self.literal_calls.append(call_struct)
+                has_complex_arg = True
+                called_args.append(arg)
+        call_site = CallSite(calling_name, tuple(called_args), node.lineno, node.col_offset)
+        if has_complex_arg:
+            self.expression_calls.append(call_site)
+        else:
+            self.literal_calls.append(call_site.interned())
 
     def process_calls(self, source: str):
-        for call in self.expression_calls:
-            for index, call_arg in enumerate(call['args']):
-                if not isinstance(call_arg, _ast.Constant):
-                    source_call = ast.get_source_segment(source, call_arg)
-                    call['args'][index] = source_call
+        """Replace the expressions in the arguments of complex calls with their source text."""
+        if not self.expression_calls:
+            return
+        segments = SourceSegments(source)
+        for index, call in enumerate(self.expression_calls):
+            args = tuple(segments.segment(call_arg) if isinstance(call_arg, ast.AST) else call_arg
+                         for call_arg in call.args)
+            self.expression_calls[index] = call._replace(args=args).interned()
 
 
-def parse_folder(folder_path: str, alias: Dict[str, Union[str, None]]):
-    if teamcity:
-        teamcity_messages.customMessage('Checking tokens in folder {}'.format(folder_path), status='INFO', errorDetails=None)
-    else:
-        print("Checking gettext tokens in folder '{}'".format(folder_path))
-    folder_calls = {}
-    for subdir, _, files in os.walk(folder_path):
-        for filename in files:
-            file_path = subdir + os.sep + filename
-            if not filename.startswith('.') and file_path.endswith('.py'):
-                file_calls = parse_file(file_path, alias)
-                folder_calls[file_path] = file_calls
-    return folder_calls
-
-
-def parse_file(file_path: str, alias: Dict[str, Union[str, None]] = {}):
-    if teamcity:
-        teamcity_messages.customMessage('Checking tokens in file {}'.format(file_path),
-            status='INFO', errorDetails=None)
-    else:
-        print("Checking gettext tokens in file '{}'".format(file_path))
-    with open(file_path, 'r') as f:
-        data = f.read()
+def _call_position(call: CallSite) -> Tuple[int, int]:
+    return call.lineno, call.col_offset
+
+
+class SourceSegments(object):
+    """Source text of ast nodes, sliced from an index of line offsets built once per file.
+
+    ast.get_source_segment splits the whole source into lines on every call,
+    which is quadratic for files with many complex calls.
+    """
+
+    def __init__(self, source: str):
+        # Node columns are offsets into the UTF-8 encoding of their line
+        self._data = source.encode('utf-8')
+        self._line_starts = [0]
+        self._line_starts.extend(match.end() for match in NEWLINE_PATTERN.finditer(self._data))
+
+    def segment(self, node: ast.AST) -> Union[str, None]:
+        """Return the source text of node, or None if it has no location, as ast.get_source_segment."""
         try:
-            tree = ast.parse(data)
-        except SyntaxError as excinfo:
-            if teamcity:
-                teamcity_messages.customMessage("Syntax error whilst parsing file '{}'",
-                    status="ERROR", errorDetails=excinfo.msg)
-            else:
-                print("Syntax error in file '{}': {}".format(file_path, excinfo))
+            if node.end_lineno is None or node.end_col_offset is None:
+                return None
+            start = self._line_starts[node.lineno - 1] + node.col_offset
+            end = self._line_starts[node.end_lineno - 1] + node.end_col_offset
+        except AttributeError:
             return None
-        treeVisitor = CheckTextVisitor(alias)
-        treeVisitor.visit(tree)
-        treeVisitor.process_calls(data)
-        return {
-            'literal_calls': treeVisitor.literal_calls,
-            'complex_calls': treeVisitor.expression_calls
-        }
+        return self._data[start:end].decode('utf-8')
+
+
+def parse_folder(folder_path: str, alias: Dict[str, Union[str, None]], workers: int = 1,
+                 cache: Union['ParseCache', None] = None, exclude: Sequence[str] = (), gitignore: bool = False):
+    return dict(iter_folder_calls(folder_path, alias, workers, cache, exclude, gitignore))
+
+
+def iter_folder_calls(folder_path: str, alias: Dict[str, Union[str, None]], workers: int = 1,
+                      cache: Union['ParseCache', None] = None, exclude: Sequence[str] = (), gitignore: bool = False,
+                      shard: Union[Shard, None] = None) -> Iterator[Tuple[str, Union[Dict[str, list], None]]]:
+    """Yield (file_path, calls) for each python file in folder_path as soon as it is parsed.
+
+    Files come out in walk order whatever the number of workers, and only a
+    bounded number of files are held in flight at any time. Folders matching
+    exclude, or ignored by git when gitignore is set, are never entered.
+    With a shard only its share of the files is parsed.
+    """
+    get_reporter().folder_started(folder_path)
+    file_paths = walk_python_files(folder_path, exclude, gitignore)
+    if timings.enabled:
+        file_paths = timings.timed_iter('walk', file_paths)
+    if shard is not None:
+        file_paths = shard.select(file_paths)
+    yield from iter_file_calls(file_paths, alias, workers, cache)
+
+
+def iter_file_calls(file_paths: Iterable[str], alias: Dict[str, Union[str, None]], workers: int = 1,
+                    cache: Union['ParseCache', None] = None) -> Iterator[Tuple[str, Union[Dict[str, list], None]]]:
+    """Yield (file_path, calls) for each of file_paths as soon as it is parsed, see iter_folder_calls."""
+    reporter = get_reporter()
+    scan_statistics.clear()
+    # Reporting happens here in walk order, so the result and the log are
+    # identical whether or not the files were parsed in worker processes
+    for file_path, (file_calls, error, status, seconds, _) in _scan_files(file_paths, alias, workers, cache):
+        scan_statistics['files'] += 1
+        scan_statistics[status] += 1
+        if timings.enabled and status != 'cached':
+            timings.add(status, seconds)
+            timings.add_file(file_path, seconds)
+        reporter.file_scanned(file_path, error)
+        yield file_path, file_calls
+    if cache is not None:
+        cache.save()
+    reporter.scan_finished(scan_statistics)
+    reporter.flush()
+
+
+def parse_file(file_path: str, alias: Dict[str, Union[str, None]] = {}, cache: Union['ParseCache', None] = None):
+    reporter = get_reporter()
+    file_calls = cache.get(file_path, alias) if cache is not None else None
+    if file_calls is not None:
+        reporter.file_scanned(file_path, None)
+        reporter.flush()
+        return _interned_calls(file_calls)
+    file_calls, error, status, seconds, signature = _scan_file(file_path, alias, cache is not None)
+    if timings.enabled:
+        timings.add(status, seconds)
+        timings.add_file(file_path, seconds)
+    if cache is not None and file_calls is not None:
+        cache.put(file_path, alias, file_calls, signature)
+        cache.save()
+    reporter.file_scanned(file_path, error)
+    reporter.flush()
+    return file_calls
+
+
+def _scan_files(file_paths: Iterable[str], alias: Dict[str, Union[str, None]], workers: int,
+                cache: Union['ParseCache', None]) -> Iterator[Tuple[str, FileScan]]:
+    """Scan files in batches, yielding (file_path, scan) in the order of file_paths."""
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    batches = _batched(file_paths, SCAN_BATCH_SIZE)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = collections.deque()
+            for batch in batches:
+                cached = _cached_scans(batch, alias, cache)
+                misses = [file_path for file_path in batch if file_path not in cached]
+                pending.append((batch, cached, executor.submit(_scan_batch, misses, alias, cache is not None)))
+                # Keep every worker busy without reading ahead of the consumer
+                if len(pending) > workers * 2:
+                    yield from _merge_batch(*pending.popleft(), alias, cache)
+            while pending:
+                yield from _merge_batch(*pending.popleft(), alias, cache)
+    else:
+        for batch in batches:
+            cached = _cached_scans(batch, alias, cache)
+            misses = [file_path for file_path in batch if file_path not in cached]
+            yield from _merge_batch(batch, cached, _scan_batch(misses, alias, cache is not None), alias, cache)
+
+
+def _batched(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(items)
+    batch = list(itertools.islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(iterator, size))
+
+
+def _cached_scans(file_paths: List[str], alias: Dict[str, Union[str, None]],
+                  cache: Union['ParseCache', None]) -> Dict[str, FileScan]:
+    cached = {}
+    if cache is not None:
+        start = time.perf_counter()
+        for file_path in file_paths:
+            file_calls = cache.get(file_path, alias)
+            if file_calls is not None:
+                cached[file_path] = FileScan(_interned_calls(file_calls), None, 'cached')
+        if timings.enabled:
+            timings.add('cache', time.perf_counter() - start, len(file_paths))
+    return cached
+
+
+def _interned_calls(file_calls: Union[Dict[str, List[CallSite]], None]) -> Union[Dict[str, List[CallSite]], None]:
+    if file_calls is None:
+        return None
+    return {kind: [call.interned() for call in calls] for kind, calls in file_calls.items()}
+
+
+def _scan_batch(file_paths: List[str], alias: Dict[str, Union[str, None]], sign: bool = False) -> List[FileScan]:
+    return [_scan_file(file_path, alias, sign) for file_path in file_paths]
+
+
+def _merge_batch(file_paths: List[str], cached: Dict[str, FileScan], scans: Union[List[FileScan], 'Future'],
+                 alias: Dict[str, Union[str, None]], cache: Union['ParseCache', None]) -> Iterator[Tuple[str, FileScan]]:
+    if not isinstance(scans, list):
+        # Strings are no longer interned once they have been through pickle
+        scans = [scan._replace(calls=_interned_calls(scan.calls)) for scan in scans.result()]
+    scans = iter(scans)
+    for file_path in file_paths:
+        if file_path in cached:
+            yield file_path, cached[file_path]
+        else:
+            scan = next(scans)
+            if cache is not None and scan.calls is not None:
+                cache.put(file_path, alias, scan.calls, scan.signature)
+            yield file_path, scan
+
+
+@functools.lru_cache(maxsize=None)
+def _call_name_pattern(aliases: Tuple[str, ...]) -> Pattern[bytes]:
+    # Every builtin signature contains 'gettext', aliases must match a whole name
+    names = [re.escape(alias.encode()) for alias in sorted(aliases, key=len, reverse=True)]
+    return re.compile(b'|'.join([b'gettext'] + [rb'\b' + name + rb'\b' for name in names]))
+
+
+def has_gettext_call(data: bytes, alias: Dict[str, Union[str, None]] = {}) -> bool:
+    """Check in a single pass whether raw source mentions a gettext function or alias.
+
+    This may report calls that are not there, but never misses one.
+    """
+    return _call_name_pattern(tuple(alias)).search(data) is not None
+
+
+def _scan_file(file_path: str, alias: Dict[str, Union[str, None]], sign: bool = False) -> FileScan:
+    """Parse a single file without reporting, safe to run in a worker process.
+
+    With sign the scan carries the signature of the bytes read, for a cache
+    to store the calls against the content they were actually parsed from.
+    """
+    start = time.perf_counter()
+    with open(file_path, 'rb') as f:
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns if sign else None
+        data = f.read()
+    signature = None
+    if sign:
+        from pychecktext.parse_cache import content_signature
+        signature = content_signature(mtime_ns, data)
+    if not has_gettext_call(data, alias):
+        return FileScan({'literal_calls': [], 'complex_calls': []}, None, 'prefiltered', time.perf_counter() - start,
+                        signature)
+    try:
+        source = importlib.util.decode_source(data)
+        tree = ast.parse(source)
+    except SyntaxError as excinfo:
+        return FileScan(None, excinfo, 'parsed', time.perf_counter() - start, signature)
+    treeVisitor = CheckTextVisitor(alias)
+    treeVisitor.visit(tree)
+    treeVisitor.process_calls(source)
+    return FileScan({
+        'literal_calls': treeVisitor.literal_calls,
+        'complex_calls': treeVisitor.expression_calls
+    }, None, 'parsed', time.perf_counter() - start, signature)
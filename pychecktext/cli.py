@@ -0,0 +1,278 @@
+"""Command line interface of pyCheckText, also run by python -m pychecktext and scripts/checktext.py.
+
+Only argparse is imported up front, the parser, the validator and every
+optional backend are imported once the arguments ask for them, so a run
+from a pre-commit hook does not pay for features it does not use.
+"""
+import argparse
+import os
+from typing import Dict, List, Mapping, Tuple, Union
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='pyCheckText Argument Parser')
+    parser.add_argument_group('File path')
+    parser.add_argument('--folder_path')
+    parser.add_argument('--file_path')
+    parser.add_argument('--exclude', action='append', default=[],
+                        help="Glob of folders or files to skip, matched against their name and their path relative to "
+                             "--folder_path, may be given several times")
+    parser.add_argument('--gitignore', action='store_true',
+                        help="Also skip the folders and files ignored by the .gitignore files under --folder_path")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Number of processes used to parse a folder, 0 uses every available core")
+    parser.add_argument('--validate-jobs', type=int, default=1,
+                        help="Number of processes validating languages in parallel, each loading its own catalog, "
+                             "0 uses every available core")
+    parser.add_argument('--changed-since', metavar='REF',
+                        help="Only check the python files changed since the git ref REF, and every file for the languages "
+                             "whose catalogs changed")
+    parser.add_argument('--shard', metavar='K/N',
+                        help="Only check shard K of N of the files under --folder_path, balanced by file size")
+    parser.add_argument('--shard-results', metavar='FILE',
+                        help="Where --shard writes its results for scripts/merge_shards.py, defaults to "
+                             "checktext-shard-K-of-N.json")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running, validating again the files and languages that change under --folder_path "
+                             "and --translation_path")
+    parser.add_argument('--poll-interval', type=float, default=0.5,
+                        help="Seconds between checks for changes when --watch cannot use inotify")
+    parser.add_argument_group('Cache options')
+    parser.add_argument('--cache-dir', default='.checktext_cache',
+                        help="Folder holding the cache of parsed files")
+    parser.add_argument('--cache-size', type=int, default=100000,
+                        help="Maximum number of parsed files kept in the cache")
+    parser.add_argument('--no-cache', action='store_true', help="Parse every file, ignoring the cache")
+    parser.add_argument('--index',
+                        help="Keep the calls found under --folder_path in this index file, parsing only the files changed "
+                             "since the last run. Without --folder_path or --file_path the index is validated as it is")
+    parser.add_argument('--pot', help="Write the messages found to this .pot template, validation is skipped when no "
+                                      "--languages are given")
+    parser.add_argument_group('Output options')
+    parser.add_argument('--quiet', action='store_true', help="Do not report to the console or TeamCity")
+    parser.add_argument('--json', help="Write every problem found to this JSON file")
+    parser.add_argument('--sarif', help="Write every problem found to this SARIF file")
+    parser.add_argument_group('Instrumentation options')
+    parser.add_argument('--timings', action='store_true',
+                        help="Report time and count per phase and the slowest files to parse")
+    parser.add_argument('--timings-json', help="Write the timings to this JSON file, implies --timings")
+    parser.add_argument('--slowest', type=int, default=10, help="Number of slowest files reported by --timings")
+    parser.add_argument_group('Validation options')
+    parser.add_argument('--alias', action='append',
+                        nargs='+', help="List of function aliases to include in search",
+                        metavar='<alias> <target>')
+    parser.add_argument('--translation_path',
+                        help='Path to the locale folder, match the path used to install the translation')
+    parser.add_argument('--domain', action='append',
+                        help="Translation domain, given several times every domain is checked from a single parse")
+    parser.add_argument('--batch', metavar='CONFIG',
+                        help="JSON file listing the domains to check from a single parse, with their translation path "
+                             "and languages")
+    parser.add_argument('--catalog-reader', choices=['gettext', 'mmap', 'po'], default='gettext',
+                        help="Load catalogs with gettext, memory map them and only read the entries checked, "
+                             "or read the .po files directly without compiling them")
+    parser.add_argument('--load-threads', type=int, default=8,
+                        help="Number of catalogs located and loaded at the same time")
+    parser.add_argument('--suggest', type=int, default=0, metavar='K',
+                        help="Report the K msgids of the catalog closest to each missing msgid")
+    parser.add_argument('--languages', action='append',
+                        nargs='+', help="List of languages to examine")
+    return parser
+
+
+def _catalog_class(reader: str) -> type:
+    if reader == 'mmap':
+        from pychecktext.mo_catalog import MoCatalog
+        return MoCatalog
+    if reader == 'po':
+        from pychecktext.po_catalog import PoCatalog
+        return PoCatalog
+    from pychecktext.validator import CheckTextTranslation
+    return CheckTextTranslation
+
+
+def _first_domain(args: argparse.Namespace) -> Union[str, None]:
+    return args.domain[0] if args.domain else None
+
+
+def _alias_dict(args: argparse.Namespace) -> Dict[str, str]:
+    alias_dict = {}
+    if args.alias is not None:
+        assert len(args.alias[0]) % 2 == 0, "Provide aliases as 'alias' 'builtin', eg. '--alias _s gettext'"
+        alias_list = args.alias[0]
+        for alias, built_in in zip(alias_list[::2], alias_list[1::2]):
+            alias_dict[alias] = built_in
+    return alias_dict
+
+
+def _domain_configs(args: argparse.Namespace) -> Tuple[dict, Union[str, None]]:
+    """Return the config of every domain checked from a single parse, empty for a single domain, and the default one."""
+    from pychecktext import validator
+    domains = {}
+    default_domain = None
+    if args.batch is not None:
+        domains, default_domain = validator.read_domain_config(args.batch, args.translation_path,
+                                                               args.languages[0] if args.languages else None)
+    if args.translation_path is not None and args.languages is not None:
+        for extra_domain in args.domain or []:
+            domains.setdefault(extra_domain, validator.DomainConfig(args.translation_path, args.languages[0]))
+    if args.batch is None and len(args.domain or []) <= 1:
+        return {}, None
+    if not domains:
+        raise ValueError('No domains to check, give them a --translation_path and --languages, exiting...')
+    if args.watch or args.changed_since is not None or args.validate_jobs != 1:
+        raise ValueError('Several domains cannot be checked with --watch, --changed-since or --validate-jobs, '
+                         'exiting...')
+    return domains, default_domain or (args.domain[0] if args.domain else next(iter(domains)))
+
+
+def _set_reporter(args: argparse.Namespace, shard):
+    from pychecktext import reporting, sharding
+    reporters = [] if args.quiet else [reporting.get_reporter()]
+    if shard is not None:
+        shard_results = args.shard_results or 'checktext-shard-{}-of-{}.json'.format(shard.index, shard.count)
+        reporters.append(sharding.ShardRecorder(shard_results, shard))
+    if args.json is not None:
+        reporters.append(reporting.JsonReporter(args.json))
+    if args.sarif is not None:
+        reporters.append(reporting.SarifReporter(args.sarif))
+    reporter = reporting.MultiReporter(reporters)
+    reporting.set_reporter(reporter)
+    return reporter
+
+
+def _run_watch(args: argparse.Namespace, alias_dict: Dict[str, str], catalog_class: type):
+    if args.folder_path is None:
+        raise ValueError('--watch needs a --folder_path, exiting...')
+    from pychecktext import watch
+    watch.Watcher(args.folder_path, alias_dict, args.translation_path, _first_domain(args),
+                  args.languages[0], class_=catalog_class, exclude=args.exclude, gitignore=args.gitignore,
+                  suggest=args.suggest).run(args.poll_interval)
+
+
+def _open_cache(args: argparse.Namespace):
+    """Return the cache of parse results and the message index the arguments ask for, either may be None."""
+    cache = None
+    if not args.no_cache:
+        from pychecktext.parse_cache import ParseCache
+        cache = ParseCache(args.cache_dir, args.cache_size)
+    index = None
+    if args.index is not None:
+        from pychecktext.msgid_index import MessageIndex
+        # The index takes the place of the cache, falling back to it for the files it misses
+        cache = index = MessageIndex(args.index, cache)
+    return cache, index
+
+
+def _run_changed(args: argparse.Namespace, alias_dict: Dict[str, str], catalog_class: type, cache):
+    if args.folder_path is None:
+        raise ValueError('--changed-since needs a --folder_path, exiting...')
+    from pychecktext import git_changes
+    git_changes.validate_changed(args.folder_path, args.changed_since, alias_dict, args.translation_path,
+                                 _first_domain(args), args.languages[0], class_=catalog_class,
+                                 workers=args.jobs, cache=cache, exclude=args.exclude, gitignore=args.gitignore,
+                                 threads=args.load_threads, suggest=args.suggest)
+
+
+def _file_calls(args: argparse.Namespace, alias_dict: Dict[str, str], cache, index, shard):
+    """Return the calls to check, a dict or the (file_path, calls) pairs of a folder as they are parsed."""
+    from pychecktext import checktext_parser
+    if args.folder_path is not None:
+        # Files are validated as soon as they are parsed
+        calls = checktext_parser.iter_folder_calls(args.folder_path, alias_dict, workers=args.jobs, cache=cache,
+                                                   exclude=args.exclude, gitignore=args.gitignore, shard=shard)
+        # A shard only sees part of the folder, the index keeps the files of the other shards
+        if index is not None and shard is None:
+            calls = index.sync(calls)
+        return calls
+    if args.file_path is not None:
+        return {args.file_path: checktext_parser.parse_file(args.file_path, alias_dict, cache=cache)}
+    if index is not None:
+        if not os.path.exists(args.index):
+            raise ValueError('No path provided and no index at {}, exiting...'.format(args.index))
+        # Nothing to parse, the calls come from the index
+        return index.file_calls()
+    raise ValueError('No path provided, exiting...')
+
+
+def _load_catalogs(args: argparse.Namespace, catalog_class: type, domains: dict):
+    """Load the catalogs to validate against, or only locate them when --validate-jobs loads them in each worker."""
+    from pychecktext import validator
+    if domains:
+        # Every catalog is loaded once, then shared by all the files of the parse
+        return validator.get_domain_translations(domains, class_=catalog_class, threads=args.load_threads)
+    domain = _first_domain(args)
+    if args.validate_jobs == 1:
+        return validator.get_translation_object(args.translation_path, domain, args.languages[0],
+                                                class_=catalog_class, threads=args.load_threads)
+    return validator.find_catalogs(args.translation_path, domain, args.languages[0], threads=args.load_threads,
+                                   class_=catalog_class)
+
+
+def _validate(args: argparse.Namespace, catalogs, calls, catalog_class: type, default_domain: Union[str, None]):
+    from pychecktext import validator
+    if default_domain is not None:
+        validator.validate_domains(catalogs, calls, default_domain, suggest=args.suggest)
+    elif args.validate_jobs == 1:
+        validator.validate_translations(catalogs, calls, suggest=args.suggest)
+    else:
+        validator.validate_catalogs(args.translation_path, _first_domain(args), catalogs, calls,
+                                    workers=args.validate_jobs, class_=catalog_class, suggest=args.suggest)
+
+
+def _run_check(args: argparse.Namespace, alias_dict: Dict[str, str], catalog_class: type, cache, index, shard,
+               domains: dict, default_domain: Union[str, None]):
+    """Parse, validate and write the .pot template, as the arguments ask."""
+    validate = args.languages is not None or args.pot is None or bool(domains)
+    # Loaded before parsing, so files are validated as soon as they are parsed
+    catalogs = _load_catalogs(args, catalog_class, domains) if validate else None
+    calls = _file_calls(args, alias_dict, cache, index, shard)
+    if args.pot is not None and index is None and not isinstance(calls, Mapping):
+        # The calls are walked twice, once validated and once written
+        calls = list(calls)
+    if validate:
+        _validate(args, catalogs, calls, catalog_class, default_domain)
+    else:
+        for _ in calls:
+            pass
+    if args.pot is not None:
+        from pychecktext.msgid_index import write_pot
+        write_pot(args.pot, index.file_calls() if index is not None else calls)
+
+
+def main(argv: Union[List[str], None] = None) -> int:
+    """Run a check as the command line arguments argv ask, returning 1 when a problem was reported, else 0."""
+    args = build_parser().parse_args(argv)
+    from pychecktext import sharding
+    from pychecktext.timing import timings
+
+    alias_dict = _alias_dict(args)
+    domains, default_domain = _domain_configs(args)
+    if args.timings or args.timings_json:
+        timings.enable(args.slowest)
+    shard = None
+    if args.shard is not None:
+        if args.folder_path is None or args.watch or args.changed_since is not None:
+            raise ValueError('--shard needs a --folder_path and cannot be combined with --watch or --changed-since, '
+                             'exiting...')
+        shard = sharding.Shard.parse(args.shard)
+    reporter = _set_reporter(args, shard)
+
+    reporter.suite_started("checkGetTextTokens")
+    catalog_class = _catalog_class(args.catalog_reader)
+    if args.watch:
+        _run_watch(args, alias_dict, catalog_class)
+        reporter.close()
+        return 1 if reporter.failed else 0
+    cache, index = _open_cache(args)
+    if args.changed_since is not None:
+        _run_changed(args, alias_dict, catalog_class, cache)
+    else:
+        _run_check(args, alias_dict, catalog_class, cache, index, shard, domains, default_domain)
+    if cache is not None:
+        cache.close()
+    reporter.suite_finished("checkGetTextTokens")
+    reporter.close()
+    if timings.enabled:
+        timings.report(args.timings_json)
+    return 1 if reporter.failed else 0
@@ -0,0 +1,182 @@
+import fnmatch
+import os
+import re
+from typing import Iterator, List, Sequence, Tuple
+
+
+def _gitignore_regex(pattern: str) -> str:
+    """Translate a .gitignore glob, without its negation and trailing slash, to a regular expression."""
+    parts = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith('**/', index):
+            parts.append('(?:.*/)?')
+            index += 3
+            continue
+        if pattern.startswith('/**', index) and index + 3 == len(pattern):
+            parts.append('/.*')
+            index += 3
+            continue
+        if pattern.startswith('**', index):
+            parts.append('.*')
+            index += 2
+            continue
+        if char == '*':
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', index + 2)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                content = pattern[index + 1:end]
+                if content.startswith('!'):
+                    content = '^' + content[1:]
+                parts.append('[{}]'.format(content.replace('\\', '\\\\')))
+                index = end
+        elif char == '\\' and index + 1 < len(pattern):
+            index += 1
+            parts.append(re.escape(pattern[index]))
+        else:
+            parts.append(re.escape(char))
+        index += 1
+    return ''.join(parts)
+
+
+class GitIgnoreRule(object):
+    """One pattern of a .gitignore file, matched against paths relative to the folder holding it."""
+
+    def __init__(self, pattern: str):
+        self.negate = pattern.startswith('!')
+        if self.negate:
+            pattern = pattern[1:]
+        self.directory_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        # A slash anywhere but at the end anchors the pattern to the folder of the .gitignore
+        if '/' in pattern:
+            regex = _gitignore_regex(pattern.lstrip('/'))
+        else:
+            regex = '(?:.*/)?' + _gitignore_regex(pattern)
+        self.regex = re.compile(regex + '$', re.DOTALL)
+
+    def matches(self, relative_path: str, is_dir: bool) -> bool:
+        return (is_dir or not self.directory_only) and self.regex.match(relative_path) is not None
+
+
+def read_gitignore(file_path: str) -> List[GitIgnoreRule]:
+    rules = []
+    try:
+        with open(file_path, encoding='utf-8', errors='replace') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    for line in lines:
+        # Trailing spaces are ignored unless escaped
+        if not line.endswith('\\ '):
+            line = line.rstrip(' ')
+        if not line or line.startswith('#'):
+            continue
+        # Escaped leading characters such as \# or \! are taken literally by the pattern
+        rules.append(GitIgnoreRule(line))
+    return rules
+
+
+class FolderWalker(object):
+    """Finds the python files under folder_path, pruning excluded folders before entering them.
+
+    Names starting with a dot are always skipped. exclude holds glob
+    patterns matched against both the name and the path relative to
+    folder_path, with forward slashes. With gitignore the .gitignore files
+    found along the way are honoured too. Folders and files are visited in
+    sorted order.
+    """
+
+    def __init__(self, folder_path: str, exclude: Sequence[str] = (), gitignore: bool = False):
+        self.folder_path = folder_path
+        self.gitignore = gitignore
+        self._exclude = re.compile('|'.join(fnmatch.translate(pattern) for pattern in exclude)) if exclude else None
+        # The rules of each folder, by path relative to folder_path, with the rules of its parents first
+        self._rules = {}
+
+    def _folder_rules(self, folder: str, relative_folder: str,
+                      parent_rules: List[Tuple[str, GitIgnoreRule]]) -> List[Tuple[str, GitIgnoreRule]]:
+        rules = self._rules.get(relative_folder)
+        if rules is None:
+            rules = parent_rules + [(relative_folder, rule)
+                                    for rule in read_gitignore(os.path.join(folder, '.gitignore'))]
+            self._rules[relative_folder] = rules
+        return rules
+
+    def _excluded(self, name: str, relative_path: str, is_dir: bool,
+                  rules: List[Tuple[str, GitIgnoreRule]]) -> bool:
+        if name.startswith('.'):
+            return True
+        if self._exclude is not None and (self._exclude.match(name) or self._exclude.match(relative_path)):
+            return True
+        ignored = False
+        for base, rule in rules:
+            if ignored == rule.negate:
+                local_path = relative_path[len(base) + 1:] if base else relative_path
+                if rule.matches(local_path, is_dir):
+                    ignored = not rule.negate
+        return ignored
+
+    def walk(self) -> Iterator[str]:
+        """Yield the path of every python file that is not excluded."""
+        # Folders still to visit, as (path, path relative to folder_path, gitignore rules of the parent)
+        stack = [(self.folder_path, '', [])]
+        while stack:
+            folder, relative_folder, parent_rules = stack.pop()
+            rules = self._folder_rules(folder, relative_folder, parent_rules) if self.gitignore else parent_rules
+            try:
+                with os.scandir(folder) as scanner:
+                    entries = sorted(scanner, key=lambda entry: entry.name)
+            except OSError:
+                continue
+            folders = []
+            for entry in entries:
+                name = entry.name
+                try:
+                    # Like os.walk, symlinked folders are not followed
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if not is_dir and not name.endswith('.py'):
+                    continue
+                relative_path = relative_folder + '/' + name if relative_folder else name
+                if self._excluded(name, relative_path, is_dir, rules):
+                    continue
+                if is_dir:
+                    folders.append((entry.path, relative_path, rules))
+                elif entry.is_file():
+                    yield entry.path
+            folders.reverse()
+            stack.extend(folders)
+
+    def is_excluded(self, path: str) -> bool:
+        """Check whether path, or a folder it is in, is excluded from the walk."""
+        relative_path = os.path.relpath(path, self.folder_path)
+        if relative_path == os.curdir:
+            return False
+        if relative_path.startswith(os.pardir):
+            return True
+        names = relative_path.split(os.sep)
+        folder = self.folder_path
+        relative_folder = ''
+        rules = self._folder_rules(folder, relative_folder, []) if self.gitignore else []
+        for depth, name in enumerate(names):
+            relative_name = relative_folder + '/' + name if relative_folder else name
+            is_dir = depth < len(names) - 1 or os.path.isdir(path)
+            if self._excluded(name, relative_name, is_dir, rules):
+                return True
+            folder = os.path.join(folder, name)
+            relative_folder = relative_name
+            if is_dir and self.gitignore:
+                rules = self._folder_rules(folder, relative_folder, rules)
+        return False
+
+
+def walk_python_files(folder_path: str, exclude: Sequence[str] = (), gitignore: bool = False) -> Iterator[str]:
+    return FolderWalker(folder_path, exclude, gitignore).walk()
@@ -0,0 +1,71 @@
+import os
+import subprocess
+from typing import Dict, List, Sequence, Set, Union
+from pychecktext import checktext_parser, validator
+from pychecktext.file_walker import FolderWalker
+from pychecktext.parse_cache import ParseCache
+
+
+def _git(folder_path: str, *args: str) -> str:
+    try:
+        return subprocess.run(['git', '-C', folder_path] + list(args), check=True, stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE).stdout.decode('utf-8', errors='surrogateescape')
+    except FileNotFoundError:
+        raise ValueError('git is needed to find the files changed') from None
+    except subprocess.CalledProcessError as excinfo:
+        raise ValueError('git {} failed: {}'.format(' '.join(args), excinfo.stderr.decode(errors='replace').strip())) \
+            from None
+
+
+def changed_paths(folder_path: str, ref: str) -> Set[str]:
+    """Return the absolute paths of the files changed since ref in the git repository holding folder_path.
+
+    Changes are taken from the merge base of ref and HEAD, as a pull request
+    shows them, up to the working tree, including untracked files that are
+    not ignored, anywhere in the repository. Deleted files are left out.
+    """
+    root = _git(folder_path, 'rev-parse', '--show-toplevel').strip()
+    merge_base = _git(folder_path, 'merge-base', ref, 'HEAD').strip()
+    names = _git(folder_path, 'diff', '--name-only', '--no-renames', '--diff-filter=d', '-z', merge_base, '--')
+    # ls-files only lists the folder it runs in, catalogs may be outside of folder_path
+    untracked = _git(root, 'ls-files', '--others', '--exclude-standard', '--full-name', '-z')
+    return {os.path.normpath(os.path.join(root, name)) for name in (names + untracked).split('\0') if name}
+
+
+def validate_changed(folder_path: str, ref: str, alias: Dict[str, Union[str, None]], translation_path: str,
+                     domain: str, languages: List[str], class_: type = validator.CheckTextTranslation,
+                     workers: int = 1, cache: Union[ParseCache, None] = None, exclude: Sequence[str] = (),
+                     gitignore: bool = False, threads: int = 8, suggest: int = 0):
+    """Validate only what changed since ref.
+
+    The python files changed under folder_path are parsed and validated
+    against every language. When catalogs of some languages changed as
+    well, every other file of folder_path is validated against those
+    languages only.
+    """
+    changed = changed_paths(folder_path, ref)
+    # git reports paths below the real path of the repository
+    folder_path = os.path.realpath(folder_path)
+    catalog_folder = os.path.realpath(translation_path)
+    changed_languages = {validator.catalog_language(path, catalog_folder, domain, languages, class_)
+                         for path in changed}
+    changed_languages.discard(None)
+    translators = validator.get_translation_object(translation_path, domain, languages, class_=class_,
+                                                   threads=threads)
+    # Converted once, as they are validated against twice
+    translators = {lang: validator.index_catalog(translator) for lang, translator in translators.items()}
+    walker = FolderWalker(folder_path, exclude, gitignore)
+    changed_files = sorted(path for path in changed
+                           if path.endswith('.py') and os.path.isfile(path) and not walker.is_excluded(path))
+    if not changed_languages:
+        calls = checktext_parser.iter_file_calls(changed_files, alias, workers, cache)
+        validator.validate_translations(translators, calls, suggest)
+        return
+    file_calls = checktext_parser.parse_folder(folder_path, alias, workers, cache, exclude, gitignore)
+    validator.validate_translations(translators, {file_path: file_calls[file_path] for file_path in changed_files
+                                                  if file_path in file_calls}, suggest)
+    changed_files = set(changed_files)
+    validator.validate_translations({lang: translator for lang, translator in translators.items()
+                                     if lang in changed_languages},
+                                    {file_path: calls for file_path, calls in file_calls.items()
+                                     if file_path not in changed_files}, suggest)
@@ -0,0 +1,21 @@
+"""NumPy, imported the first time it is asked for as it takes longer to import than the whole of pyCheckText.
+
+plurals and suggestions compute in bulk with it when it is installed and
+fall back to pure python otherwise.
+"""
+
+# Placeholder for numpy until get_numpy is first called, None once it is found missing
+_NOT_IMPORTED = object()
+numpy = _NOT_IMPORTED
+
+
+def get_numpy():
+    """Return the numpy module, or None when it is not installed."""
+    global numpy
+    if numpy is _NOT_IMPORTED:
+        try:
+            import numpy as module
+        except ImportError:
+            module = None
+        numpy = module
+    return numpy
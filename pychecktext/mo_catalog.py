@@ -0,0 +1,131 @@
+from typing import BinaryIO, Iterable, List, Set, Tuple, Union
+import mmap
+import struct
+from pychecktext.catalog_header import CatalogHeader, parse_header
+
+LE_MAGIC = 0x950412de
+BE_MAGIC = 0xde120495
+
+
+def hash_string(value: bytes) -> int:
+    """The hashpjw function GNU gettext uses to build the .mo hash table."""
+    hval = 0
+    for char in value:
+        hval = (hval << 4) + char
+        high_bits = hval & 0xf0000000
+        if high_bits:
+            hval ^= high_bits >> 24
+            hval ^= high_bits
+    return hval
+
+
+class MoCatalog(CatalogHeader):
+    """Read-only, memory mapped view of a compiled .mo catalog.
+
+    Keys are looked up through the hash table of the file, or by a binary
+    search of its sorted original strings when it has none, so only the
+    entries that are asked for are ever read or decoded. Can be given to
+    get_translation_object as its class_ in place of CheckTextTranslation.
+    """
+
+    def __init__(self, fp: BinaryIO):
+        filename = getattr(fp, 'name', '')
+        self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = struct.unpack_from('<I', self._map)[0]
+        if magic == LE_MAGIC:
+            self._order = '<'
+        elif magic == BE_MAGIC:
+            self._order = '>'
+        else:
+            raise OSError(0, 'Bad magic number', filename)
+        version, self._count, self._originals, self._translations, self._hash_size, self._hash_offset = \
+            struct.unpack_from(self._order + '6I', self._map, 4)
+        if version >> 16 not in (0, 1):
+            raise OSError(0, 'Bad version number ' + str(version >> 16), filename)
+        self.plural = lambda n: int(n != 1)
+        header = self._find(b'')
+        if header is not None:
+            self._info, self._charset, plural = parse_header(
+                self._translation(header).decode('ascii', errors='replace'))
+            if plural is not None:
+                self.plural = plural
+
+    def _original(self, index: int) -> bytes:
+        length, offset = struct.unpack_from(self._order + '2I', self._map, self._originals + 8 * index)
+        return self._map[offset:offset + length]
+
+    def _translation(self, index: int) -> bytes:
+        length, offset = struct.unpack_from(self._order + '2I', self._map, self._translations + 8 * index)
+        return self._map[offset:offset + length]
+
+    def _find(self, message: bytes) -> Union[int, None]:
+        """Return the entry index of message, the msgid of plural entries ends at the first NUL."""
+        if self._hash_size > 2:
+            hval = hash_string(message)
+            index = hval % self._hash_size
+            increment = 1 + hval % (self._hash_size - 2)
+            while True:
+                entry = struct.unpack_from(self._order + 'I', self._map, self._hash_offset + 4 * index)[0]
+                if entry == 0:
+                    return None
+                if self._original(entry - 1).split(b'\0', 1)[0] == message:
+                    return entry - 1
+                if index >= self._hash_size - increment:
+                    index -= self._hash_size - increment
+                else:
+                    index += increment
+        # Original strings are sorted, and NUL sorts before any other byte
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            original = self._original(middle).split(b'\0', 1)[0]
+            if original < message:
+                low = middle + 1
+            elif original > message:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def _forms(self, context: Union[str, None], msgid: str, plural: bool) -> Union[List[bytes], None]:
+        """Return the translations of a singular or plural message, None if the catalog has no such entry."""
+        if context is not None:
+            msgid = context + '\x04' + msgid
+        try:
+            message = msgid.encode(self._charset or 'ascii')
+        except (UnicodeEncodeError, LookupError):
+            return None
+        index = self._find(message)
+        if index is None or (b'\0' in self._original(index)) != plural:
+            return None
+        translation = self._translation(index)
+        return translation.split(b'\0') if plural else [translation]
+
+    def __contains__(self, key: Tuple[Union[str, None], str, Union[int, None]]) -> bool:
+        context, msgid, plural_index = key
+        forms = self._forms(context, msgid, plural_index is not None)
+        if forms is None:
+            return False
+        form = forms[plural_index or 0] if (plural_index or 0) < len(forms) else b''
+        return form != b''
+
+    def missing_plurals(self, context: Union[str, None], msgid: str, plural_indexes: Iterable[int]) -> List[int]:
+        """Return the plural_indexes without a translation, looking the message up once."""
+        forms = self._forms(context, msgid, True) or []
+        return [index for index in plural_indexes if index >= len(forms) or forms[index] == b'']
+
+    def missing(self, keys: Iterable[Tuple[Union[str, None], str, Union[int, None]]]) -> Set[
+            Tuple[Union[str, None], str, Union[int, None]]]:
+        return {key for key in keys if key not in self}
+
+    def msgids(self) -> Set[str]:
+        """Return the msgids with a translation, in any context, without the header, reading every entry."""
+        charset = self._charset or 'ascii'
+        msgids = set()
+        for index in range(self._count):
+            if not self._translation(index).strip(b'\0'):
+                continue
+            message = self._original(index).split(b'\0', 1)[0].decode(charset, errors='replace')
+            if message:
+                msgids.add(message.rpartition('\x04')[2])
+        return msgids
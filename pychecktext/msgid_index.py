@@ -0,0 +1,241 @@
+import ast
+import json
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+from pychecktext.checktext_parser import EXTRACTOR_VERSION, CallSite
+from pychecktext.parse_cache import ParseCache, file_signature, unchanged_mtime
+from pychecktext.validator import MESSAGE_ARGUMENTS, FileCalls
+
+# Bump whenever the layout of the index file changes
+INDEX_VERSION = 2
+
+# Longest reference line written to a .pot file, as xgettext wraps them
+POT_LINE_WIDTH = 79
+
+
+def _encode_arg(arg: object) -> object:
+    # Non string constants such as gettext(b'bytes') keep their Python literal
+    return arg if type(arg) is str else {'literal': repr(arg)}
+
+
+def _decode_arg(arg: object) -> object:
+    return sys.intern(arg) if type(arg) is str else ast.literal_eval(arg['literal'])
+
+
+def _encode_calls(file_calls: Dict[str, List[CallSite]]) -> Dict[str, list]:
+    return {kind: [[call.function, [_encode_arg(arg) for arg in call.args], call.lineno, call.col_offset]
+                   for call in calls]
+            for kind, calls in file_calls.items()}
+
+
+def _decode_calls(encoded: Dict[str, list]) -> Dict[str, List[CallSite]]:
+    return {kind: [CallSite(sys.intern(function), tuple(_decode_arg(arg) for arg in args), lineno, col_offset)
+                   for function, args, lineno, col_offset in calls]
+            for kind, calls in encoded.items()}
+
+
+class MessageIndex(object):
+    """The gettext calls of a code base, kept in a sorted JSON file so messages can be validated without parsing.
+
+    Used in place of a ParseCache, the index stores the calls of every file
+    parsed and hands them back while the file is unchanged, judged like
+    ParseCache by its mtime and size or else its content hash. Files are
+    keyed by their path relative to the folder of the index file, so the
+    index can be moved along with the sources. A different alias map or
+    extractor version empties the index, and the entry of a file that
+    changed is dropped until it parses again. Misses fall through to cache
+    when one is given.
+    """
+
+    def __init__(self, index_path: str, cache: Union[ParseCache, None] = None):
+        self.index_path = index_path
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._base = os.path.dirname(os.path.abspath(index_path))
+        self._alias = None
+        self._files = {}
+        self._dirty = False
+        try:
+            with open(index_path, encoding='utf-8') as f:
+                content = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError as excinfo:
+            raise ValueError('{} is not a message index: {}'.format(index_path, excinfo)) from None
+        # An index written by another version, or extracted by another parser, is rebuilt from scratch
+        if content.get('version') == INDEX_VERSION and content.get('extractor') == EXTRACTOR_VERSION:
+            self._alias = content['alias']
+            self._files = content['files']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def _key(self, file_path: str) -> str:
+        return os.path.relpath(os.path.abspath(file_path), self._base).replace(os.sep, '/')
+
+    def _path(self, key: str) -> str:
+        return os.path.join(os.path.dirname(self.index_path), *key.split('/'))
+
+    @staticmethod
+    def _alias_key(alias: Dict[str, Union[str, None]]) -> List[List[Union[str, None]]]:
+        return [list(item) for item in sorted(alias.items())]
+
+    def get(self, file_path: str, alias: Dict[str, Union[str, None]]) -> FileCalls:
+        """Return the indexed calls for file_path, or None if the file changed since it was indexed."""
+        key = self._key(file_path)
+        entry = self._files.get(key) if self._alias == self._alias_key(alias) else None
+        if entry is not None:
+            mtime_ns = unchanged_mtime(file_path, entry['mtime_ns'], entry['size'], entry['digest'])
+            if mtime_ns is None:
+                # Stale whatever the parse gives, put stores the new calls and a file failing to parse has none
+                del self._files[key]
+                self._dirty = True
+                entry = None
+            elif mtime_ns != entry['mtime_ns']:
+                entry['mtime_ns'] = mtime_ns
+                self._dirty = True
+        if entry is not None:
+            self.hits += 1
+            return _decode_calls(entry['calls'])
+        self.misses += 1
+        file_calls = self.cache.get(file_path, alias) if self.cache is not None else None
+        if file_calls is not None:
+            self._store(key, alias, file_calls, file_signature(file_path))
+        return file_calls
+
+    def put(self, file_path: str, alias: Dict[str, Union[str, None]], file_calls: Dict[str, List[CallSite]],
+            signature: Union[Tuple[int, int, str], None] = None):
+        """Store the calls parsed from file_path, signature is as for ParseCache.put."""
+        signature = signature or file_signature(file_path)
+        self._store(self._key(file_path), alias, file_calls, signature)
+        if self.cache is not None:
+            self.cache.put(file_path, alias, file_calls, signature)
+
+    def _store(self, key: str, alias: Dict[str, Union[str, None]], file_calls: Dict[str, List[CallSite]],
+               signature: Tuple[int, int, str]):
+        alias_key = self._alias_key(alias)
+        if alias_key != self._alias:
+            self._alias = alias_key
+            self._files = {}
+        mtime_ns, size, digest = signature
+        self._files[key] = {'mtime_ns': mtime_ns, 'size': size, 'digest': digest, 'calls': _encode_calls(file_calls)}
+        self._dirty = True
+
+    def sync(self, calls: Iterable[Tuple[str, FileCalls]]) -> Iterator[Tuple[str, FileCalls]]:
+        """Pass the (file_path, calls) pairs of a whole folder through, then forget the files not among them.
+
+        Files deleted or excluded since the last run are dropped this way,
+        as are files that no longer parse.
+        """
+        seen = set()
+        for file_path, file_calls in calls:
+            if file_calls is not None:
+                seen.add(self._key(file_path))
+            yield file_path, file_calls
+        stale = self._files.keys() - seen
+        if stale:
+            for key in stale:
+                del self._files[key]
+            self._dirty = True
+
+    def file_calls(self) -> Dict[str, Dict[str, List[CallSite]]]:
+        """Return the indexed calls of every file, by path, as parse_folder would."""
+        return {self._path(key): _decode_calls(self._files[key]['calls']) for key in sorted(self._files)}
+
+    def save(self):
+        if self.cache is not None:
+            self.cache.save()
+        if not self._dirty:
+            return
+        content = {'version': INDEX_VERSION, 'extractor': EXTRACTOR_VERSION, 'alias': self._alias or [],
+                   'files': self._files}
+        # Written aside and renamed, so an interrupted run leaves the previous index intact
+        temporary_path = self.index_path + '.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            json.dump(content, f, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        os.replace(temporary_path, self.index_path)
+        self._dirty = False
+
+    def close(self):
+        self.save()
+        if self.cache is not None:
+            self.cache.close()
+
+
+def _pot_string(keyword: str, value: str) -> str:
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\t', '\\t').replace('\r', '\\r')
+    lines = escaped.split('\n')
+    if len(lines) > 2 or (len(lines) == 2 and lines[1]):
+        # Multi-line strings are split after each newline, as xgettext does
+        parts = [line + '\\n' for line in lines[:-1]] + ([lines[-1]] if lines[-1] else [])
+        return '{} ""\n'.format(keyword) + ''.join('"{}"\n'.format(part) for part in parts)
+    return '{} "{}"\n'.format(keyword, '\\n'.join(lines))
+
+
+def _pot_references(references: List[str]) -> str:
+    lines = []
+    line = '#:'
+    for reference in references:
+        if len(line) > 2 and len(line) + 1 + len(reference) > POT_LINE_WIDTH:
+            lines.append(line)
+            line = '#:'
+        line += ' ' + reference
+    lines.append(line)
+    return ''.join(line + '\n' for line in lines)
+
+
+def write_pot(pot_path: str, calls: Union[Mapping[str, FileCalls], Iterable[Tuple[str, FileCalls]]]):
+    """Write the messages of the literal calls to a .pot template.
+
+    Messages come out in the order they are first called, with the file and
+    line of every call relative to the folder of the template. A message
+    called both with and without a plural gets a single plural entry.
+    """
+    if isinstance(calls, Mapping):
+        calls = calls.items()
+    pot_folder = os.path.dirname(os.path.abspath(pot_path))
+    # (context, msgid) of each message, in order, mapped to its plural msgid and its references as an ordered set
+    messages = {}
+    for file_path, file_calls in calls:
+        if file_calls is None:
+            continue
+        try:
+            reference_path = os.path.relpath(os.path.abspath(file_path), pot_folder).replace(os.sep, '/')
+        except ValueError:
+            # Another drive on Windows
+            reference_path = file_path
+        for call in file_calls['literal_calls']:
+            _, context_index, msgid_index, plural_index = MESSAGE_ARGUMENTS[call.function]
+            context = call.args[context_index] if context_index is not None else None
+            msgid = call.args[msgid_index]
+            plural = call.args[plural_index] if plural_index is not None else None
+            if not all(type(arg) is str for arg in (context or '', msgid, plural or '')) or msgid == '':
+                # Not a message a catalog can hold, the empty msgid is the header
+                continue
+            message = messages.setdefault((context, msgid), [None, {}])
+            if message[0] is None:
+                message[0] = plural
+            message[1]['{}:{}'.format(reference_path, call.lineno)] = None
+    with open(pot_path, 'w', encoding='utf-8') as f:
+        f.write('# Messages extracted by pyCheckText\n'
+                'msgid ""\n'
+                'msgstr ""\n'
+                '"Content-Type: text/plain; charset=UTF-8\\n"\n'
+                '"Content-Transfer-Encoding: 8bit\\n"\n')
+        for (context, msgid), (plural, references) in messages.items():
+            f.write('\n' + _pot_references(list(references)))
+            if context is not None:
+                f.write(_pot_string('msgctxt', context))
+            f.write(_pot_string('msgid', msgid))
+            if plural is None:
+                f.write('msgstr ""\n')
+            else:
+                f.write(_pot_string('msgid_plural', plural) + 'msgstr[0] ""\nmsgstr[1] ""\n')
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from typing import Dict, Tuple, Union
+from pychecktext.checktext_parser import EXTRACTOR_VERSION
+
+# Bump whenever the layout of the cached parse results changes
+CACHE_VERSION = 3
+
+
+def file_digest(file_path: str) -> str:
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def file_signature(file_path: str) -> Tuple[int, int, str]:
+    """Return the mtime, size and content hash recorded along with the calls of a file."""
+    with open(file_path, 'rb') as f:
+        return content_signature(os.fstat(f.fileno()).st_mtime_ns, f.read())
+
+
+def content_signature(mtime_ns: int, data: bytes) -> Tuple[int, int, str]:
+    """Return the signature of the content data of a file, read when its mtime was mtime_ns."""
+    return mtime_ns, len(data), hashlib.sha256(data).hexdigest()
+
+
+def unchanged_mtime(file_path: str, mtime_ns: int, size: int, digest: str) -> Union[int, None]:
+    """Return the current mtime of file_path if it still holds the content recorded, None if it changed.
+
+    The content is only hashed when the size is the same but the mtime is
+    not, as after a fresh checkout.
+    """
+    stat = os.stat(file_path)
+    if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size):
+        if stat.st_size != size or file_digest(file_path) != digest:
+            return None
+    return stat.st_mtime_ns
+
+
+class ParseCache(object):
+    """On-disk cache of parse_file results.
+
+    Entries are keyed by the absolute file path and the alias map used for
+    the parse, along with the extractor version, so a parser finding other
+    calls never reads the results of an older one. An entry is valid while
+    the file's mtime and size are unchanged, or failing that while its
+    content hash still matches, so a fresh checkout with new mtimes still
+    hits. Once more than max_entries are
+    stored the least recently used entries are evicted on save.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 100000):
+        # Only imported by runs that use the cache
+        import sqlite3
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._used = {}
+        self._connection = sqlite3.connect(os.path.join(
+            cache_dir, 'parse_cache_v{}.sqlite'.format(CACHE_VERSION)))
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'path TEXT, alias TEXT, mtime_ns INTEGER, size INTEGER, digest TEXT, calls BLOB, last_used REAL, '
+            'PRIMARY KEY (path, alias))')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _alias_key(alias: Dict[str, Union[str, None]]) -> str:
+        # The parse result also depends on the extractor and on the grammar of the running interpreter
+        return json.dumps([EXTRACTOR_VERSION, sys.version_info[:2], sorted(alias.items())])
+
+    def get(self, file_path: str, alias: Dict[str, Union[str, None]]):
+        """Return the cached calls for file_path, or None if there is no valid entry."""
+        path = os.path.abspath(file_path)
+        alias_key = self._alias_key(alias)
+        row = self._connection.execute(
+            'SELECT mtime_ns, size, digest, calls FROM entries WHERE path = ? AND alias = ?',
+            (path, alias_key)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        mtime_ns, size, digest, calls = row
+        current_mtime_ns = unchanged_mtime(path, mtime_ns, size, digest)
+        if current_mtime_ns is None:
+            self.misses += 1
+            return None
+        if current_mtime_ns != mtime_ns:
+            # Same content with a new mtime, remember the new stat for next time
+            self._connection.execute(
+                'UPDATE entries SET mtime_ns = ? WHERE path = ? AND alias = ?',
+                (current_mtime_ns, path, alias_key))
+        self._used[(path, alias_key)] = time.time()
+        self.hits += 1
+        return pickle.loads(calls)
+
+    def put(self, file_path: str, alias: Dict[str, Union[str, None]], calls,
+            signature: Union[Tuple[int, int, str], None] = None):
+        """Store the calls parsed from file_path.
+
+        signature is the content_signature of the bytes that were parsed, the
+        file is read again for it when it is not given.
+        """
+        path = os.path.abspath(file_path)
+        self._connection.execute(
+            'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (path, self._alias_key(alias)) + (signature or file_signature(path)) +
+            (pickle.dumps(calls, pickle.HIGHEST_PROTOCOL), time.time()))
+
+    def save(self):
+        """Record entry usage, evict the least recently used entries and commit."""
+        self._connection.executemany(
+            'UPDATE entries SET last_used = ? WHERE path = ? AND alias = ?',
+            [(last_used, path, alias_key) for (path, alias_key), last_used in self._used.items()])
+        self._used = {}
+        count = self._connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        if count > self.max_entries:
+            self._connection.execute(
+                'DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries ORDER BY last_used LIMIT ?)',
+                (count - self.max_entries,))
+        self._connection.commit()
+
+    def close(self):
+        self.save()
+        self._connection.close()
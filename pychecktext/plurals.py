@@ -0,0 +1,103 @@
+"""The plural forms a catalog's Plural-Forms rule can select, and a number selecting each.
+
+A rule is compiled once and evaluated over consecutive ranges of numbers at
+a time, with NumPy when it is installed, until every declared form has been
+seen or PLURAL_SEARCH_LIMIT is reached. Results are cached by header so
+languages sharing a rule only search it once.
+"""
+import ast
+import functools
+import gettext
+import re
+from typing import Callable, Dict, List, NamedTuple, Sequence, Tuple
+from pychecktext.lazy_numpy import get_numpy
+
+# Forms not selected for any number below this are reported as unreachable
+PLURAL_SEARCH_LIMIT = 10 ** 6
+
+# Numbers evaluated in the first batch, each following batch is four times larger
+FIRST_BATCH_SIZE = 1 << 10
+
+PLURAL_FORMS_PATTERN = re.compile(r'nplurals\s*=\s*(\d+)\s*;\s*plural\s*=\s*([^;]*)')
+
+
+class PluralCoverage(NamedTuple):
+    """examples maps each plural index the rule selects to the smallest number selecting it.
+
+    unreachable lists the indexes below nplurals no number up to the search
+    limit selects.
+    """
+    nplurals: int
+    examples: Dict[int, int]
+    unreachable: List[int]
+
+
+def parse_plural_forms(plural_forms: str) -> Tuple[int, str]:
+    """Return nplurals and the C expression of a Plural-Forms header value."""
+    match = PLURAL_FORMS_PATTERN.search(plural_forms)
+    if match is None:
+        raise ValueError('invalid Plural-Forms header: {!r}'.format(plural_forms))
+    return int(match.group(1)), match.group(2).strip()
+
+
+@functools.lru_cache(maxsize=None)
+def plural_coverage(plural_forms: str, limit: int = PLURAL_SEARCH_LIMIT) -> PluralCoverage:
+    """Search the numbers below limit for one selecting each form of a Plural-Forms rule."""
+    nplurals, expression = parse_plural_forms(plural_forms)
+    evaluate = compile_plural(expression)
+    examples = {}
+    start, size = 0, FIRST_BATCH_SIZE
+    while start < limit and not all(index in examples for index in range(nplurals)):
+        stop = min(limit, start + size)
+        for index, n in _first_numbers(evaluate(start, stop), start):
+            examples.setdefault(index, n)
+        start, size = stop, size * 4
+    unreachable = [index for index in range(nplurals) if index not in examples]
+    return PluralCoverage(nplurals, dict(sorted(examples.items())), unreachable)
+
+
+def compile_plural(expression: str) -> Callable[[int, int], Sequence[int]]:
+    """Compile a C plural expression to a function returning its value for every n in range(start, stop)."""
+    # c2py validates the expression and its complexity, its parser gives the python equivalent
+    gettext.c2py(expression)
+    python_expression, _ = gettext._parse(gettext._tokenize(expression))
+    numpy = get_numpy()
+    if numpy is not None:
+        tree = _NumpyExpression().visit(ast.parse('lambda n: {}'.format(python_expression), mode='eval'))
+        function = eval(compile(ast.fix_missing_locations(tree), '<plural>', 'eval'), {'numpy': numpy})
+        return lambda start, stop: numpy.broadcast_to(
+            function(numpy.arange(start, stop, dtype=numpy.int64)), (stop - start,)).astype(numpy.int64)
+    return eval('lambda start, stop: [int({}) for n in range(start, stop)]'.format(python_expression), {})
+
+
+def _first_numbers(values: Sequence[int], start: int) -> List[Tuple[int, int]]:
+    """Return (value, n) for the first n selecting each value, values starting at n == start."""
+    numpy = get_numpy()
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        indexes, positions = numpy.unique(values, return_index=True)
+        return [(int(index), start + int(position)) for index, position in zip(indexes, positions)]
+    return [(index, start + values.index(index)) for index in set(values)]
+
+
+class _NumpyExpression(ast.NodeTransformer):
+    """Rewrites a python plural expression to evaluate elementwise over an array of n."""
+
+    @staticmethod
+    def _call(function: str, *args: ast.expr) -> ast.Call:
+        return ast.Call(func=ast.Attribute(value=ast.Name(id='numpy', ctx=ast.Load()), attr=function, ctx=ast.Load()),
+                        args=list(args), keywords=[])
+
+    def visit_IfExp(self, node: ast.IfExp) -> ast.Call:
+        self.generic_visit(node)
+        return self._call('where', node.test, node.body, node.orelse)
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.Call:
+        self.generic_visit(node)
+        function = 'logical_and' if isinstance(node.op, ast.And) else 'logical_or'
+        return functools.reduce(lambda left, right: self._call(function, left, right), node.values)
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.expr:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return self._call('logical_not', node.operand)
+        return node
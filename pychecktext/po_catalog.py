@@ -0,0 +1,119 @@
+from typing import BinaryIO, Dict, Iterator, List, Tuple, Union
+import codecs
+import re
+from pychecktext.catalog_header import CatalogHeader, parse_header
+from pychecktext.validator import CatalogIndex
+
+KEYWORD_PATTERN = re.compile(r'(msgctxt|msgid_plural|msgid|msgstr)(?:\[(\d+)\])?\s*"(.*)"$')
+ESCAPE_PATTERN = re.compile(r'\\(?:([0-7]{1,3})|x([0-9a-fA-F]{1,2})|(.))')
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'a': '\a', 'b': '\b', 'f': '\f', 'v': '\v'}
+
+
+def _unescape_match(match) -> str:
+    octal, hexadecimal, char = match.groups()
+    if octal is not None:
+        return chr(int(octal, 8))
+    if hexadecimal is not None:
+        return chr(int(hexadecimal, 16))
+    return ESCAPES.get(char, char)
+
+
+def unescape(value: str) -> str:
+    """Resolve the C escapes of a .po string."""
+    if '\\' not in value:
+        return value
+    return ESCAPE_PATTERN.sub(_unescape_match, value)
+
+
+class PoCatalog(CatalogHeader, CatalogIndex):
+    """Index of a .po catalog, read a line at a time without compiling it to a .mo file.
+
+    Builds the same keys as CatalogIndex.from_translations would from the
+    compiled catalog, fuzzy entries are left out like msgfmt does and so are
+    empty translations. As the class_ of get_translation_object, the .po
+    catalogs are checked instead of the .mo files built from them.
+    """
+
+    # Catalog files read by this class, get_translation_object looks for these instead of .mo files
+    EXTENSION = '.po'
+
+    def __init__(self, fp: BinaryIO):
+        self._filename = getattr(fp, 'name', '')
+        self._plural = lambda n: int(n != 1)
+        keys = list(self._keys(fp))
+        super(PoCatalog, self).__init__(keys, self._plural, self.info().get('plural-forms'))
+
+    def _encoding(self, default: str) -> str:
+        # Templates still have the CHARSET placeholder
+        try:
+            return codecs.lookup(self._charset).name if self._charset else default
+        except LookupError:
+            return default
+
+    def _error(self, lineno: int, message: str) -> OSError:
+        return OSError(0, '{} on line {}'.format(message, lineno), self._filename)
+
+    def _keys(self, fp: BinaryIO) -> Iterator[Tuple[Union[str, None], str, Union[int, None]]]:
+        """Parse fp a line at a time, yielding the key of every translated string."""
+        encoding = 'utf-8'
+        # Strings of the entry being read, by keyword and msgstr index
+        entry = {}
+        parts = None
+        has_msgstr = False
+        fuzzy = False
+        lineno = 0
+        for lineno, raw_line in enumerate(fp, 1):
+            try:
+                line = raw_line.decode(encoding).strip()
+            except (UnicodeDecodeError, LookupError):
+                raise self._error(lineno, 'Cannot decode as {}'.format(encoding)) from None
+            if lineno == 1:
+                line = line.lstrip('\ufeff')
+            if line[:1] == '"':
+                if parts is None or len(line) < 2 or line[-1] != '"':
+                    raise self._error(lineno, 'Syntax error')
+                parts.append(line[1:-1])
+                continue
+            if not line or line[0] == '#':
+                if has_msgstr:
+                    yield from self._entry_keys(entry, fuzzy, lineno)
+                    encoding = self._encoding(encoding)
+                    entry, parts, has_msgstr, fuzzy = {}, None, False, False
+                if line[:2] == '#,' and 'fuzzy' in (flag.strip() for flag in line[2:].split(',')):
+                    fuzzy = True
+                continue
+            match = KEYWORD_PATTERN.match(line)
+            if match is None:
+                raise self._error(lineno, 'Syntax error')
+            keyword, index, value = match.groups()
+            if has_msgstr and keyword in ('msgctxt', 'msgid'):
+                yield from self._entry_keys(entry, fuzzy, lineno)
+                encoding = self._encoding(encoding)
+                entry, has_msgstr, fuzzy = {}, False, False
+            field = (keyword, None if index is None else int(index))
+            if field in entry:
+                raise self._error(lineno, 'Duplicate {}'.format(keyword))
+            parts = entry[field] = [value]
+            has_msgstr = has_msgstr or keyword == 'msgstr'
+        if entry:
+            yield from self._entry_keys(entry, fuzzy, lineno)
+
+    def _entry_keys(self, entry: Dict[Tuple[str, Union[int, None]], List[str]], fuzzy: bool,
+                    lineno: int) -> Iterator[Tuple[Union[str, None], str, Union[int, None]]]:
+        strings = {field: unescape(''.join(parts)) for field, parts in entry.items()}
+        if ('msgid', None) not in strings:
+            raise self._error(lineno, 'Entry without msgid before')
+        context = strings.get(('msgctxt', None))
+        msgid = strings[('msgid', None)]
+        if context is None and msgid == '':
+            self._info, self._charset, plural = parse_header(strings.get(('msgstr', None), ''))
+            if plural is not None:
+                self._plural = plural
+        if fuzzy:
+            return
+        if ('msgid_plural', None) in strings:
+            for (keyword, index), value in strings.items():
+                if keyword == 'msgstr' and index is not None and value:
+                    yield context, msgid, index
+        elif strings.get(('msgstr', None)):
+            yield context, msgid, None
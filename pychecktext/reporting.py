@@ -0,0 +1,426 @@
+import json
+import os
+import sys
+import time
+from typing import Dict, List, NamedTuple, Sequence, Tuple, Union
+from pychecktext import running_under_teamcity
+
+
+class MissingTranslation(NamedTuple):
+    """A message without translation, plural_indexes lists the forms missing and is None for singular messages.
+
+    lineno is the line of the first call to the message in the file.
+    suggestions holds the closest msgids the catalog translates, when they
+    were asked for, the closest first.
+    """
+    context: Union[str, None]
+    msgid: str
+    plural_indexes: Union[Tuple[int, ...], None]
+    lineno: int
+    suggestions: Tuple[str, ...] = ()
+
+
+class Reporter(object):
+    """Receives the structured events of a check, the base class reports nothing.
+
+    Parsing and validation emit events to the reporter returned by
+    get_reporter, subclasses decide how and when they are written out.
+    """
+
+    def __init__(self):
+        self.failed = False
+
+    def suite_started(self, name: str):
+        pass
+
+    def suite_finished(self, name: str):
+        pass
+
+    def folder_started(self, folder_path: str):
+        pass
+
+    def file_scanned(self, file_path: str, error: Union[SyntaxError, None]):
+        if error is not None:
+            self.failed = True
+
+    def scan_finished(self, statistics: Dict[str, int]):
+        pass
+
+    def language_loaded(self, domain: str, lang: str, found: bool):
+        if not found:
+            self.failed = True
+
+    def file_validated(self, file_name: str, lang: str, missing: List[MissingTranslation],
+                       domain: Union[str, None] = None):
+        """The messages of file_name missing in lang, domain is only given when several domains are checked."""
+        if missing:
+            self.failed = True
+
+    def unreachable_plurals(self, lang: str, indexes: List[int], domain: Union[str, None] = None):
+        """The Plural-Forms rule of lang declares forms no number selects, this is only a warning."""
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class BufferedOutput(object):
+    """Collects text and writes it to stdout in large, infrequent writes."""
+
+    def __init__(self, interval: float = 0.2, size: int = 1 << 16):
+        self.interval = interval
+        self.size = size
+        self._parts = []
+        self._length = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, text: str):
+        self._parts.append(text)
+        self._length += len(text)
+        if self._length >= self.size or time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            # Looked up on every flush so redirected or captured output is honoured
+            sys.stdout.write(''.join(self._parts))
+            sys.stdout.flush()
+            self._parts = []
+            self._length = 0
+        self._last_flush = time.monotonic()
+
+
+class ConsoleReporter(Reporter):
+    def __init__(self, output: Union[BufferedOutput, None] = None):
+        super(ConsoleReporter, self).__init__()
+        self.output = output or BufferedOutput()
+
+    def suite_started(self, name: str):
+        self.output.write("Validating gettext tokens\n")
+
+    def folder_started(self, folder_path: str):
+        self.output.write("Checking gettext tokens in folder '{}'\n".format(folder_path))
+
+    def file_scanned(self, file_path: str, error: Union[SyntaxError, None]):
+        super(ConsoleReporter, self).file_scanned(file_path, error)
+        self.output.write("Checking gettext tokens in file '{}'\n".format(file_path))
+        if error is not None:
+            self.output.write("Syntax error in file '{}': {}\n".format(file_path, error))
+
+    def scan_finished(self, statistics: Dict[str, int]):
+        self.output.write(scan_summary(statistics) + '\n')
+
+    def language_loaded(self, domain: str, lang: str, found: bool):
+        super(ConsoleReporter, self).language_loaded(domain, lang, found)
+        self.output.write("Checking existence of language {} in domain '{}'\n".format(lang, domain))
+        if found:
+            self.output.write("Language {} in domain '{}' found.\n".format(lang, domain))
+        else:
+            self.output.write("Language file {} is missing in domain '{}'\n".format(lang, domain))
+
+    def file_validated(self, file_name: str, lang: str, missing: List[MissingTranslation],
+                       domain: Union[str, None] = None):
+        super(ConsoleReporter, self).file_validated(file_name, lang, missing, domain)
+        of_domain = in_domain(domain)
+        lines = ["Verifying tokens for language {}{} in file '{}'\n".format(lang, of_domain, os.path.basename(file_name))]
+        for _, msgid, plural_indexes, lineno, suggestions in missing:
+            if plural_indexes is None:
+                lines.append("msgid '{}' is missing a translation in language '{}'{} ({}:{}){}\n".format(
+                    msgid, lang, of_domain, file_name, lineno, did_you_mean(suggestions)))
+            else:
+                lines.append("msgid '{}' is missing a translation in language '{}'{} for {} ({}:{}){}\n".format(
+                    msgid, lang, of_domain, plural_ids(plural_indexes), file_name, lineno, did_you_mean(suggestions)))
+        self.output.write(''.join(lines))
+
+    def unreachable_plurals(self, lang: str, indexes: List[int], domain: Union[str, None] = None):
+        self.output.write("Plural forms {} of language {}{} are never selected by its Plural-Forms rule\n".format(
+            ', '.join(map(str, indexes)), lang, in_domain(domain)))
+
+    def flush(self):
+        self.output.flush()
+
+
+class _Unflushed(object):
+    """Lets TeamcityServiceMessages, which flushes after every message, write into a BufferedOutput."""
+
+    def __init__(self, output: BufferedOutput):
+        self.write = output.write
+
+    def flush(self):
+        pass
+
+
+class TeamCityReporter(Reporter):
+    def __init__(self, output: Union[BufferedOutput, None] = None):
+        super(TeamCityReporter, self).__init__()
+        self.output = output or BufferedOutput()
+        import teamcity.messages as tc
+        # Without an encoding the messages are written to the buffer as text
+        self.messages = tc.TeamcityServiceMessages(output=_Unflushed(self.output), encoding=None)
+
+    def suite_started(self, name: str):
+        self.messages.testSuiteStarted(name)
+
+    def suite_finished(self, name: str):
+        self.messages.testSuiteFinished(name)
+
+    def folder_started(self, folder_path: str):
+        self.messages.customMessage('Checking tokens in folder {}'.format(folder_path), status='INFO', errorDetails=None)
+
+    def file_scanned(self, file_path: str, error: Union[SyntaxError, None]):
+        super(TeamCityReporter, self).file_scanned(file_path, error)
+        self.messages.customMessage('Checking tokens in file {}'.format(file_path), status='INFO', errorDetails=None)
+        if error is not None:
+            self.messages.customMessage("Syntax error whilst parsing file '{}'".format(file_path),
+                                        status="ERROR", errorDetails=error.msg)
+
+    def scan_finished(self, statistics: Dict[str, int]):
+        self.messages.customMessage(scan_summary(statistics), status='INFO', errorDetails=None)
+
+    def language_loaded(self, domain: str, lang: str, found: bool):
+        super(TeamCityReporter, self).language_loaded(domain, lang, found)
+        test_name = 'checkLanguageExistence.{}.{}'.format(domain, lang)
+        self.messages.testStarted(test_name, captureStandardOutput='false')
+        if not found:
+            self.messages.testFailed(test_name, message=missing_language(domain, lang))
+        # TeamCity expects every test to finish, failed or not
+        self.messages.testFinished(test_name)
+
+    def file_validated(self, file_name: str, lang: str, missing: List[MissingTranslation],
+                       domain: Union[str, None] = None):
+        super(TeamCityReporter, self).file_validated(file_name, lang, missing, domain)
+        test_name = 'checkTokenExistence({}, {})'.format(os.path.basename(file_name),
+                                                         lang if domain is None else '{}.{}'.format(domain, lang))
+        self.messages.testStarted(test_name, captureStandardOutput='false')
+        for _, msgid, plural_indexes, lineno, suggestions in missing:
+            if plural_indexes is None:
+                self.messages.customMessage('msgid {} is missing a translation ({}:{}){}'.format(
+                    msgid, file_name, lineno, did_you_mean(suggestions)), status='FAILURE')
+            else:
+                self.messages.customMessage('msgid {} is missing a translation for {} ({}:{}){}'.format(
+                    msgid, plural_ids(plural_indexes), file_name, lineno, did_you_mean(suggestions)), status='FAILURE')
+        if missing:
+            self.messages.testFailed(test_name, "Missing tokens found")
+        self.messages.testFinished(test_name)
+
+    def unreachable_plurals(self, lang: str, indexes: List[int], domain: Union[str, None] = None):
+        self.messages.customMessage('Plural forms {} of language {}{} are never selected by its Plural-Forms rule'.format(
+            ', '.join(map(str, indexes)), lang, in_domain(domain)), status='WARNING', errorDetails=None)
+
+    def flush(self):
+        self.output.flush()
+
+
+class JsonReporter(Reporter):
+    """Writes every problem found as a single JSON document on close."""
+
+    def __init__(self, path: str):
+        super(JsonReporter, self).__init__()
+        self.path = path
+        self.syntax_errors = []
+        self.missing_languages = []
+        self.missing_translations = []
+        self.unreachable_plurals_found = []
+        self.statistics = {}
+
+    def file_scanned(self, file_path: str, error: Union[SyntaxError, None]):
+        super(JsonReporter, self).file_scanned(file_path, error)
+        if error is not None:
+            self.syntax_errors.append({'file': file_path, 'line': error.lineno, 'message': error.msg})
+
+    def scan_finished(self, statistics: Dict[str, int]):
+        self.statistics = dict(statistics)
+
+    def language_loaded(self, domain: str, lang: str, found: bool):
+        super(JsonReporter, self).language_loaded(domain, lang, found)
+        if not found:
+            self.missing_languages.append({'domain': domain, 'language': lang})
+
+    def file_validated(self, file_name: str, lang: str, missing: List[MissingTranslation],
+                       domain: Union[str, None] = None):
+        super(JsonReporter, self).file_validated(file_name, lang, missing, domain)
+        for context, msgid, plural_indexes, lineno, suggestions in missing:
+            entry = {'file': file_name, 'line': lineno, 'domain': domain, 'language': lang, 'context': context,
+                     'msgid': msgid, 'plural_indexes': None if plural_indexes is None else list(plural_indexes)}
+            # Only present when suggestions were asked for and found, the layout is otherwise unchanged
+            if suggestions:
+                entry['suggestions'] = list(suggestions)
+            self.missing_translations.append(entry)
+
+    def unreachable_plurals(self, lang: str, indexes: List[int], domain: Union[str, None] = None):
+        self.unreachable_plurals_found.append({'domain': domain, 'language': lang, 'plural_indexes': indexes})
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            'failed': self.failed,
+            'statistics': self.statistics,
+            'syntax_errors': self.syntax_errors,
+            'missing_languages': self.missing_languages,
+            'missing_translations': self.missing_translations,
+            'unreachable_plurals': self.unreachable_plurals_found
+        }
+
+    def close(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+class SarifReporter(JsonReporter):
+    """Writes the problems found as a SARIF 2.1.0 log on close."""
+
+    RULES = {
+        'syntax-error': 'The file could not be parsed',
+        'missing-language': 'The catalog of a language is missing',
+        'missing-translation': 'A msgid has no translation',
+        'missing-plural-translation': 'A plural form of a msgid has no translation',
+        'unreachable-plural-form': 'The Plural-Forms rule of a language never selects some of its forms'
+    }
+
+    @staticmethod
+    def _result(rule_id: str, message: str, file_path: Union[str, None] = None, line: Union[int, None] = None,
+                level: str = 'error'):
+        result = {'ruleId': rule_id, 'level': level, 'message': {'text': message}}
+        if file_path is not None:
+            import pathlib
+            location = {'artifactLocation': {'uri': pathlib.PurePath(file_path).as_posix()}}
+            if line:
+                location['region'] = {'startLine': line}
+            result['locations'] = [{'physicalLocation': location}]
+        return result
+
+    def as_dict(self) -> Dict[str, object]:
+        results = []
+        for error in self.syntax_errors:
+            results.append(self._result('syntax-error', error['message'], error['file'], error['line']))
+        for language in self.missing_languages:
+            results.append(self._result('missing-language', missing_language(language['domain'],
+                                                                             language['language'])))
+        for missing in self.missing_translations:
+            if missing['plural_indexes'] is None:
+                results.append(self._result('missing-translation', "msgid '{}' is missing a translation "
+                                                                   "in language '{}'{}{}".format(
+                                                                       missing['msgid'], missing['language'],
+                                                                       in_domain(missing['domain']),
+                                                                       did_you_mean(missing.get('suggestions', ()))),
+                                            missing['file'], missing['line']))
+            else:
+                results.append(self._result('missing-plural-translation',
+                                            "msgid '{}' is missing a translation in language '{}'{} for {}{}".format(
+                                                missing['msgid'], missing['language'], in_domain(missing['domain']),
+                                                plural_ids(missing['plural_indexes']),
+                                                did_you_mean(missing.get('suggestions', ()))), missing['file'],
+                                            missing['line']))
+        for unreachable in self.unreachable_plurals_found:
+            indexes = ', '.join(map(str, unreachable['plural_indexes']))
+            results.append(self._result('unreachable-plural-form',
+                                        "Plural forms {} of language {}{} are never selected by its Plural-Forms "
+                                        "rule".format(indexes, unreachable['language'],
+                                                      in_domain(unreachable['domain'])), level='warning'))
+        return {
+            '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+            'version': '2.1.0',
+            'runs': [{
+                'tool': {'driver': {
+                    'name': 'pyCheckText',
+                    'informationUri': 'https://github.com/da1910/pyCheckText',
+                    'rules': [{'id': rule_id, 'shortDescription': {'text': description}}
+                              for rule_id, description in self.RULES.items()]
+                }},
+                'results': results
+            }]
+        }
+
+
+class MultiReporter(Reporter):
+    """Forwards every event to several reporters."""
+
+    def __init__(self, reporters: List[Reporter]):
+        super(MultiReporter, self).__init__()
+        self.reporters = reporters
+
+    def suite_started(self, name: str):
+        for reporter in self.reporters:
+            reporter.suite_started(name)
+
+    def suite_finished(self, name: str):
+        for reporter in self.reporters:
+            reporter.suite_finished(name)
+
+    def folder_started(self, folder_path: str):
+        for reporter in self.reporters:
+            reporter.folder_started(folder_path)
+
+    def file_scanned(self, file_path: str, error: Union[SyntaxError, None]):
+        super(MultiReporter, self).file_scanned(file_path, error)
+        for reporter in self.reporters:
+            reporter.file_scanned(file_path, error)
+
+    def scan_finished(self, statistics: Dict[str, int]):
+        for reporter in self.reporters:
+            reporter.scan_finished(statistics)
+
+    def language_loaded(self, domain: str, lang: str, found: bool):
+        super(MultiReporter, self).language_loaded(domain, lang, found)
+        for reporter in self.reporters:
+            reporter.language_loaded(domain, lang, found)
+
+    def file_validated(self, file_name: str, lang: str, missing: List[MissingTranslation],
+                       domain: Union[str, None] = None):
+        super(MultiReporter, self).file_validated(file_name, lang, missing, domain)
+        for reporter in self.reporters:
+            reporter.file_validated(file_name, lang, missing, domain)
+
+    def unreachable_plurals(self, lang: str, indexes: List[int], domain: Union[str, None] = None):
+        for reporter in self.reporters:
+            reporter.unreachable_plurals(lang, indexes, domain)
+
+    def flush(self):
+        for reporter in self.reporters:
+            reporter.flush()
+
+    def close(self):
+        for reporter in self.reporters:
+            reporter.close()
+
+
+def plural_ids(plural_indexes: Sequence[int]) -> str:
+    return 'plural id{} {}'.format('s' if len(plural_indexes) > 1 else '', ', '.join(map(str, plural_indexes)))
+
+
+def in_domain(domain: Union[str, None]) -> str:
+    return '' if domain is None else " of domain '{}'".format(domain)
+
+
+def missing_language(domain: str, lang: str) -> str:
+    # The catalog is a .mo or a .po file depending on the reader
+    return "No catalog of domain '{}' found for language {}".format(domain, lang)
+
+
+def did_you_mean(suggestions: Sequence[str]) -> str:
+    return '' if not suggestions else ", did you mean {}?".format(', '.join(map("'{}'".format, suggestions)))
+
+
+def scan_summary(statistics: Dict[str, int]) -> str:
+    return "Checked {files} files: {parsed} parsed, {prefiltered} skipped without gettext calls, " \
+        "{cached} read from cache".format(**{key: statistics.get(key, 0)
+                                             for key in ('files', 'parsed', 'prefiltered', 'cached')})
+
+
+_reporter = None
+
+
+def get_reporter() -> Reporter:
+    """Return the reporter events are sent to, by default for TeamCity or the console."""
+    global _reporter
+    if _reporter is None:
+        _reporter = TeamCityReporter() if running_under_teamcity() else ConsoleReporter()
+    return _reporter
+
+
+def set_reporter(reporter: Union[Reporter, None]):
+    """Send events to reporter from now on, None restores the default."""
+    global _reporter
+    _reporter = reporter
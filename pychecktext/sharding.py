@@ -0,0 +1,168 @@
+import heapq
+import json
+import os
+from typing import Dict, Iterable, List, Union
+from pychecktext.reporting import MissingTranslation, Reporter
+
+# Bump whenever the layout of the shard results changes
+RESULTS_VERSION = 2
+
+
+class Shard(object):
+    """Shard index of count, numbered from 1, picking its share of the files of a folder.
+
+    Files are spread over the shards by size, the largest first, each going
+    to the shard with the least bytes so far. Every agent walking the same
+    tree picks the same files, without talking to the others.
+    """
+
+    def __init__(self, index: int, count: int):
+        if not 1 <= index <= count:
+            raise ValueError('Shard {}/{} does not exist, shards are numbered from 1 to {}'.format(index, count, count))
+        self.index = index
+        self.count = count
+        # Position of each picked file among all the files of the folder
+        self.positions = {}
+        self.total_files = 0
+
+    @classmethod
+    def parse(cls, spec: str) -> 'Shard':
+        """Read a K/N shard specification."""
+        try:
+            index, count = (int(part) for part in spec.split('/'))
+        except ValueError:
+            raise ValueError("Shards are given as K/N, eg. '--shard 2/4', not '{}'".format(spec)) from None
+        return cls(index, count)
+
+    def select(self, file_paths: Iterable[str]) -> List[str]:
+        """Return the files of this shard, in the order of file_paths."""
+        file_paths = list(file_paths)
+        self.total_files = len(file_paths)
+        sizes = []
+        for position, file_path in enumerate(file_paths):
+            try:
+                size = os.stat(file_path).st_size
+            except OSError:
+                size = 0
+            sizes.append((-size, position))
+        sizes.sort()
+        # (bytes so far, shard), the lowest shard wins ties
+        loads = [(0, shard) for shard in range(self.count)]
+        picked = []
+        for negative_size, position in sizes:
+            load, shard = heapq.heappop(loads)
+            if shard == self.index - 1:
+                picked.append(position)
+            heapq.heappush(loads, (load - negative_size, shard))
+        picked.sort()
+        self.positions = {file_paths[position]: position for position in picked}
+        return [file_paths[position] for position in picked]
+
+
+def _syntax_error(error: Union[SyntaxError, None]) -> Union[Dict[str, object], None]:
+    if error is None:
+        return None
+    return {'msg': error.msg, 'filename': error.filename, 'lineno': error.lineno, 'offset': error.offset,
+            'text': error.text}
+
+
+class ShardRecorder(Reporter):
+    """Records the events of one shard to a JSON file on close, for merge_results to replay.
+
+    File events are recorded with the position of the file in the whole
+    folder, so the shards can be put back in the order of a single run.
+    """
+
+    def __init__(self, path: str, shard: Shard):
+        super(ShardRecorder, self).__init__()
+        self.path = path
+        self.shard = shard
+        self.events = []
+
+    def folder_started(self, folder_path: str):
+        self.events.append(['folder_started', None, folder_path])
+
+    def file_scanned(self, file_path: str, error: Union[SyntaxError, None]):
+        super(ShardRecorder, self).file_scanned(file_path, error)
+        self.events.append(['file_scanned', self.shard.positions.get(file_path), file_path, _syntax_error(error)])
+
+    def scan_finished(self, statistics: Dict[str, int]):
+        self.events.append(['scan_finished', None, dict(statistics)])
+
+    def language_loaded(self, domain: str, lang: str, found: bool):
+        super(ShardRecorder, self).language_loaded(domain, lang, found)
+        self.events.append(['language_loaded', None, domain, lang, found])
+
+    def file_validated(self, file_name: str, lang: str, missing: List[MissingTranslation],
+                       domain: Union[str, None] = None):
+        super(ShardRecorder, self).file_validated(file_name, lang, missing, domain)
+        self.events.append(['file_validated', self.shard.positions.get(file_name), file_name, lang,
+                            [list(entry) for entry in missing], domain])
+
+    def unreachable_plurals(self, lang: str, indexes: List[int], domain: Union[str, None] = None):
+        self.events.append(['unreachable_plurals', None, lang, list(indexes), domain])
+
+    def close(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'version': RESULTS_VERSION, 'shard': [self.shard.index, self.shard.count],
+                       'total_files': self.shard.total_files, 'failed': self.failed, 'events': self.events}, f)
+
+
+def _read_results(paths: List[str]) -> List[Dict[str, object]]:
+    results = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            content = json.load(f)
+        if content.get('version') != RESULTS_VERSION:
+            raise ValueError('{} was not written by this version of pyCheckText'.format(path))
+        results.append(content)
+    shards = sorted(tuple(content['shard']) for content in results)
+    count = shards[0][1] if shards else 0
+    if shards != [(index, count) for index in range(1, count + 1)]:
+        raise ValueError('Expected the results of shards 1 to {} once each, got {}'.format(
+            count, ', '.join('{}/{}'.format(*shard) for shard in shards)))
+    if len({content['total_files'] for content in results}) > 1:
+        raise ValueError('The shards did not check the same files')
+    return sorted(results, key=lambda content: content['shard'][0])
+
+
+def merge_results(paths: List[str], reporter: Reporter) -> bool:
+    """Replay the results of every shard to reporter as a single run would report them, returning failed.
+
+    Events all shards repeat, such as the loading of each catalog, are
+    reported once and the scan statistics are summed. Files are reported
+    in the order of the whole folder.
+    """
+    # Events outside of any file, in order, without repeats
+    common = {}
+    files = {}
+    statistics = {}
+    for content in _read_results(paths):
+        for event in content['events']:
+            name, position, args = event[0], event[1], event[2:]
+            if name == 'scan_finished':
+                for key, value in args[0].items():
+                    statistics[key] = statistics.get(key, 0) + value
+            elif position is None:
+                common.setdefault(json.dumps(event), event)
+            else:
+                files.setdefault(position, []).append(event)
+    for name, _, *args in common.values():
+        getattr(reporter, name)(*args)
+    for position in sorted(files):
+        for name, _, *args in files[position]:
+            if name == 'file_scanned':
+                file_path, error = args
+                if error is not None:
+                    error = SyntaxError(error['msg'], (error['filename'], error['lineno'], error['offset'],
+                                                       error['text']))
+                reporter.file_scanned(file_path, error)
+            else:
+                file_name, lang, missing, domain = args
+                reporter.file_validated(file_name, lang, [MissingTranslation(
+                    context, msgid, None if plural_indexes is None else tuple(plural_indexes), lineno,
+                    tuple(suggestions)) for context, msgid, plural_indexes, lineno, suggestions in missing], domain)
+    if statistics:
+        reporter.scan_finished(statistics)
+    reporter.flush()
+    return reporter.failed
@@ -0,0 +1,109 @@
+"""Suggest the catalog msgids closest to a missing one, which is usually a typo or a reworded message.
+
+The msgids of a catalog are indexed once by their character trigrams and
+matches are ranked by the Dice coefficient of their trigram sets. The
+trigrams a query shares with every msgid are counted in bulk, with NumPy
+when it is installed, rather than comparing the query to each msgid.
+"""
+import bisect
+import heapq
+import math
+from collections import Counter, defaultdict
+from typing import FrozenSet, Iterable, List
+from pychecktext.lazy_numpy import get_numpy
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Return the character trigrams of text, padded so the start and end of the text weigh more."""
+    padded = '  ' + text + '  '
+    return frozenset(padded[index:index + 3] for index in range(len(padded) - 2))
+
+
+class SuggestionIndex(object):
+    """Trigram index over the msgids of a catalog, built once and queried for each missing msgid.
+
+    Only msgids scoring at least min_score are suggested. Without NumPy,
+    reaching min_score bounds the number of trigrams a match shares with
+    the query, so the commonest query trigrams, those of more than common
+    of the msgids, are left out of the count whenever the rarer ones
+    suffice to find every match.
+    """
+
+    def __init__(self, msgids: Iterable[str], min_score: float = 0.5, common: float = 0.02):
+        if not 0 < min_score <= 1:
+            raise ValueError('min_score must be in (0, 1], not {}'.format(min_score))
+        self.min_score = min_score
+        self.msgids = sorted(set(msgids) - {''})
+        self.grams = [trigrams(msgid) for msgid in self.msgids]
+        postings = defaultdict(list)
+        for position, grams in enumerate(self.grams):
+            for gram in grams:
+                postings[gram].append(position)
+        # The positions of the msgids holding each trigram
+        self.postings = dict(postings)
+        self.common = max(16, int(common * len(self.msgids)))
+        self._sizes = None
+        numpy = get_numpy()
+        if numpy is not None:
+            self._sizes = numpy.array([len(grams) for grams in self.grams], dtype=numpy.int64)
+            self.postings = {gram: numpy.array(positions, dtype=numpy.int64)
+                             for gram, positions in self.postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.msgids)
+
+    def __contains__(self, msgid: str) -> bool:
+        position = bisect.bisect_left(self.msgids, msgid)
+        return position < len(self.msgids) and self.msgids[position] == msgid
+
+    def suggest(self, msgid: str, limit: int = 3) -> List[str]:
+        """Return up to limit msgids of the index most similar to msgid, the closest first, never msgid itself.
+
+        Equally similar msgids are returned in alphabetical order.
+        """
+        query = trigrams(msgid)
+        known = [gram for gram in query if gram in self.postings]
+        if not known or limit <= 0:
+            return []
+        if self._sizes is not None:
+            return self._suggest_numpy(msgid, len(query), known, limit)
+        size = len(query)
+        # Dice = 2 * shared / (size + other) >= min_score, and shared <= other
+        min_shared = math.ceil(self.min_score * size / (2 - self.min_score) - 1e-9)
+        max_other = math.floor(size * (2 - self.min_score) / self.min_score + 1e-9)
+        known.sort(key=lambda gram: len(self.postings[gram]))
+        # A match missing every trigram left out still shares min_shared - len(skipped) of the counted ones
+        counted = len(known)
+        while counted > len(known) - min_shared + 1 and len(self.postings[known[counted - 1]]) > self.common:
+            counted -= 1
+        shared = Counter()
+        for gram in known[:counted]:
+            shared.update(self.postings[gram])
+        skipped = frozenset(known[counted:])
+        needed = min_shared - len(skipped)
+        scored = []
+        for position in [position for position, count in shared.items() if count >= needed]:
+            other = self.grams[position]
+            if len(other) > max_other or self.msgids[position] == msgid:
+                continue
+            score = 2 * (shared[position] + len(skipped & other)) / (size + len(other))
+            if score >= self.min_score:
+                scored.append((-score, position))
+        return [self.msgids[position] for _, position in heapq.nsmallest(limit, scored)]
+
+    def _suggest_numpy(self, msgid: str, size: int, known: List[str], limit: int) -> List[str]:
+        numpy = get_numpy()
+        shared = numpy.bincount(numpy.concatenate([self.postings[gram] for gram in known]),
+                                minlength=len(self.msgids))
+        # Only msgids sharing enough trigrams can reach min_score, they alone are scored
+        positions = numpy.flatnonzero(shared >= self.min_score * size / (2 - self.min_score) - 1e-9)
+        scores = 2 * shared[positions] / (size + self._sizes[positions])
+        keep = scores >= self.min_score
+        positions, scores = positions[keep], scores[keep]
+        # The best scores first, then the lowest positions, which are the msgids in alphabetical order
+        positions = positions[numpy.lexsort((positions, -scores))]
+        suggestions = []
+        for position in positions[:limit + 1]:
+            if self.msgids[position] != msgid:
+                suggestions.append(self.msgids[position])
+        return suggestions[:limit]
@@ -0,0 +1,96 @@
+import contextlib
+import heapq
+import json
+import time
+from typing import Dict, Iterable, Iterator, List, Tuple, TypeVar, Union
+from pychecktext import get_teamcity_messages, running_under_teamcity
+
+T = TypeVar('T')
+
+
+class Timings(object):
+    """Time and count per phase of a check, and the slowest files to parse.
+
+    Disabled by default, call sites test enabled before recording anything so
+    a run without instrumentation only pays for that attribute lookup.
+    """
+
+    def __init__(self, slowest: int = 10):
+        self.enabled = False
+        self.slowest = slowest
+        self.phases = {}
+        self._files = []
+
+    def enable(self, slowest: int = 10):
+        self.enabled = True
+        self.slowest = slowest
+        self.phases = {}
+        self._files = []
+
+    def add(self, phase: str, seconds: float, count: int = 1):
+        totals = self.phases.setdefault(phase, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += count
+
+    @contextlib.contextmanager
+    def phase(self, name: str, count: int = 1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, count)
+
+    def add_file(self, file_path: str, seconds: float):
+        if len(self._files) < self.slowest:
+            heapq.heappush(self._files, (seconds, file_path))
+        elif self._files and seconds > self._files[0][0]:
+            heapq.heapreplace(self._files, (seconds, file_path))
+
+    def timed_iter(self, phase: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yield from iterable, counting the time spent producing each item towards phase."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(phase, time.perf_counter() - start, 0)
+                return
+            self.add(phase, time.perf_counter() - start)
+            yield item
+
+    def slowest_files(self) -> List[Tuple[str, float]]:
+        return [(file_path, seconds) for seconds, file_path in sorted(self._files, reverse=True)]
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            'phases': {phase: {'seconds': seconds, 'count': count} for phase, (seconds, count) in self.phases.items()},
+            'slowest_files': [{'file': file_path, 'seconds': seconds} for file_path, seconds in self.slowest_files()]
+        }
+
+    def report(self, json_path: Union[str, None] = None):
+        """Report as TeamCity statistics when running under TeamCity, as a table otherwise."""
+        if json_path is not None:
+            with open(json_path, 'w') as f:
+                json.dump(self.as_dict(), f, indent=2)
+        if running_under_teamcity():
+            teamcity_messages = get_teamcity_messages()
+            for phase, (seconds, count) in self.phases.items():
+                teamcity_messages.message('buildStatisticValue', key='pychecktext.{}.seconds'.format(phase),
+                                          value='{:.6f}'.format(seconds))
+                teamcity_messages.message('buildStatisticValue', key='pychecktext.{}.count'.format(phase),
+                                          value=str(count))
+            for file_path, seconds in self.slowest_files():
+                teamcity_messages.customMessage('Parsing {} took {:.3f}s'.format(file_path, seconds),
+                                                status='INFO', errorDetails=None)
+        elif json_path is None:
+            print('{:<16}{:>12}{:>10}'.format('phase', 'seconds', 'count'))
+            for phase, (seconds, count) in self.phases.items():
+                print('{:<16}{:>12.4f}{:>10}'.format(phase, seconds, count))
+            if self._files:
+                print('Slowest files to parse:')
+                for file_path, seconds in self.slowest_files():
+                    print('{:>10.4f}s  {}'.format(seconds, file_path))
+
+
+timings = Timings()
@@ -1,7 +1,16 @@
-from typing import List, Dict, Union
-from pychecktext import teamcity, teamcity_messages
+from typing import TYPE_CHECKING, Callable, Iterable, List, Dict, Mapping, NamedTuple, Set, Tuple, Union
+from pychecktext.checktext_parser import CallSite
+from pychecktext.reporting import MissingTranslation, get_reporter
+from pychecktext.timing import timings
+import errno
 import gettext
+import json
 import os
+import time
+
+# Only needed for annotations, the catalog reader, plural rules and suggestions are imported by the runs using them
+if TYPE_CHECKING:
+    from pychecktext.mo_catalog import MoCatalog
 
 
 class ReportFallback(gettext.NullTranslations):
@@ -54,91 +63,479 @@ class ReportFallback(gettext.NullTranslations):
         return (singular, "**MISSING_TRANSLATION**")
 
 
+# The calls extracted from a single file by checktext_parser.parse_file
+FileCalls = Union[Dict[str, List[CallSite]], None]
+
+# Positions of the domain, context, msgid and plural msgid in the literal
+# arguments of each function, None where the function has no such argument
+MESSAGE_ARGUMENTS = {
+    "dgettext": (0, None, 1, None),
+    "dngettext": (0, None, 1, 2),
+    "dnpgettext": (0, 1, 2, 3),
+    "dpgettext": (0, 1, 2, None),
+    "gettext": (None, None, 0, None),
+    "ldgettext": (0, None, 1, None),
+    "ldngettext": (0, None, 1, 2),
+    "lgettext": (None, None, 0, None),
+    "lngettext": (None, None, 0, 1),
+    "ngettext": (None, None, 0, 1),
+    "npgettext": (None, 0, 1, 2),
+    "pgettext": (None, 0, 1, None)}
+
+
+class CatalogIndex(object):
+    """The translated entries of a catalog as a set of (context, msgid, plural index) keys.
+
+    context is None outside of a msgctxt and plural index is None for
+    singular entries. Entries with an empty translation are left out.
+    """
+
+    def __init__(self, keys: Iterable[Tuple[Union[str, None], str, Union[int, None]]],
+                 plural: Callable[[int], int], plural_forms: Union[str, None] = None):
+        self.keys = frozenset(keys)
+        self.plural = plural
+        self.plural_forms = plural_forms
+
+    @classmethod
+    def from_translations(cls, translator: gettext.GNUTranslations) -> 'CatalogIndex':
+        keys = []
+        for key, translation in translator._catalog.items():
+            if not translation:
+                continue
+            if isinstance(key, tuple):
+                message, plural_index = key
+            else:
+                message, plural_index = key, None
+            context, separator, msgid = message.partition('\x04')
+            if not separator:
+                context, msgid = None, message
+            keys.append((context, msgid, plural_index))
+        return cls(keys, translator.plural, _plural_forms(translator))
+
+    def info(self) -> Dict[str, str]:
+        return {} if self.plural_forms is None else {'plural-forms': self.plural_forms}
+
+    def __contains__(self, key: Tuple[Union[str, None], str, Union[int, None]]) -> bool:
+        return key in self.keys
+
+    def missing(self, keys: Iterable[Tuple[Union[str, None], str, Union[int, None]]]) -> Set[
+            Tuple[Union[str, None], str, Union[int, None]]]:
+        return set(keys) - self.keys
+
+    def missing_plurals(self, context: Union[str, None], msgid: str, plural_indexes: Iterable[int]) -> List[int]:
+        """Return the plural_indexes of the message without a translation."""
+        return [index for index in plural_indexes if (context, msgid, index) not in self.keys]
+
+    def msgids(self) -> Set[str]:
+        """Return the msgids with a translation, in any context, without the header."""
+        return {msgid for _, msgid, _ in self.keys if msgid}
+
+
+def index_catalog(translator: Union[gettext.GNUTranslations, CatalogIndex, 'MoCatalog']) -> Union[
+        CatalogIndex, 'MoCatalog']:
+    """Return translator as validate_translations looks it up, converting a GNUTranslations to a CatalogIndex.
+
+    Callers validating against the same catalogs several times convert them
+    once, validate_translations would convert them again on every call.
+    """
+    if isinstance(translator, gettext.GNUTranslations):
+        return CatalogIndex.from_translations(translator)
+    return translator
+
+
 class CheckTextTranslation(gettext.GNUTranslations, object):
     def __init__(self, *args, **kwargs):
         super(CheckTextTranslation, self).__init__(*args, **kwargs)
         self.add_fallback(ReportFallback())
 
 
-def get_translation_object(file_path: str, domain: str, languages: List[str]):
-    translations = {}
+class DomainConfig(NamedTuple):
+    """Where the catalogs of a domain are found and the languages checked in it."""
+    translation_path: str
+    languages: List[str]
+
+
+def get_translation_object(file_path: str, domain: str, languages: List[str],
+                           class_: type = CheckTextTranslation, threads: int = 8):
+    """Load the catalog of each language, up to threads at a time.
+
+    Catalogs are located and read concurrently, which pays off when the
+    locale folder is on a network mount. Languages are still reported in
+    the order given.
+    """
+    return get_domain_translations({domain: DomainConfig(file_path, languages)}, class_, threads)[domain]
+
+
+def get_domain_translations(domains: Dict[str, DomainConfig], class_: type = CheckTextTranslation,
+                            threads: int = 8) -> Dict[str, Dict[str, Union[gettext.NullTranslations, CatalogIndex]]]:
+    """Load the catalogs of every domain and language on one pool of threads, see get_translation_object."""
+    reporter = get_reporter()
+    pairs = [(domain, lang) for domain, config in domains.items() for lang in config.languages]
+    translations = {domain: {} for domain in domains}
+    for (domain, lang), (translator, seconds) in zip(pairs, _map_languages(
+            lambda pair: _load_catalog(domains[pair[0]].translation_path, pair[0], pair[1], class_), pairs, threads)):
+        if translator is None:
+            reporter.language_loaded(domain, lang, False)
+            continue
+        translations[domain][lang] = translator
+        if timings.enabled:
+            timings.add('load_catalogs', seconds)
+        reporter.language_loaded(domain, lang, True)
+    reporter.flush()
+    return translations
+
+
+def read_domain_config(config_path: str, translation_path: Union[str, None] = None,
+                       languages: Union[List[str], None] = None) -> Tuple[Dict[str, DomainConfig], Union[str, None]]:
+    """Read the domains to check from a JSON file, returning them with the default domain it names.
+
+    domains is either a list of names or maps each name to its own
+    translation_path and languages. Top level translation_path and
+    languages, then the ones given here, apply to domains without their own.
+    Relative paths are taken from the folder of the file.
+    """
+    try:
+        with open(config_path, encoding='utf-8') as f:
+            config = json.load(f)
+    except ValueError as excinfo:
+        raise ValueError('Cannot read the domains in {}: {}'.format(config_path, excinfo)) from None
+    folder = os.path.dirname(config_path)
+    if 'translation_path' in config:
+        translation_path = os.path.join(folder, config['translation_path'])
+    languages = config.get('languages', languages)
+    domains = config.get('domains', {})
+    if isinstance(domains, list):
+        domains = {domain: {} for domain in domains}
+    configs = {}
+    for domain, settings in domains.items():
+        domain_path = os.path.join(folder, settings['translation_path']) if 'translation_path' in settings \
+            else translation_path
+        domain_languages = settings.get('languages', languages)
+        if domain_path is None or not domain_languages:
+            raise ValueError('No translation_path or languages for domain {} in {}'.format(domain, config_path))
+        configs[domain] = DomainConfig(domain_path, domain_languages)
+    return configs, config.get('default_domain')
+
+
+def catalog_extension(class_: type) -> str:
+    """Return the extension of the catalog files class_ reads, .mo unless it sets EXTENSION."""
+    return getattr(class_, 'EXTENSION', '.mo')
+
+
+def find_catalog(file_path: str, domain: str, lang: str, class_: type = CheckTextTranslation) -> Union[str, None]:
+    """Return the path of the catalog of lang, as gettext.find does but for the files class_ reads."""
+    extension = catalog_extension(class_)
+    if extension == '.mo':
+        return gettext.find(domain, file_path, [lang])
+    for expanded_lang in gettext._expand_lang(lang):
+        if expanded_lang == 'C':
+            break
+        catalog_path = os.path.join(file_path, expanded_lang, 'LC_MESSAGES', domain + extension)
+        if os.path.exists(catalog_path):
+            return catalog_path
+    return None
+
+
+def catalog_language(catalog_path: str, file_path: str, domain: str, languages: List[str],
+                     class_: type = CheckTextTranslation) -> Union[str, None]:
+    """Return which of languages the catalog file at catalog_path under the locale folder file_path belongs to.
+
+    The .po source of a catalog counts whatever class_ reads, as it is
+    usually the only file under version control, the .mo being compiled.
+    """
+    relative_path = os.path.relpath(os.path.abspath(catalog_path), os.path.abspath(file_path))
+    catalog_names = tuple(os.sep + domain + extension for extension in {catalog_extension(class_), '.po'})
+    if relative_path.startswith(os.pardir) or not relative_path.endswith(catalog_names):
+        return None
+    folder = relative_path.split(os.sep, 1)[0]
     for lang in languages:
-        if teamcity:
-            teamcity_messages.testStarted('checkLanguageExistence.{}.{}'.format(domain, lang),
-                                          captureStandardOutput=False)
+        if folder == lang or folder.startswith((lang + '_', lang + '.', lang + '@')):
+            return lang
+    return None
+
+
+def load_catalog(file_path: str, domain: str, lang: str, class_: type = CheckTextTranslation):
+    """Load the catalog of lang with class_, raising FileNotFoundError as gettext.translation does.
+
+    Only gettext classes are loaded through gettext.translation, which
+    chains the other catalogs a language expands to, such as pt for pt_BR,
+    as fallbacks. Other readers load the first catalog found, the only one
+    validated either way.
+    """
+    if issubclass(class_, gettext.NullTranslations):
+        return gettext.translation(domain, file_path, [lang], class_=class_)
+    catalog_path = find_catalog(file_path, domain, lang, class_)
+    if catalog_path is None:
+        raise FileNotFoundError(errno.ENOENT, 'No translation file found for domain', domain)
+    with open(catalog_path, 'rb') as fp:
+        return class_(fp)
+
+
+def _load_catalog(file_path: str, domain: str, lang: str, class_: type) -> Tuple[
+        Union[gettext.NullTranslations, None], float]:
+    start = time.perf_counter()
+    try:
+        translator = load_catalog(file_path, domain, lang, class_)
+    except FileNotFoundError:
+        translator = None
+    return translator, time.perf_counter() - start
+
+
+def _map_languages(function: Callable[[str], object], languages: List[str], threads: int) -> Iterable[object]:
+    """Return function applied to every language, in order, on up to threads threads."""
+    if threads <= 1 or len(languages) <= 1:
+        return map(function, languages)
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(threads, len(languages))) as executor:
+        return list(executor.map(function, languages))
+
+
+def validate_translations(translators: Dict[str, Union[gettext.GNUTranslations, CatalogIndex, 'MoCatalog']],
+                          calls: Union[Dict[str, FileCalls], Iterable[Tuple[str, FileCalls]]], suggest: int = 0):
+    """Report the literal calls missing a translation, per file and language.
+
+    calls is either the mapping returned by parse_folder or an iterable of
+    (file_path, calls) pairs such as iter_folder_calls, which is validated as
+    it is consumed. Files that failed to parse are skipped. With suggest, up
+    to that many msgids of the catalog closest to each missing msgid are
+    reported alongside it.
+    """
+    if isinstance(calls, Mapping):
+        calls = calls.items()
+    reporter = get_reporter()
+    checkers = {lang: _LanguageCheck(translator, suggest) for lang, translator in translators.items()}
+    for lang, checker in checkers.items():
+        if checker.unreachable:
+            reporter.unreachable_plurals(lang, checker.unreachable)
+    # Each distinct (context, msgid, is_plural) message is only looked up once per language
+    checked = set()
+    for file_name, call_objs in calls:
+        if call_objs is None:
+            continue
+        start = time.perf_counter()
+        file_keys, new_keys = _file_messages(call_objs['literal_calls'], checked)
+        for lang, checker in checkers.items():
+            reporter.file_validated(file_name, lang, checker.check(file_keys, new_keys))
+        if timings.enabled:
+            timings.add('validate', time.perf_counter() - start)
+    reporter.flush()
+
+
+def validate_domains(translators: Dict[str, Dict[str, Union[gettext.GNUTranslations, CatalogIndex, 'MoCatalog']]],
+                     calls: Union[Dict[str, FileCalls], Iterable[Tuple[str, FileCalls]]], default_domain: str,
+                     suggest: int = 0):
+    """Report the literal calls missing a translation in the catalogs of their own domain.
+
+    Calls naming their domain with a literal, such as dgettext('errors',
+    ...), are checked in that domain and every other call in default_domain.
+    Calls to domains missing from translators are not checked. A file is
+    reported for the domains it calls only. suggest is as for
+    validate_translations.
+    """
+    if isinstance(calls, Mapping):
+        calls = calls.items()
+    reporter = get_reporter()
+    checkers = {domain: {lang: _LanguageCheck(translator, suggest) for lang, translator in domain_translators.items()}
+                for domain, domain_translators in translators.items()}
+    for domain, domain_checkers in checkers.items():
+        for lang, checker in domain_checkers.items():
+            if checker.unreachable:
+                reporter.unreachable_plurals(lang, checker.unreachable, domain)
+    # Messages already looked up, per domain
+    checked = {domain: set() for domain in checkers}
+    for file_name, call_objs in calls:
+        if call_objs is None:
+            continue
+        start = time.perf_counter()
+        domain_calls = split_domains(call_objs['literal_calls'], default_domain)
+        for domain, domain_checkers in checkers.items():
+            if domain not in domain_calls:
+                continue
+            file_keys, new_keys = _file_messages(domain_calls[domain], checked[domain])
+            for lang, checker in domain_checkers.items():
+                reporter.file_validated(file_name, lang, checker.check(file_keys, new_keys), domain)
+        if timings.enabled:
+            timings.add('validate', time.perf_counter() - start)
+    reporter.flush()
+
+
+def split_domains(literal_calls: List[CallSite], default_domain: str) -> Dict[str, List[CallSite]]:
+    """Group literal calls by the domain they look their message up in."""
+    domain_calls = {}
+    for call in literal_calls:
+        domain_index = MESSAGE_ARGUMENTS[call.function][0]
+        domain = call.args[domain_index] if domain_index is not None else default_domain
+        domain_calls.setdefault(domain, []).append(call)
+    return domain_calls
+
+
+def find_catalogs(file_path: str, domain: str, languages: List[str], threads: int = 8,
+                  class_: type = CheckTextTranslation) -> List[str]:
+    """Return the languages that have a catalog, reporting the others as get_translation_object does."""
+    reporter = get_reporter()
+    found = []
+    for lang, catalog_path in zip(languages, _map_languages(
+            lambda lang: find_catalog(file_path, domain, lang, class_), languages, threads)):
+        if catalog_path is None:
+            reporter.language_loaded(domain, lang, False)
         else:
-            print("Checking existence of language {} in domain '{}'".format(
-                lang, domain))
-        try:
-            translations[lang] = gettext.translation(
-                domain, file_path, [lang], class_=CheckTextTranslation)
-            if teamcity:
-                teamcity_messages.testFinished(
-                    'checkLanguageExistence.{}.{}'.format(domain, lang))
+            found.append(lang)
+            reporter.language_loaded(domain, lang, True)
+    reporter.flush()
+    return found
+
+
+def validate_catalogs(file_path: str, domain: str, languages: List[str],
+                      calls: Union[Dict[str, FileCalls], Iterable[Tuple[str, FileCalls]]],
+                      workers: int = 0, class_: type = CheckTextTranslation, suggest: int = 0):
+    """Validate calls against each language in its own worker process.
+
+    Every worker loads the catalog of its language once and checks all the
+    files, the reports are then made in the same order as
+    validate_translations would make them. languages should only hold
+    languages with a catalog, as returned by find_catalogs.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if isinstance(calls, Mapping):
+        calls = calls.items()
+    # The calls are sent once to each worker, not once per language
+    files = [(file_name, call_objs['literal_calls']) for file_name, call_objs in calls if call_objs is not None]
+    start = time.perf_counter()
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(languages))),
+                             initializer=_set_worker_files, initargs=(files,)) as executor:
+        results = dict(zip(languages, executor.map(_validate_language, [file_path] * len(languages),
+                                                   [domain] * len(languages), languages,
+                                                   [class_] * len(languages), [suggest] * len(languages))))
+    reporter = get_reporter()
+    for lang in languages:
+        unreachable, _ = results[lang]
+        if unreachable:
+            reporter.unreachable_plurals(lang, unreachable)
+    for index, (file_name, _) in enumerate(files):
+        for lang in languages:
+            reporter.file_validated(file_name, lang, results[lang][1][index])
+    if timings.enabled:
+        timings.add('validate', time.perf_counter() - start, len(files))
+    reporter.flush()
+
+
+# The files validated by the worker process, set once when it starts
+_worker_files = []
+
+
+def _set_worker_files(files: List[Tuple[str, List[CallSite]]]):
+    global _worker_files
+    _worker_files = files
+
+
+def _validate_language(file_path: str, domain: str, lang: str, class_: type, suggest: int) -> Tuple[
+        List[int], List[List[MissingTranslation]]]:
+    checker = _LanguageCheck(load_catalog(file_path, domain, lang, class_), suggest)
+    checked = set()
+    return checker.unreachable, [checker.check(*_file_messages(literal_calls, checked))
+                                 for _, literal_calls in _worker_files]
+
+
+class _LanguageCheck(object):
+    """The messages missing from one language, looked up a file at a time.
+
+    Plural messages need a translation for every form, 0 to nplurals - 1
+    when the catalog declares its Plural-Forms. With suggest, msgids absent
+    from the catalog come with the suggest closest msgids it translates,
+    from an index built the first time one is missing.
+    """
+
+    def __init__(self, translator: Union[gettext.GNUTranslations, CatalogIndex, 'MoCatalog'], suggest: int = 0):
+        translator = index_catalog(translator)
+        self.translator = translator
+        plural_indexes = set(predict_plurals(translator).values())
+        plural_forms = _plural_forms(translator)
+        if plural_forms is None:
+            self.unreachable = []
+        else:
+            from pychecktext.plurals import plural_coverage
+            coverage = plural_coverage(plural_forms)
+            self.unreachable = coverage.unreachable
+            plural_indexes.update(range(coverage.nplurals))
+        self.plural_indexes = sorted(plural_indexes)
+        # Missing singular messages, and the missing forms of each plural message
+        self.missing = set()
+        self.missing_plurals = {}
+        self.suggest = suggest
+        self.suggestion_index = None
+        self.suggestions = {}
+
+    def check(self, file_keys: Dict[Tuple[Union[str, None], str, bool], int],
+              new_keys: List[Tuple[Union[str, None], str, bool]]) -> List[MissingTranslation]:
+        """Look up the messages not seen in earlier files and return those missing in this one."""
+        required = []
+        for context, msgid, is_plural in new_keys:
+            if is_plural:
+                missing_indexes = self.translator.missing_plurals(context, msgid, self.plural_indexes)
+                if missing_indexes:
+                    self.missing_plurals[context, msgid] = tuple(missing_indexes)
             else:
-                print("Language {} in domain '{}' found.".format(lang, domain))
-        except FileNotFoundError:
-            if teamcity:
-                teamcity_messages.testFailed('checkLanguageExistence.{}.{}'.format(domain, lang),
-                                             message="Language file {0}.mo for language {1} is missing.".format(domain, lang))
+                required.append((context, msgid, None))
+        self.missing.update(self.translator.missing(required))
+        file_missing = []
+        for (context, msgid, is_plural), lineno in file_keys.items():
+            if is_plural:
+                if (context, msgid) in self.missing_plurals:
+                    file_missing.append(MissingTranslation(context, msgid, self.missing_plurals[context, msgid], lineno,
+                                                           self.suggestions_for(msgid)))
+            elif (context, msgid, None) in self.missing:
+                file_missing.append(MissingTranslation(context, msgid, None, lineno, self.suggestions_for(msgid)))
+        return file_missing
+
+    def suggestions_for(self, msgid: str) -> Tuple[str, ...]:
+        """Return the msgids closest to a missing msgid, none when suggest is 0 or the catalog has the msgid."""
+        if not self.suggest:
+            return ()
+        if msgid not in self.suggestions:
+            if self.suggestion_index is None:
+                from pychecktext.suggestions import SuggestionIndex
+                self.suggestion_index = SuggestionIndex(self.translator.msgids())
+            if msgid in self.suggestion_index:
+                self.suggestions[msgid] = ()
             else:
-                print("Language file {} is missing in domain '{}'".format(lang, domain))
-    return translations
+                self.suggestions[msgid] = tuple(self.suggestion_index.suggest(msgid, self.suggest))
+        return self.suggestions[msgid]
 
 
-def validate_translations(translators: Dict[str, gettext.translation],
-                          calls: Dict[str, Dict[str, List[Dict[str, Union[str, List[str]]]]]]):
-    for lang, translator in translators.items():
-        plural_options = predict_plurals(translator)
-        for file_name, call_objs in calls.items():
-            literal_calls = call_objs['literal_calls']
-            has_failed = False
-            if teamcity:
-                teamcity_messages.testStarted('checkTokenExistence({}, {})'.format(os.path.basename(file_name), lang),
-                                              captureStandardOutput=False)
-            else:
-                print("Verifying tokens for language {} in file '{}'".format(
-                    lang, os.path.basename(file_name)))
-            for call in literal_calls:
-                if call['function'] in ['gettext', 'dgettext', 'pgettext', 'dpgettext', 'lgettext', 'ldgettext']:
-                    translation = getattr(
-                        translator, call['function'])(*call['args'])
-                    if isinstance(translation, tuple) or translation == '':
-                        has_failed = True
-                        if teamcity:
-                            teamcity_messages.customMessage('msgid {} is missing a translation'.format(translation[0]),
-                                                            status='FAILURE')
-                        else:
-                            print("msgid '{}' is missing a translation in language '{}'".format(
-                                translation[0], lang))
-                else:
-                    for plural_form in plural_options:
-                        translation = getattr(translator, call['function'])(
-                            *call['args'], plural_form)
-                        if isinstance(translation, tuple):
-                            has_failed = True
-                            if teamcity:
-                                teamcity_messages.customMessage('msgid {0} is missing a translation '
-                                                                'for plural id {1}'.format(translation[0],
-                                                                                           plural_options[plural_form]), status='FAILURE')
-                            else:
-                                print("msgid '{}' is missing a translation in language '{}' for plural id {}".format(
-                                    translation[0], lang, plural_options[plural_form]
-                                ))
-            if teamcity:
-                if has_failed:
-                    teamcity_messages.testFailed('checkTokenExistence({}, {})'.format(os.path.basename(file_name),
-                                                                                      lang), "Missing tokens found")
-                else:
-                    teamcity_messages.testFinished('checkTokenExistence({}, {})'.format(os.path.basename(file_name),
-                                                                                        lang))
+def _file_messages(literal_calls: List[CallSite], checked: Set[Tuple[Union[str, None], str, bool]]) -> Tuple[
+        Dict[Tuple[Union[str, None], str, bool], int], List[Tuple[Union[str, None], str, bool]]]:
+    """Return the messages of a file with the line of their first call, and those not in checked yet."""
+    file_keys = {}
+    for call in literal_calls:
+        file_keys.setdefault(message_key(call), call.lineno)
+    new_keys = [key for key in file_keys if key not in checked]
+    checked.update(new_keys)
+    return file_keys, new_keys
+
+
+def message_key(call: CallSite) -> Tuple[Union[str, None], str, bool]:
+    """Return the (context, msgid, is_plural) message a literal call looks up."""
+    _, context_index, msgid_index, plural_index = MESSAGE_ARGUMENTS[call.function]
+    args = call.args
+    context = args[context_index] if context_index is not None else None
+    return context, args[msgid_index], plural_index is not None
 
 
 def predict_plurals(translator: gettext.translation) -> Dict[int, int]:
+    """Return a number selecting each plural form of translator, mapped to the index of the form.
+
+    The numbers are searched for in the Plural-Forms rule of the catalog, see
+    plurals.plural_coverage. Translators without the header are sampled.
+    """
+    plural_forms = _plural_forms(translator)
+    if plural_forms is not None:
+        from pychecktext.plurals import plural_coverage
+        return {n: index for index, n in plural_coverage(plural_forms).examples.items()}
     # A survey of the reported plural for examples from
     # 'http://docs.translatehouse.org/projects/localization-guide/en/latest/l10n/pluralforms.html'
     # Suggests that the number of required test ints is quite small
-    # TODO: Verify coverage of these example
     test_ints = [*range(0, 30), 100, 101, 117, 200, 201, 1000, 1001]
     options = {}
     result_indexes = set()
@@ -148,3 +545,11 @@ def predict_plurals(translator: gettext.translation) -> Dict[int, int]:
             result_indexes.add(result_index)
             options[test_int] = result_index
     return options
+
+
+def _plural_forms(translator: Union[gettext.GNUTranslations, CatalogIndex, 'MoCatalog']) -> Union[str, None]:
+    """Return the Plural-Forms header of translator, None if it has none."""
+    info = getattr(translator, 'info', None)
+    if info is None:
+        return None
+    return info().get('plural-forms')
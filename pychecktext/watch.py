@@ -0,0 +1,278 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Set, Tuple, Union
+from pychecktext import checktext_parser, validator
+from pychecktext.file_walker import FolderWalker, walk_python_files
+from pychecktext.reporting import get_reporter
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+EVENT_HEADER = struct.Struct('iIII')
+
+# Changes arriving this close together are handled as one update
+SETTLE_SECONDS = 0.05
+
+
+def _walk_watched(root: str, watched: Union[Callable[[str], bool], None]):
+    """os.walk root, entering only the folders below it that watched accepts."""
+    for subdir, folders, files in os.walk(root):
+        if watched is not None:
+            folders[:] = [name for name in folders if watched(os.path.join(subdir, name))]
+        yield subdir, files
+
+
+class PollingMonitor(object):
+    """Reports changed files under roots by comparing their stat every interval seconds.
+
+    Only the folders below the roots that watched accepts are looked at,
+    every one of them when it is None.
+    """
+
+    def __init__(self, roots: List[str], interval: float = 0.5, watched: Union[Callable[[str], bool], None] = None):
+        self.roots = roots
+        self.interval = interval
+        self.watched = watched
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            for subdir, files in _walk_watched(root, self.watched):
+                for filename in files:
+                    file_path = os.path.join(subdir, filename)
+                    try:
+                        stat = os.stat(file_path)
+                    except OSError:
+                        continue
+                    snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self) -> Set[str]:
+        while True:
+            time.sleep(self.interval)
+            snapshot = self._scan()
+            changed = {file_path for file_path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(file_path) != self._snapshot.get(file_path)}
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+class InotifyMonitor(object):
+    """Reports changed files under roots through Linux inotify, watching new folders as they appear.
+
+    Only the folders below the roots that watched accepts are watched. A
+    folder that cannot be watched, usually for lack of inotify watches,
+    raises OSError rather than going unnoticed.
+    """
+
+    def __init__(self, roots: List[str], watched: Union[Callable[[str], bool], None] = None):
+        self.roots = roots
+        self.watched = watched
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._watches = {}
+        try:
+            for root in roots:
+                self._watch_tree(root)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def _watch_tree(self, root: str) -> Set[str]:
+        """Watch root and every folder below it, returning the files already there."""
+        found = set()
+        for subdir, files in _walk_watched(root, self.watched):
+            descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(subdir), WATCH_MASK)
+            if descriptor < 0:
+                error = ctypes.get_errno()
+                # Gone again before it could be watched, its removal is reported on its parent
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(error, 'inotify_add_watch failed for {}: {}'.format(subdir, os.strerror(error)))
+            self._watches[descriptor] = subdir
+            found.update(os.path.join(subdir, filename) for filename in files)
+        return found
+
+    def _read(self) -> Set[str]:
+        changed = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            descriptor, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, everything has to be looked at again
+                changed.update(self.roots)
+                continue
+            if descriptor not in self._watches:
+                continue
+            path = os.path.join(self._watches[descriptor], name)
+            changed.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and (self.watched is None or self.watched(path)):
+                changed.update(self._watch_tree(path))
+        return changed
+
+    def wait(self) -> Set[str]:
+        changed = set()
+        while not changed:
+            select.select([self._fd], [], [])
+            changed = self._read()
+        # Editors and msgfmt write in several steps, wait for them to settle
+        while select.select([self._fd], [], [], SETTLE_SECONDS)[0]:
+            changed.update(self._read())
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_monitor(roots: List[str], interval: float = 0.5,
+                   watched: Union[Callable[[str], bool], None] = None) -> Union[InotifyMonitor, PollingMonitor]:
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyMonitor(roots, watched)
+        except (OSError, AttributeError):
+            # Polling still sees the folders inotify could not watch
+            pass
+    return PollingMonitor(roots, interval, watched)
+
+
+class Watcher(object):
+    """Keeps the catalogs and the calls of every file in memory, re-validating only what changes.
+
+    A changed python file is parsed again and validated against every
+    language, a changed catalog is loaded again and every file validated
+    against that language only.
+    """
+
+    def __init__(self, folder_path: str, alias: Dict[str, Union[str, None]], translation_path: str, domain: str,
+                 languages: List[str], class_: type = validator.CheckTextTranslation, exclude: Sequence[str] = (),
+                 gitignore: bool = False, suggest: int = 0):
+        self.folder_path = os.path.abspath(folder_path)
+        self.exclude = exclude
+        self.gitignore = gitignore
+        self.walker = FolderWalker(self.folder_path, exclude, gitignore)
+        self.alias = alias
+        self.translation_path = os.path.abspath(translation_path)
+        self.domain = domain
+        self.languages = languages
+        self.class_ = class_
+        self.suggest = suggest
+        self.translators = {}
+        self.file_calls = {}
+
+    def start(self):
+        # Converted once, every update validates against them again
+        self.translators = {lang: validator.index_catalog(translator) for lang, translator in
+                            validator.get_translation_object(self.translation_path, self.domain, self.languages,
+                                                             class_=self.class_).items()}
+        self.file_calls = checktext_parser.parse_folder(self.folder_path, self.alias, exclude=self.exclude,
+                                                        gitignore=self.gitignore)
+        validator.validate_translations(self.translators, self.file_calls, self.suggest)
+
+    def _watched(self, folder: str) -> bool:
+        """Check whether folder may hold the sources or catalogs looked at, so the monitor has to enter it."""
+        if self.translation_path.startswith(folder + os.sep):
+            return True
+        if folder.startswith(self.translation_path + os.sep):
+            # Catalogs are found in <lang>/LC_MESSAGES
+            parts = os.path.relpath(folder, self.translation_path).split(os.sep)
+            if not parts[0].startswith('.') and parts[1:] in ([], ['LC_MESSAGES']):
+                return True
+        return folder.startswith(self.folder_path + os.sep) and not self.walker.is_excluded(folder)
+
+    def _language_of(self, catalog_path: str) -> Union[str, None]:
+        return validator.catalog_language(catalog_path, self.translation_path, self.domain, self.languages, self.class_)
+
+    def _changed_files(self, paths: Iterable[str]) -> Set[str]:
+        changed = set()
+        for path in paths:
+            if os.path.isdir(path):
+                if not self.walker.is_excluded(path):
+                    changed.update(file_path for file_path in walk_python_files(path)
+                                   if not self.walker.is_excluded(file_path))
+                # Files the folder used to hold may have gone with it
+                changed.update(file_path for file_path in self.file_calls
+                               if file_path.startswith(path + os.sep) and not os.path.exists(file_path))
+            elif path.endswith('.py') and not self.walker.is_excluded(path):
+                changed.add(path)
+        return changed
+
+    def _reload(self, lang: str):
+        catalog_path = validator.find_catalog(self.translation_path, self.domain, lang, self.class_)
+        if catalog_path is None:
+            self.translators.pop(lang, None)
+            get_reporter().language_loaded(self.domain, lang, False)
+            return
+        # Read the file directly, gettext.translation would return its cached catalog
+        with open(catalog_path, 'rb') as fp:
+            self.translators[lang] = validator.index_catalog(self.class_(fp))
+        get_reporter().language_loaded(self.domain, lang, True)
+
+    def update(self, paths: Iterable[str]):
+        paths = [os.path.abspath(path) for path in paths]
+        languages = {self._language_of(path) for path in paths if path.startswith(self.translation_path)}
+        languages.discard(None)
+        if self.translation_path in paths:
+            languages = set(self.languages)
+        for lang in sorted(languages):
+            self._reload(lang)
+        changed_calls = {}
+        for file_path in sorted(self._changed_files(path for path in paths if path.startswith(self.folder_path))):
+            if os.path.exists(file_path):
+                changed_calls[file_path] = self.file_calls[file_path] = checktext_parser.parse_file(
+                    file_path, self.alias)
+            else:
+                self.file_calls.pop(file_path, None)
+        if changed_calls:
+            validator.validate_translations(self.translators, changed_calls, self.suggest)
+        reloaded = {lang: translator for lang, translator in self.translators.items() if lang in languages}
+        if reloaded:
+            validator.validate_translations(reloaded, {file_path: calls for file_path, calls in self.file_calls.items()
+                                                       if file_path not in changed_calls}, self.suggest)
+
+    def run(self, interval: float = 0.5):
+        """Validate everything once, then again whatever changes until interrupted."""
+        self.start()
+        roots = [self.folder_path, self.translation_path]
+        monitor = create_monitor(roots, interval, self._watched)
+        try:
+            while True:
+                try:
+                    changed = monitor.wait()
+                except OSError:
+                    # A new folder could not be watched, poll instead and look at everything again
+                    monitor.close()
+                    monitor = PollingMonitor(roots, interval, self._watched)
+                    changed = roots
+                self.update(changed)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            monitor.close()
@@ -0,0 +1,32 @@
+import argparse
+import os
+import sys
+# Run from a checkout, the package is next to this folder
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pychecktext import reporting, sharding   # noqa: E402
+
+parser = argparse.ArgumentParser(description='Merge the results of checktext.py --shard runs into a single report')
+parser.add_argument('results', nargs='+', help="Result files written by every shard")
+parser.add_argument('--teamcity', action='store_true', help="Report as TeamCity service messages even outside TeamCity")
+parser.add_argument('--quiet', action='store_true', help="Do not report to the console or TeamCity")
+parser.add_argument('--json', help="Write every problem found to this JSON file")
+parser.add_argument('--sarif', help="Write every problem found to this SARIF file")
+args = parser.parse_args()
+
+reporters = []
+if args.teamcity:
+    reporters.append(reporting.TeamCityReporter())
+elif not args.quiet:
+    reporters.append(reporting.get_reporter())
+if args.json is not None:
+    reporters.append(reporting.JsonReporter(args.json))
+if args.sarif is not None:
+    reporters.append(reporting.SarifReporter(args.sarif))
+reporter = reporting.MultiReporter(reporters)
+reporting.set_reporter(reporter)
+
+reporter.suite_started("checkGetTextTokens")
+failed = sharding.merge_results(args.results, reporter)
+reporter.suite_finished("checkGetTextTokens")
+reporter.close()
+sys.exit(1 if failed else 0)
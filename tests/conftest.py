@@ -1,6 +1,11 @@
 import pytest
 import shutil
 import os
+from pychecktext import lazy_numpy
+
+LOCALE_PATH = './tests/test_module/locale'
+# Languages with a catalog in ./tests/test_artifacts
+supported_languages = ['en', 'ar', 'ay']
 
 @pytest.fixture(scope='session', autouse=True)
 def create_test_module():
@@ -16,6 +21,39 @@ def cleanup_locale_fixture():
     yield
 
 
+@pytest.fixture
+def install_catalogs():
+    """Return a function copying the catalogs of ./tests/test_artifacts to a locale folder as those of a domain.
+
+    The .mo catalogs are copied, or their .po sources with extension '.po'.
+    The function returns the locale folder.
+    """
+    def install(languages, domain='test', locale_path=LOCALE_PATH, extension='.mo'):
+        for language in languages:
+            folder = os.path.join(locale_path, language, 'LC_MESSAGES')
+            os.makedirs(folder, exist_ok=True)
+            shutil.copy('./tests/test_artifacts/{}{}'.format(language, extension),
+                        os.path.join(folder, domain + extension))
+        return locale_path
+    yield install
+
+
+@pytest.fixture
+def locale_fixture(cleanup_locale_fixture, install_catalogs):
+    """A fresh locale folder with the catalog of every supported language as domain 'test'."""
+    yield install_catalogs(supported_languages)
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def numpy_backend(request, monkeypatch):
+    """Run a test with NumPy, when it is installed, then with the pure python fallback."""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(lazy_numpy, 'numpy', None)
+    yield request.param
+
+
 @pytest.fixture
 def cleanup_fixture():
     try:
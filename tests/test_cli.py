@@ -0,0 +1,35 @@
+import os
+import sys
+import pytest
+sys.path.extend('../../')
+from pychecktext import reporting  # noqa: E402
+from pychecktext.cli import main  # noqa: E402
+
+
+@pytest.fixture
+def cli_fixture(tmp_path, install_catalogs):
+    os.makedirs(str(tmp_path / 'src'))
+    install_catalogs(['en'], locale_path=str(tmp_path / 'locale'))
+    with open(str(tmp_path / 'src' / 'first.py'), 'w') as f:
+        f.write("print(gettext('herring'))\n")
+    yield str(tmp_path)
+    # main sends the events of the run to its own reporter
+    reporting.set_reporter(None)
+
+
+@pytest.mark.parametrize('extra_args', [[], ['--validate-jobs', '2'], ['--domain', 'other']])
+def test_exit_status(cli_fixture, install_catalogs, extra_args):
+    args = ['--folder_path', os.path.join(cli_fixture, 'src'), '--translation_path', os.path.join(cli_fixture, 'locale'),
+            '--domain', 'test', '--languages', 'en', '--no-cache', '--quiet'] + extra_args
+    if extra_args[:1] == ['--domain']:
+        install_catalogs(['en'], 'other', os.path.join(cli_fixture, 'locale'))
+    assert main(args) == 0
+    with open(os.path.join(cli_fixture, 'src', 'first.py'), 'a') as f:
+        f.write("print(gettext('not_the_messiah'))\n")
+    assert main(args) == 1
+
+
+def test_exit_status_missing_language(cli_fixture):
+    assert main(['--folder_path', os.path.join(cli_fixture, 'src'), '--translation_path',
+                 os.path.join(cli_fixture, 'locale'), '--domain', 'test', '--languages', 'en', 'xx', '--no-cache',
+                 '--quiet']) == 1
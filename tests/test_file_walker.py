@@ -0,0 +1,101 @@
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+sys.path.extend('../../')
+from pychecktext.file_walker import FolderWalker, walk_python_files  # noqa: E402
+
+tree = [
+    'main.py',
+    'notes.txt',
+    '.hidden.py',
+    '.git/hooks/hook.py',
+    '.venv/lib/site.py',
+    'build/lib/main.py',
+    'node_modules/tool/setup.py',
+    'package/__init__.py',
+    'package/module.py',
+    'package/generated_pb2.py',
+    'package/migrations/0001_initial.py',
+    'package/sub/keep_me.py',
+    'package/sub/deep/ignored.py',
+    'docs/conf.py',
+    'docs/source/example.py',
+]
+
+gitignores = {
+    '.gitignore': 'build/\n/docs/source\n*_pb2.py\n# comment\n\nnode_modules\n',
+    'package/.gitignore': 'migrations/\nsub/**\n!sub/\n!sub/keep_me.py\n',
+}
+
+
+@pytest.fixture
+def tree_fixture(tmp_path):
+    root = tmp_path / 'project'
+    for relative_path in tree:
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('import gettext\n')
+    for relative_path, content in gitignores.items():
+        (root / relative_path).write_text(content)
+    yield str(root)
+
+
+def relative_files(root, file_paths):
+    return [os.path.relpath(file_path, root).replace(os.sep, '/') for file_path in file_paths]
+
+
+def test_walk(tree_fixture):
+    assert relative_files(tree_fixture, walk_python_files(tree_fixture)) == [
+        'main.py',
+        'build/lib/main.py',
+        'docs/conf.py',
+        'docs/source/example.py',
+        'node_modules/tool/setup.py',
+        'package/__init__.py',
+        'package/generated_pb2.py',
+        'package/module.py',
+        'package/migrations/0001_initial.py',
+        'package/sub/keep_me.py',
+        'package/sub/deep/ignored.py',
+    ]
+
+
+def test_exclude(tree_fixture):
+    file_paths = walk_python_files(tree_fixture, exclude=['build', 'node_modules', 'package/migrations', '*_pb2.py'])
+    assert relative_files(tree_fixture, file_paths) == [
+        'main.py',
+        'docs/conf.py',
+        'docs/source/example.py',
+        'package/__init__.py',
+        'package/module.py',
+        'package/sub/keep_me.py',
+        'package/sub/deep/ignored.py',
+    ]
+
+
+def test_gitignore(tree_fixture):
+    expected = [
+        'main.py',
+        'docs/conf.py',
+        'package/__init__.py',
+        'package/module.py',
+        'package/sub/keep_me.py',
+    ]
+    assert relative_files(tree_fixture, walk_python_files(tree_fixture, gitignore=True)) == expected
+    if shutil.which('git') is not None:
+        subprocess.check_call(['git', 'init', '-q'], cwd=tree_fixture)
+        output = subprocess.check_output(['git', 'ls-files', '--others', '--exclude-standard', '*.py'],
+                                         cwd=tree_fixture).decode()
+        assert sorted(line for line in output.splitlines() if not line.startswith('.')) == sorted(expected)
+
+
+def test_is_excluded(tree_fixture):
+    walker = FolderWalker(tree_fixture, exclude=['node_modules'], gitignore=True)
+    for relative_path in tree:
+        path = os.path.join(tree_fixture, *relative_path.split('/'))
+        expected = path not in set(walker.walk()) and relative_path.endswith('.py')
+        assert walker.is_excluded(path) == expected
+    assert walker.is_excluded(os.path.join(tree_fixture, 'package', 'migrations'))
+    assert not walker.is_excluded(os.path.join(tree_fixture, 'package', 'new.py'))
@@ -0,0 +1,104 @@
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+sys.path.extend('../../')
+from pychecktext.git_changes import changed_paths, validate_changed  # noqa: E402
+from pychecktext.po_catalog import PoCatalog  # noqa: E402
+from pychecktext.validator import catalog_language  # noqa: E402
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+alias = {}
+
+catalog = '''\
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+
+msgid "herring"
+msgstr "{}"
+'''
+
+
+def git(root, *args):
+    subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com'] + list(args), cwd=root,
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+@pytest.fixture
+def repo_fixture(tmp_path):
+    root = tmp_path / 'project'
+    for name in ('first', 'second'):
+        path = root / 'src' / '{}.py'.format(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('from gettext import gettext\ngettext("herring")\n')
+    for lang, translation in (('en', 'A herring!'), ('ar', 'A herring!')):
+        path = root / 'locale' / lang / 'LC_MESSAGES' / 'test.po'
+        path.parent.mkdir(parents=True)
+        path.write_text(catalog.format(translation))
+    git(str(root), 'init', '-q')
+    git(str(root), 'add', '.')
+    git(str(root), 'commit', '-q', '-m', 'initial')
+    yield str(root)
+
+
+def run(root):
+    validate_changed(os.path.join(root, 'src'), 'HEAD', alias, os.path.join(root, 'locale'), 'test', ['en', 'ar'],
+                     class_=PoCatalog)
+
+
+def test_changed_paths(repo_fixture):
+    assert changed_paths(repo_fixture, 'HEAD') == set()
+    with open(os.path.join(repo_fixture, 'src', 'first.py'), 'a') as f:
+        f.write('gettext("parrot")\n')
+    with open(os.path.join(repo_fixture, 'src', 'third.py'), 'w') as f:
+        f.write('\n')
+    os.remove(os.path.join(repo_fixture, 'src', 'second.py'))
+    assert changed_paths(os.path.join(repo_fixture, 'src'), 'HEAD') == {
+        os.path.join(os.path.realpath(repo_fixture), 'src', name) for name in ('first.py', 'third.py')}
+    # Untracked files outside of the folder count as well
+    new_catalog = os.path.join(repo_fixture, 'locale', 'fr', 'LC_MESSAGES', 'test.po')
+    os.makedirs(os.path.dirname(new_catalog))
+    with open(new_catalog, 'w') as f:
+        f.write(catalog.format('Un hareng !'))
+    assert os.path.join(os.path.realpath(repo_fixture), 'locale', 'fr', 'LC_MESSAGES', 'test.po') in \
+        changed_paths(os.path.join(repo_fixture, 'src'), 'HEAD')
+    with pytest.raises(ValueError):
+        changed_paths(repo_fixture, 'no-such-ref')
+
+
+def test_changed_files(repo_fixture, capsys):
+    with open(os.path.join(repo_fixture, 'src', 'first.py'), 'a') as f:
+        f.write('gettext("parrot")\n')
+    capsys.readouterr()
+    run(repo_fixture)
+    stdout = capsys.readouterr().out
+    # second.py is unchanged, first.py is the only file parsed
+    assert 'second.py' not in stdout
+    assert stdout.count('parrot') == 2
+    assert all('first.py' in line for line in stdout.splitlines() if 'parrot' in line)
+
+
+def test_changed_catalog(repo_fixture, capsys):
+    with open(os.path.join(repo_fixture, 'locale', 'ar', 'LC_MESSAGES', 'test.po'), 'w') as f:
+        f.write(catalog.format(''))
+    capsys.readouterr()
+    run(repo_fixture)
+    stdout = capsys.readouterr().out.splitlines()
+    missing = [line for line in stdout if 'herring' in line]
+    # Every file is checked again, for the changed language only
+    assert len(missing) == 2
+    assert all("language 'ar'" in line for line in missing)
+
+
+def test_changed_po_source(repo_fixture):
+    locale = os.path.join(repo_fixture, 'locale')
+    # Only the .po files are versioned, an edit to one changes the compiled .mo catalog as well
+    po_path = os.path.join(locale, 'ar', 'LC_MESSAGES', 'test.po')
+    assert catalog_language(po_path, locale, 'test', ['en', 'ar']) == 'ar'
+    assert catalog_language(po_path, locale, 'test', ['en', 'ar'], class_=PoCatalog) == 'ar'
+    assert catalog_language(os.path.join(locale, 'ar', 'LC_MESSAGES', 'test.mo'), locale, 'test', ['en', 'ar'],
+                            class_=PoCatalog) is None
+    assert catalog_language(os.path.join(locale, 'ar', 'LC_MESSAGES', 'other.po'), locale, 'test', ['ar']) is None
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+# Modules a plain run must not pay for, each is imported by the feature needing it
+HEAVY_MODULES = ['numpy', 'sqlite3', 'teamcity', 'teamcity.messages', 'dateutil', 'concurrent.futures.process',
+                 'concurrent.futures.thread']
+# Backends the validator only imports for the catalogs, plural rules and suggestions needing them
+LAZY_MODULES = ['pychecktext.mo_catalog', 'pychecktext.po_catalog', 'pychecktext.plurals', 'pychecktext.suggestions']
+# Everything a plain run imports, cli imports the rest once the arguments are parsed
+PLAIN_RUN_IMPORTS = ('import pychecktext.cli, pychecktext.checktext_parser, pychecktext.reporting, '
+                     'pychecktext.sharding, pychecktext.validator, pychecktext.timing, pychecktext.parse_cache')
+# Generous, a plain run imports them in about 100ms
+BUDGET_SECONDS = 0.25
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable] + list(args), cwd=root, capture_output=True, text=True, check=True)
+
+
+def test_no_heavy_imports():
+    code = ('import sys\n'
+            '{}, pychecktext.plurals, pychecktext.suggestions\n'
+            'print(sorted(name for name in {} if name in sys.modules))'.format(PLAIN_RUN_IMPORTS, HEAVY_MODULES))
+    assert run_python('-c', code).stdout.strip() == '[]'
+
+
+def test_lazy_backends():
+    code = ('import sys\n'
+            '{}\n'
+            'print(sorted(name for name in {} if name in sys.modules))'.format(PLAIN_RUN_IMPORTS, LAZY_MODULES))
+    assert run_python('-c', code).stdout.strip() == '[]'
+
+
+def test_import_budget():
+    code = ('import time\n'
+            'start = time.perf_counter()\n'
+            '{}\n'
+            'print(time.perf_counter() - start)'.format(PLAIN_RUN_IMPORTS))
+    assert min(float(run_python('-c', code).stdout) for _ in range(3)) < BUDGET_SECONDS
@@ -0,0 +1,96 @@
+import io
+import os
+import sys
+sys.path.extend('../../')
+from pychecktext.checktext_parser import CallSite  # noqa: E402
+from benchmarks.corpus import write_mo  # noqa: E402
+from pychecktext.mo_catalog import MoCatalog  # noqa: E402
+from pychecktext.po_catalog import PoCatalog  # noqa: E402
+from pychecktext.validator import CatalogIndex, CheckTextTranslation, get_translation_object, \
+    validate_translations  # noqa: E402
+
+supported_languages = ['en', 'ar', 'ay']
+
+
+def test_matches_gettext(locale_fixture):
+    translators = get_translation_object(locale_fixture, "test", supported_languages)
+    catalogs = get_translation_object(locale_fixture, "test", supported_languages, class_=MoCatalog)
+    for lang, translator in translators.items():
+        index = CatalogIndex.from_translations(translator)
+        catalog = catalogs[lang]
+        assert catalog.info()['language'] == lang
+        assert [catalog.plural(n) for n in range(200)] == [translator.plural(n) for n in range(200)]
+        probes = set(index.keys)
+        for context, msgid, plural_index in index.keys:
+            probes.update([(context, msgid, None), (context, msgid, 7), ('other', msgid, plural_index),
+                           (context, msgid + 'x', plural_index), (context, msgid[:-1], plural_index)])
+        probes.update([(None, 'blank', None), (None, 'not_the_messiah', None)])
+        assert catalog.missing(probes) == index.missing(probes)
+        assert catalog.msgids() == index.msgids()
+
+
+def test_hash_table(cleanup_locale_fixture):
+    os.makedirs("./tests/test_module/locale/en/LC_MESSAGES", exist_ok=True)
+    messages = {
+        b'': b'Content-Type: text/plain; charset=UTF-8\nPlural-Forms: nplurals=2; plural=n != 1;\n',
+        b'blank': b'',
+        b'polite\x04parrot': b'He has expired',
+        b'swallow_singular\0swallow_plural': b'a swallow\0swallows',
+        b'half_singular\0half_plural': b'one\0',
+        b'm\xc3\xb8\xc3\xb8se': b'A m\xc3\xb8\xc3\xb8se once bit my sister'
+    }
+    messages.update({'filler_{}'.format(index).encode(): b'filler' for index in range(200)})
+    write_mo("./tests/test_module/locale/en/LC_MESSAGES/hashed.mo", messages)
+    # A domain of its own, gettext caches catalogs by path for the whole session
+    catalog = get_translation_object("./tests/test_module/locale", "hashed", ['en'], class_=MoCatalog)['en']
+    translator = get_translation_object("./tests/test_module/locale", "hashed", ['en'],
+                                        class_=CheckTextTranslation)['en']
+    index = CatalogIndex.from_translations(translator)
+    probes = {(None, 'blank', None), ('polite', 'parrot', None), (None, 'parrot', None),
+              (None, 'swallow_singular', 0), (None, 'swallow_singular', 1), (None, 'swallow_singular', None),
+              (None, 'half_singular', 0), (None, 'half_singular', 1), (None, 'møøse', None),
+              (None, 'filler_150', None), (None, 'filler_1500', None)}
+    assert catalog.missing(probes) == index.missing(probes)
+    assert (None, 'filler_150', None) in catalog
+    for context, msgid in [(None, 'swallow_singular'), (None, 'half_singular'), (None, 'blank'), ('polite', 'parrot')]:
+        assert catalog.missing_plurals(context, msgid, range(3)) == index.missing_plurals(context, msgid, range(3))
+    assert catalog.missing_plurals(None, 'half_singular', range(3)) == [1, 2]
+    assert catalog.msgids() == index.msgids()
+    assert {'parrot', 'swallow_singular', 'half_singular', 'møøse'} <= catalog.msgids()
+    assert 'blank' not in catalog.msgids()
+
+
+def test_expanded_language(tmp_path):
+    # pt_BR expands to pt_BR and pt, gettext would chain the second catalog as a fallback
+    for lang in ('pt_BR', 'pt'):
+        os.makedirs(str(tmp_path / lang / 'LC_MESSAGES'))
+        write_mo(str(tmp_path / lang / 'LC_MESSAGES' / 'test.mo'),
+                 {b'': b'Content-Type: text/plain; charset=UTF-8\n', lang.encode(): b'translated'})
+    catalog = get_translation_object(str(tmp_path), 'test', ['pt_BR'], class_=MoCatalog)['pt_BR']
+    assert (None, 'pt_BR', None) in catalog
+    assert (None, 'pt', None) not in catalog
+
+
+def test_same_header_as_po(tmp_path):
+    # Without a charset, which GNUTranslations fails on, and with three plural forms
+    header = 'Content-Type: text/plain\nPlural-Forms: nplurals=3; plural=n==1 ? 0 : n==2 ? 1 : 2;\n'
+    write_mo(str(tmp_path / 'test.mo'), {b'': header.encode()})
+    with open(str(tmp_path / 'test.mo'), 'rb') as fp:
+        catalog = MoCatalog(fp)
+    index = PoCatalog(io.BytesIO('msgid ""\nmsgstr "{}"\n'.format(header.replace('\n', '\\n')).encode()))
+    assert catalog.info() == index.info() == {'content-type': 'text/plain',
+                                              'plural-forms': 'nplurals=3; plural=n==1 ? 0 : n==2 ? 1 : 2;'}
+    assert catalog.charset() is index.charset() is None
+    assert [catalog.plural(n) for n in (1, 2, 5)] == [index.plural(n) for n in (1, 2, 5)] == [0, 1, 2]
+
+
+def test_validate_with_mmap(locale_fixture, capsys):
+    catalogs = get_translation_object(locale_fixture, "test", ['en'], class_=MoCatalog)
+    calls = [CallSite("gettext", ("herring",), 1, 0),
+             CallSite("gettext", ("blank",), 2, 0),
+             CallSite("npgettext", ("male", "french_singular", "french_plural"), 3, 0)]
+    capsys.readouterr()
+    validate_translations(catalogs, {'test.py': {'literal_calls': calls}})
+    stdout = capsys.readouterr().out.splitlines()
+    assert len(stdout) == 2
+    assert all(test in stdout[1] for test in ['blank', 'en'])
@@ -0,0 +1,149 @@
+import io
+import os
+import subprocess
+import sys
+import pytest
+sys.path.extend('../../')
+from pychecktext.checktext_parser import iter_folder_calls, parse_folder  # noqa: E402
+from pychecktext.msgid_index import MessageIndex, write_pot  # noqa: E402
+from pychecktext.po_catalog import PoCatalog  # noqa: E402
+from pychecktext.validator import validate_translations  # noqa: E402
+
+sources = {
+    'first.py': 'from gettext import gettext, ngettext\n'
+                'gettext("herring")\n'
+                'ngettext("swallow", "swallows", 2)\n'
+                'gettext(b"bytes")\n',
+    'package/second.py': 'from gettext import pgettext\n'
+                         'pgettext("polite", "parrot")\n'
+                         'gettext("herring")\n'
+                         'gettext("multi\\nline \\"quoted\\"\\n")\n'
+                         'gettext(name)\n',
+    'empty.py': 'import os\n',
+}
+
+
+@pytest.fixture
+def project_fixture(tmp_path):
+    for relative_path, source in sources.items():
+        path = tmp_path / 'src' / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+    yield str(tmp_path)
+
+
+def index_folder(root, index):
+    return dict(index.sync(iter_folder_calls(os.path.join(root, 'src'), {}, cache=index)))
+
+
+def test_index_roundtrip(project_fixture):
+    index_path = os.path.join(project_fixture, 'index.json')
+    with MessageIndex(index_path) as index:
+        parsed = index_folder(project_fixture, index)
+        assert (index.hits, index.misses) == (0, 3)
+    index = MessageIndex(index_path)
+    assert len(index) == 3
+    assert index.file_calls() == {file_path: parsed[file_path] for file_path in sorted(parsed)}
+    assert index_folder(project_fixture, index) == parsed
+    assert (index.hits, index.misses) == (3, 0)
+
+
+def test_index_update(project_fixture):
+    index_path = os.path.join(project_fixture, 'index.json')
+    with MessageIndex(index_path) as index:
+        index_folder(project_fixture, index)
+    with open(os.path.join(project_fixture, 'src', 'first.py'), 'a') as f:
+        f.write('gettext("parrot")\n')
+    os.remove(os.path.join(project_fixture, 'src', 'empty.py'))
+    with MessageIndex(index_path) as index:
+        parsed = index_folder(project_fixture, index)
+        assert (index.hits, index.misses) == (1, 1)
+    index = MessageIndex(index_path)
+    assert index.file_calls() == parsed
+    assert parsed[os.path.join(project_fixture, 'src', 'first.py')]['literal_calls'][-1].args == ('parrot',)
+    # Another alias map changes what is found, so everything is parsed again
+    dict(iter_folder_calls(os.path.join(project_fixture, 'src'), {'_': 'gettext'}, cache=index))
+    assert (index.hits, index.misses) == (0, 2)
+
+
+def test_index_parse_error(project_fixture):
+    index_path = os.path.join(project_fixture, 'index.json')
+    with MessageIndex(index_path) as index:
+        index_folder(project_fixture, index)
+    first_path = os.path.join(project_fixture, 'src', 'first.py')
+    with open(first_path, 'w') as f:
+        f.write('gettext(\n')
+    with MessageIndex(index_path) as index:
+        assert index_folder(project_fixture, index)[first_path] is None
+    # The calls found before the syntax error are not validated anymore
+    index = MessageIndex(index_path)
+    assert first_path not in index.file_calls()
+    assert len(index) == 2
+
+
+def test_index_extractor_version(project_fixture, monkeypatch):
+    index_path = os.path.join(project_fixture, 'index.json')
+    with MessageIndex(index_path) as index:
+        index_folder(project_fixture, index)
+    monkeypatch.setattr('pychecktext.msgid_index.EXTRACTOR_VERSION', 0)
+    index = MessageIndex(index_path)
+    assert len(index) == 0
+    index_folder(project_fixture, index)
+    assert (index.hits, index.misses) == (0, 3)
+
+
+def test_validate_from_index(project_fixture, capsys):
+    index_path = os.path.join(project_fixture, 'index.json')
+    with MessageIndex(index_path) as index:
+        index_folder(project_fixture, index)
+    catalog = PoCatalog(io.BytesIO(b'msgid "herring"\nmsgstr "A herring!"\n'))
+    parsed = parse_folder(os.path.join(project_fixture, 'src'), {})
+    capsys.readouterr()
+    validate_translations({'en': catalog}, {file_path: parsed[file_path] for file_path in sorted(parsed)})
+    parsed_output = capsys.readouterr().out
+    validate_translations({'en': catalog}, MessageIndex(index_path).file_calls())
+    assert capsys.readouterr().out == parsed_output
+    assert 'swallow' in parsed_output
+
+
+def test_write_pot(project_fixture):
+    pot_path = os.path.join(project_fixture, 'messages.pot')
+    write_pot(pot_path, parse_folder(os.path.join(project_fixture, 'src'), {}))
+    with open(pot_path, encoding='utf-8') as f:
+        content = f.read()
+    assert content.split('\n\n', 1)[1] == '''\
+#: src/first.py:2 src/package/second.py:3
+msgid "herring"
+msgstr ""
+
+#: src/first.py:3
+msgid "swallow"
+msgid_plural "swallows"
+msgstr[0] ""
+msgstr[1] ""
+
+#: src/package/second.py:2
+msgctxt "polite"
+msgid "parrot"
+msgstr ""
+
+#: src/package/second.py:4
+msgid ""
+"multi\\n"
+"line \\"quoted\\"\\n"
+msgstr ""
+'''
+    with open(pot_path, 'rb') as f:
+        assert PoCatalog(f).keys == {(None, '', None)}
+
+
+@pytest.mark.parametrize('path_option', ['--folder_path', '--file_path'])
+def test_cli_pot(project_fixture, path_option):
+    pot_path = os.path.join(project_fixture, 'messages.pot')
+    path = os.path.join(project_fixture, 'src', '' if path_option == '--folder_path' else 'first.py')
+    subprocess.run([sys.executable, '-m', 'pychecktext', path_option, path, '--pot', pot_path, '--no-cache'],
+                   cwd=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'), capture_output=True, check=True)
+    with open(pot_path, encoding='utf-8') as f:
+        content = f.read()
+    assert 'msgid "swallow"' in content
+    assert ('msgid "parrot"' in content) == (path_option == '--folder_path')
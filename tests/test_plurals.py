@@ -0,0 +1,62 @@
+import sys
+import pytest
+sys.path.extend('../../')
+from pychecktext.checktext_parser import CallSite  # noqa: E402
+from pychecktext.plurals import plural_coverage  # noqa: E402
+from pychecktext.validator import CatalogIndex, predict_plurals, validate_translations  # noqa: E402
+
+arabic = 'nplurals=6; plural=(n==0 ? 0 : n==1 ? 1 : n==2 ? 2 : n%100>=3 && n%100<=10 ? 3 : n%100>=11 ? 4 : 5);'
+
+coverages = [
+    ('nplurals=2; plural=(n != 1);', {0: 1, 1: 0}, []),
+    ('nplurals=1; plural=0;', {0: 0}, []),
+    (arabic, {0: 0, 1: 1, 2: 2, 3: 3, 4: 11, 5: 100}, []),
+    ('nplurals=3; plural=n%10==1 && n%100!=11 ? 0 : !(n%10>=2) ? 1 : 2;', {0: 1, 1: 0, 2: 2}, []),
+    # Only reached far beyond the numbers the old sample tried
+    ('nplurals=3; plural=n >= 200000 ? 2 : n/10 == 1;', {0: 0, 1: 10, 2: 200000}, []),
+    ('nplurals=3; plural=n != 1;', {0: 1, 1: 0}, [2]),
+]
+
+
+@pytest.fixture
+def evaluator(numpy_backend):
+    # Results are cached by rule, whichever backend computed them
+    plural_coverage.cache_clear()
+    yield numpy_backend
+    plural_coverage.cache_clear()
+
+
+@pytest.mark.parametrize('plural_forms, examples, unreachable', coverages)
+def test_plural_coverage(evaluator, plural_forms, examples, unreachable):
+    coverage = plural_coverage(plural_forms)
+    assert coverage.examples == examples
+    assert coverage.unreachable == unreachable
+
+
+def test_plural_coverage_cached(evaluator):
+    plural_coverage(arabic)
+    plural_coverage(arabic)
+    assert plural_coverage.cache_info().hits == 1
+
+
+def test_invalid_plural_forms():
+    with pytest.raises(ValueError):
+        plural_coverage('plural=n != 1;')
+
+
+def test_predict_plurals():
+    index = CatalogIndex([], lambda n: 0, arabic)
+    assert predict_plurals(index) == {0: 0, 1: 1, 2: 2, 3: 3, 11: 4, 100: 5}
+    # Without a header the plural function is sampled
+    assert predict_plurals(CatalogIndex([], lambda n: int(n != 1))) == {0: 1, 1: 0}
+
+
+def test_unreachable_plurals_reported(capsys):
+    # Unreachable forms still need a translation
+    index = CatalogIndex([(None, 'swallow', 0), (None, 'swallow', 1), (None, 'swallow', 2)], lambda n: int(n != 1),
+                         'nplurals=3; plural=n != 1;')
+    validate_translations({'en': index}, {'first.py': {'literal_calls': [
+        CallSite("ngettext", ("swallow", "swallows"), 1, 0)]}})
+    stdout = capsys.readouterr().out.splitlines()
+    assert stdout[0] == "Plural forms 2 of language en are never selected by its Plural-Forms rule"
+    assert len(stdout) == 2
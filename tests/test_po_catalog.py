@@ -0,0 +1,109 @@
+import gettext
+import io
+import sys
+import pytest
+sys.path.extend('../../')
+from pychecktext.checktext_parser import CallSite  # noqa: E402
+from pychecktext.po_catalog import PoCatalog  # noqa: E402
+from pychecktext.validator import CatalogIndex, get_translation_object, validate_translations  # noqa: E402
+
+supported_languages = ['en', 'ar', 'ay']
+
+catalog = '''\
+# Translator comment
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=3; plural=(n==1 ? 0 : n%10>=2 && n%10<=4 ? 1 : 2);\\n"
+
+#: src/a.py:1
+msgid "herring"
+msgstr "A herring!"
+
+msgid "blank"
+msgstr ""
+
+#, fuzzy, python-format
+msgid "fuzzy"
+msgstr "Not quite right"
+
+msgid ""
+"multi "
+"line"
+msgstr ""
+"Spread over "
+"lines"
+
+msgid "escaped \\"quotes\\"\\n"
+msgstr "Tab\\there"
+msgctxt "polite"
+msgid "parrot"
+msgstr "He has expired"
+
+msgid "swallow"
+msgid_plural "swallows"
+msgstr[0] "a swallow"
+msgstr[1] ""
+msgstr[2] "swallows"
+
+#, fuzzy
+msgctxt "male"
+msgid "french"
+msgid_plural "frenches"
+msgstr[0] "a father"
+msgstr[1] "fathers"
+msgstr[2] "fathers"
+
+msgid "møøse"
+msgstr "A møøse once bit my sister"
+
+#~ msgid "obsolete"
+#~ msgstr "Gone"
+'''
+
+
+def test_po_keys():
+    index = PoCatalog(io.BytesIO(catalog.encode('utf-8')))
+    assert index.keys == {
+        (None, '', None),
+        (None, 'herring', None),
+        (None, 'multi line', None),
+        (None, 'escaped "quotes"\n', None),
+        ('polite', 'parrot', None),
+        (None, 'swallow', 0),
+        (None, 'swallow', 2),
+        (None, 'møøse', None)}
+    assert index.info()['plural-forms'].startswith('nplurals=3;')
+    assert index.charset() == 'UTF-8'
+    assert [index.plural(n) for n in (1, 2, 5)] == [0, 1, 2]
+    assert index.missing_plurals(None, 'swallow', range(3)) == [1]
+    assert index.missing_plurals('male', 'french', range(3)) == [0, 1, 2]
+
+
+@pytest.mark.parametrize('language', supported_languages)
+def test_matches_mo(language):
+    with open("./tests/test_artifacts/{}.po".format(language), 'rb') as fp:
+        index = PoCatalog(fp)
+    with open("./tests/test_artifacts/{}.mo".format(language), 'rb') as fp:
+        compiled = CatalogIndex.from_translations(gettext.GNUTranslations(fp))
+    assert index.keys == compiled.keys
+    assert index.plural_forms == compiled.plural_forms
+
+
+def test_syntax_error():
+    with pytest.raises(OSError):
+        PoCatalog(io.BytesIO(b'msgid "herring"\nmsgstr "A herring!"\nherring\n'))
+
+
+def test_validate_po(cleanup_locale_fixture, install_catalogs, capsys):
+    install_catalogs(['en'], extension='.po')
+    catalogs = get_translation_object("./tests/test_module/locale", "test", ['en', 'ar'], class_=PoCatalog)
+    assert list(catalogs) == ['en']
+    calls = [CallSite("gettext", ("herring",), 1, 0),
+             CallSite("gettext", ("blank",), 2, 0),
+             CallSite("npgettext", ("male", "french_singular", "french_plural"), 3, 0)]
+    capsys.readouterr()
+    validate_translations(catalogs, {'test.py': {'literal_calls': calls}})
+    stdout = capsys.readouterr().out.splitlines()
+    assert len(stdout) == 2
+    assert all(test in stdout[1] for test in ['blank', 'en'])
@@ -1,8 +1,13 @@
+import ast
 import sys
 import pytest
 import os
+import shutil
 sys.path.extend('../../')
-from pychecktext.checktext_parser import parse_file  # noqa: E402
+from pychecktext import checktext_parser  # noqa: E402
+from pychecktext.checktext_parser import CallSite, SourceSegments, parse_file, parse_folder  # noqa: E402
+from pychecktext.parse_cache import ParseCache  # noqa: E402
+from pychecktext.timing import timings  # noqa: E402
 
 # test one instance of each named call
 
@@ -52,8 +57,8 @@ def test_single_call(cleanup_fixture, call_str, call_name, expected):
     calls = parse_file('./tests/test_module/test_file.py')
     assert len(calls['literal_calls']) == 1
     result = calls['literal_calls'][0]
-    assert result['function'] == call_name
-    assert result['args'] == expected
+    assert result.function == call_name
+    assert result.args == tuple(expected)
 
 
 @pytest.mark.parametrize("call_str, call_name, expected", calls)
@@ -73,8 +78,8 @@ def test_alias_call(cleanup_fixture, call_str, call_name, expected):
     calls = parse_file('./tests/test_module/test_file.py', alias=alias)
     assert len(calls['literal_calls']) == 1
     result = calls['literal_calls'][0]
-    assert result['function'] == alias[call_name]
-    assert result['args'] == expected
+    assert result.function == alias[call_name]
+    assert result.args == tuple(expected)
 
 
 @pytest.mark.parametrize("call_str, call_name, expected", calls)
@@ -88,8 +93,8 @@ def test_multiple_call(cleanup_fixture, call_str, call_name, expected):
     calls = parse_file('./tests/test_module/test_file.py')
     assert len(calls['literal_calls']) == 4
     for call in calls['literal_calls']:
-        assert call['function'] == call_name
-        assert call['args'] == expected
+        assert call.function == call_name
+        assert call.args == tuple(expected)
 
 
 def test_multiple_tokens(cleanup_fixture):
@@ -106,9 +111,9 @@ def test_multiple_tokens(cleanup_fixture):
     parsed_calls = parse_file('./tests/test_module/test_file.py')
     assert len(parsed_calls['literal_calls']) == 10
     for call in parsed_calls['literal_calls']:
-        assert call['function'] in [function[1] for function in calls]
-        current_call = list(map(itemgetter(1), calls)).index(call['function'])
-        assert call['args'] == calls[current_call][2]
+        assert call.function in [function[1] for function in calls]
+        current_call = list(map(itemgetter(1), calls)).index(call.function)
+        assert call.args == tuple(calls[current_call][2])
 
 
 def test_invalid_syntax(cleanup_fixture, capsys):
@@ -140,5 +145,183 @@ def test_complex_call(cleanup_fixture, call_str, call_name, expected):
     assert len(calls['literal_calls']) == 0
     assert len(calls['complex_calls']) == 1
     result = calls['complex_calls'][0]
-    assert result['function'] == call_name
-    assert result['args'] == expected
+    assert result.function == call_name
+    assert result.args == tuple(expected)
+
+
+@pytest.fixture
+def folder_fixture():
+    folder = './tests/test_module/folder'
+    shutil.rmtree(folder, ignore_errors=True)
+    with open('./tests/test_artifacts/single_call_template.py', 'r') as f:
+        template = f.read()
+    for index, (call_str, _, _) in enumerate(calls + complex_calls):
+        sub_folder = os.path.join(folder, 'sub_{}'.format(index % 3))
+        os.makedirs(sub_folder, exist_ok=True)
+        with open(os.path.join(sub_folder, 'file_{}.py'.format(index)), 'w+') as f:
+            f.write(template.replace('{call}', call_str))
+    with open(os.path.join(folder, 'broken.py'), 'w+') as f:
+        f.write(template.replace('{call}', '):'))
+    yield folder
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_parallel_folder(folder_fixture, capsys):
+    serial_calls = parse_folder(folder_fixture, {})
+    serial_out = capsys.readouterr().out
+    parallel_calls = parse_folder(folder_fixture, {}, workers=2)
+    parallel_out = capsys.readouterr().out
+    assert len(serial_calls) == len(calls) + len(complex_calls) + 1
+    assert list(parallel_calls.items()) == list(serial_calls.items())
+    assert parallel_out == serial_out
+
+
+def test_parse_cache(folder_fixture, monkeypatch):
+    cache = ParseCache('./tests/test_module/cache')
+    cold_calls = parse_folder(folder_fixture, {}, cache=cache)
+    assert cache.hits == 0
+    cold_misses = cache.misses
+
+    def fail_scan(file_path, alias, sign=False):
+        raise AssertionError("{} should have been cached".format(file_path))
+    monkeypatch.setattr(checktext_parser, '_scan_file', fail_scan)
+    changed_file = os.path.join(folder_fixture, 'sub_0', 'file_0.py')
+    os.utime(changed_file, ns=(0, 0))
+    # The syntax error is never cached, every other file is
+    del cold_calls[os.path.join(folder_fixture, 'broken.py')]
+    warm_calls = {file_path: parse_file(file_path, cache=cache) for file_path in cold_calls}
+    assert warm_calls == cold_calls
+    monkeypatch.undo()
+
+    with open(changed_file, 'a') as f:
+        f.write("\n\nprint(gettext('test.appended'))\n")
+    assert len(parse_file(changed_file, cache=cache)['literal_calls']) == 2
+    assert parse_file(changed_file, alias={'_': 'gettext'}, cache=cache) is not None
+    assert cache.misses == cold_misses + 2
+    # Results of an older extractor are parsed again
+    monkeypatch.setattr('pychecktext.parse_cache.EXTRACTOR_VERSION', checktext_parser.EXTRACTOR_VERSION + 1)
+    assert parse_file(changed_file, cache=cache) is not None
+    assert cache.misses == cold_misses + 3
+    cache.close()
+
+
+def test_parse_cache_edited_after_parse(folder_fixture, monkeypatch):
+    cache = ParseCache('./tests/test_module/cache_edited')
+    changed_file = os.path.join(folder_fixture, 'sub_0', 'file_0.py')
+    scan_file = checktext_parser._scan_file
+
+    def scan_then_edit(file_path, alias, sign=False):
+        scan = scan_file(file_path, alias, sign)
+        with open(file_path, 'a') as f:
+            f.write("\n\nprint(gettext('test.appended'))\n")
+        return scan
+
+    def fail_signature(file_path):
+        raise AssertionError("{} should not be read again to be cached".format(file_path))
+    monkeypatch.setattr(checktext_parser, '_scan_file', scan_then_edit)
+    monkeypatch.setattr('pychecktext.parse_cache.file_signature', fail_signature)
+    parsed_calls = parse_file(changed_file, cache=cache)
+    monkeypatch.undo()
+    # The entry matches the content parsed, so the edit made meanwhile is a miss
+    assert len(parse_file(changed_file, cache=cache)['literal_calls']) == len(parsed_calls['literal_calls']) + 1
+    assert (cache.hits, cache.misses) == (0, 2)
+    cache.close()
+
+
+def test_parse_cache_eviction(folder_fixture):
+    with ParseCache('./tests/test_module/cache_eviction', max_entries=2) as cache:
+        parse_folder(folder_fixture, {}, cache=cache)
+        assert cache._connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0] == 2
+
+
+def test_prefilter(folder_fixture):
+    plain_file = os.path.join(folder_fixture, 'plain.py')
+    with open(plain_file, 'w+') as f:
+        f.write("def add(a, b):\n    return a + b\n")
+    alias_file = os.path.join(folder_fixture, 'alias.py')
+    with open(alias_file, 'w+') as f:
+        f.write("print(_('test.single'))\n")
+    folder_calls = parse_folder(folder_fixture, {})
+    assert folder_calls[plain_file] == {'literal_calls': [], 'complex_calls': []}
+    assert folder_calls[alias_file] == {'literal_calls': [], 'complex_calls': []}
+    assert checktext_parser.scan_statistics['prefiltered'] == 2
+    assert checktext_parser.scan_statistics['parsed'] == len(calls) + len(complex_calls) + 1
+    folder_calls = parse_folder(folder_fixture, {'_': 'gettext'})
+    assert folder_calls[alias_file]['literal_calls'] == [CallSite('gettext', ('test.single',), 1, 6)]
+    assert checktext_parser.scan_statistics['prefiltered'] == 1
+
+
+def test_timings(folder_fixture, capsys):
+    timings.enable(slowest=3)
+    try:
+        parse_folder(folder_fixture, {})
+        phases = timings.as_dict()['phases']
+        assert phases['parsed']['count'] == len(calls) + len(complex_calls) + 1
+        assert phases['walk']['count'] == len(calls) + len(complex_calls) + 1
+        slowest = timings.slowest_files()
+        assert len(slowest) == 3
+        assert [seconds for _, seconds in slowest] == sorted((seconds for _, seconds in slowest), reverse=True)
+        capsys.readouterr()
+        timings.report()
+        assert 'parsed' in capsys.readouterr().out
+    finally:
+        timings.enabled = False
+
+
+def test_call_locations(cleanup_fixture):
+    with open('./tests/test_module/test_file.py', 'w+') as f:
+        f.write("import gettext\n\n"
+                "def greet(name, context):\n"
+                "    print(gettext('test.single'), pgettext(context, 'test.single'))\n")
+    parsed_calls = parse_file('./tests/test_module/test_file.py')
+    assert parsed_calls['literal_calls'] == [CallSite('gettext', ('test.single',), 4, 10)]
+    # Literal arguments of complex calls are kept as they are
+    assert parsed_calls['complex_calls'] == [CallSite('pgettext', ('context', 'test.single'), 4, 34)]
+
+
+nested_calls = [
+    "Button(label=gettext('test.keyword'))",
+    "sorted(names, key=lambda name: gettext('test.lambda'))",
+    "f\"{gettext('test.fstring')}!\"",
+    "[gettext('test.comprehension') for name in names]",
+    "gettext('test.receiver').format(name)",
+    "str(translation.gettext('test.attribute'))",
+    "self._('test.alias_attribute')",
+    "print(gettext(ngettext('test.inner', 'test.inners', 2)))",
+]
+
+
+def test_nested_calls(cleanup_fixture):
+    with open('./tests/test_module/test_file.py', 'w+') as f:
+        f.write("import gettext\n" + "\n".join(nested_calls) + "\ngettext(msgid='test.keyword_only')\n")
+    parsed_calls = parse_file('./tests/test_module/test_file.py', {'_': 'gettext'})
+    assert [(call.args, call.lineno) for call in parsed_calls['literal_calls']] == [
+        (('test.keyword',), 2),
+        (('test.lambda',), 3),
+        (('test.fstring',), 4),
+        (('test.comprehension',), 5),
+        (('test.receiver',), 6),
+        (('test.attribute',), 7),
+        (('test.alias_attribute',), 8),
+        (('test.inner', 'test.inners'), 9),
+    ]
+    # The outer call's argument is itself a call
+    assert [call.args for call in parsed_calls['complex_calls']] == [
+        ("ngettext('test.inner', 'test.inners', 2)",)]
+
+
+@pytest.mark.parametrize("newline", ['\n', '\r\n', '\r'])
+def test_source_segments(newline):
+    source = newline.join([
+        "import gettext",
+        "\f",
+        "label = gettext('ünïcödé.' + domain) + pgettext(context, 'x')",
+        "text = ngettext(",
+        "    'test.' + 'ü' +",
+        "    suffix, plural, count)",
+        ""])
+    segments = SourceSegments(source)
+    nodes = [node for node in ast.walk(ast.parse(source)) if isinstance(node, ast.expr)]
+    for node in nodes:
+        assert segments.segment(node) == ast.get_source_segment(source, node)
+    assert segments.segment(ast.parse(source)) is None
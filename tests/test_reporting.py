@@ -0,0 +1,87 @@
+import json
+import sys
+sys.path.extend('../../')
+from pychecktext import reporting  # noqa: E402
+from pychecktext.checktext_parser import CallSite  # noqa: E402
+from pychecktext.validator import CatalogIndex, validate_translations  # noqa: E402
+
+calls = {
+    'first.py': {'literal_calls': [CallSite('gettext', ('herring',), 3, 10),
+                                   CallSite('ngettext', ('swallow_singular', 'swallow_plural'), 4, 10)]},
+    'second.py': {'literal_calls': [CallSite('pgettext', ('polite', 'parrot'), 7, 4)]}
+}
+
+index = CatalogIndex([(None, 'herring', None), (None, 'swallow_singular', 0)], lambda n: int(n != 1))
+
+
+def validate_with(reporter: reporting.Reporter):
+    reporting.set_reporter(reporter)
+    try:
+        validate_translations({'en': index}, calls)
+    finally:
+        reporting.set_reporter(None)
+    reporter.close()
+
+
+def test_buffered_console(capsys):
+    reporter = reporting.ConsoleReporter(reporting.BufferedOutput(interval=60))
+    reporting.set_reporter(reporter)
+    try:
+        reporter.file_scanned('first.py', None)
+        assert capsys.readouterr().out == ''
+        reporter.flush()
+        assert capsys.readouterr().out == "Checking gettext tokens in file 'first.py'\n"
+    finally:
+        reporting.set_reporter(None)
+
+
+def test_teamcity(capsys):
+    validate_with(reporting.TeamCityReporter())
+    stdout = capsys.readouterr().out.splitlines()
+    assert [line.split(' ')[0] for line in stdout] == [
+        '##teamcity[testStarted', '##teamcity[message', '##teamcity[testFailed', '##teamcity[testFinished',
+        '##teamcity[testStarted', '##teamcity[message', '##teamcity[testFailed', '##teamcity[testFinished']
+    assert "name='checkTokenExistence(first.py, en)'" in stdout[0]
+    assert "captureStandardOutput='false'" in stdout[0]
+    assert "plural id 1 (first.py:4)" in stdout[1]
+    assert "name='checkTokenExistence(first.py, en)'" in stdout[3]
+
+
+def test_teamcity_missing_language(capsys):
+    reporter = reporting.TeamCityReporter()
+    reporter.language_loaded('test', 'xx', False)
+    reporter.language_loaded('test', 'en', True)
+    reporter.close()
+    stdout = capsys.readouterr().out.splitlines()
+    assert [line.split(' ')[0] for line in stdout] == [
+        '##teamcity[testStarted', '##teamcity[testFailed', '##teamcity[testFinished',
+        '##teamcity[testStarted', '##teamcity[testFinished']
+    assert "No catalog of domain |'test|' found for language xx" in stdout[1]
+
+
+def test_quiet(capsys):
+    reporter = reporting.Reporter()
+    validate_with(reporter)
+    assert capsys.readouterr().out == ''
+    assert reporter.failed
+
+
+def test_json_and_sarif(tmp_path, capsys):
+    json_reporter = reporting.JsonReporter(str(tmp_path / 'report.json'))
+    sarif_reporter = reporting.SarifReporter(str(tmp_path / 'report.sarif'))
+    validate_with(reporting.MultiReporter([json_reporter, sarif_reporter]))
+    assert capsys.readouterr().out == ''
+    with open(str(tmp_path / 'report.json')) as f:
+        report = json.load(f)
+    assert report['failed']
+    assert report['missing_translations'] == [
+        {'file': 'first.py', 'line': 4, 'domain': None, 'language': 'en', 'context': None, 'msgid': 'swallow_singular',
+         'plural_indexes': [1]},
+        {'file': 'second.py', 'line': 7, 'domain': None, 'language': 'en', 'context': 'polite', 'msgid': 'parrot',
+         'plural_indexes': None}]
+    with open(str(tmp_path / 'report.sarif')) as f:
+        sarif = json.load(f)
+    results = sarif['runs'][0]['results']
+    assert [result['ruleId'] for result in results] == ['missing-plural-translation', 'missing-translation']
+    assert results[1]['locations'][0]['physicalLocation']['artifactLocation']['uri'] == 'second.py'
+    assert results[1]['locations'][0]['physicalLocation']['region']['startLine'] == 7
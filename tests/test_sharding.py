@@ -0,0 +1,107 @@
+import os
+import re
+import sys
+import pytest
+sys.path.extend('../../')
+from pychecktext import reporting  # noqa: E402
+from pychecktext.reporting import MissingTranslation  # noqa: E402
+from pychecktext.checktext_parser import iter_folder_calls  # noqa: E402
+from pychecktext.sharding import Shard, ShardRecorder, merge_results  # noqa: E402
+from pychecktext.validator import CatalogIndex, validate_translations  # noqa: E402
+
+index = CatalogIndex([(None, 'herring', None), (None, 'swallow_singular', 0)], lambda n: int(n != 1),
+                     'nplurals=3; plural=n != 1;')
+
+
+@pytest.fixture
+def folder_fixture(tmp_path):
+    for file_index in range(12):
+        path = tmp_path / 'src' / 'package_{}'.format(file_index % 3) / 'module_{}.py'.format(file_index)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = ['from gettext import gettext, ngettext'] + ['gettext("herring")'] * file_index
+        lines.append('gettext("parrot_{}")'.format(file_index % 4))
+        lines.append('ngettext("swallow_singular", "swallow_plural", 2)')
+        path.write_text('\n'.join(lines) + '\n')
+    (tmp_path / 'src' / 'broken.py').write_text('gettext(\n')
+    yield str(tmp_path)
+
+
+def without_timestamps(output):
+    return re.sub(r" timestamp='[^']*'", '', output)
+
+
+def check(folder_path, reporter, shard=None):
+    reporting.set_reporter(reporter)
+    try:
+        reporter.suite_started('checkGetTextTokens')
+        validate_translations({'en': index}, iter_folder_calls(folder_path, {}, shard=shard))
+        reporter.suite_finished('checkGetTextTokens')
+    finally:
+        reporting.set_reporter(None)
+    reporter.close()
+
+
+def test_shard_select(folder_fixture):
+    file_paths = [os.path.join(folder_fixture, 'src', 'package_0', 'module_{}.py'.format(index))
+                  for index in (0, 3, 6, 9)]
+    shards = [Shard(index, 3) for index in range(1, 4)]
+    picked = [shard.select(file_paths) for shard in shards]
+    # Each file goes to exactly one shard, and the order of the files is kept
+    assert sorted(sum(picked, [])) == sorted(file_paths)
+    assert all(files == sorted(files, key=file_paths.index) for files in picked)
+    # The two smallest files share the shard left lightest by the largest ones
+    assert picked == [[file_paths[3]], [file_paths[2]], file_paths[:2]]
+    assert shards[2].positions == {file_paths[0]: 0, file_paths[1]: 1}
+    assert Shard(3, 3).select(reversed(file_paths)) == file_paths[1::-1]
+
+
+def test_shard_parse():
+    shard = Shard.parse('2/4')
+    assert (shard.index, shard.count) == (2, 4)
+    for spec in ('0/4', '5/4', '2', 'two/four'):
+        with pytest.raises(ValueError):
+            Shard.parse(spec)
+
+
+@pytest.mark.parametrize('count', [1, 2, 5])
+def test_merge_results(folder_fixture, capsys, count):
+    for reporter_class in (reporting.ConsoleReporter, reporting.TeamCityReporter):
+        check(folder_fixture, reporter_class())
+        single_run = without_timestamps(capsys.readouterr().out)
+        paths = []
+        for index in range(1, count + 1):
+            shard = Shard(index, count)
+            paths.append(os.path.join(folder_fixture, 'shard_{}.json'.format(index)))
+            check(folder_fixture, ShardRecorder(paths[-1], shard), shard)
+        reporter = reporter_class()
+        reporter.suite_started('checkGetTextTokens')
+        # The order the results are given in does not matter
+        assert merge_results(paths[::-1], reporter)
+        reporter.suite_finished('checkGetTextTokens')
+        reporter.close()
+        assert without_timestamps(capsys.readouterr().out) == single_run
+
+
+def test_merge_missing_shard(folder_fixture):
+    paths = []
+    for index in (1, 3):
+        shard = Shard(index, 3)
+        paths.append(os.path.join(folder_fixture, 'shard_{}.json'.format(index)))
+        check(folder_fixture, ShardRecorder(paths[-1], shard), shard)
+    with pytest.raises(ValueError):
+        merge_results(paths, reporting.Reporter())
+    with pytest.raises(ValueError):
+        merge_results(paths[:1] * 2, reporting.Reporter())
+
+
+def test_merge_suggestions(tmp_path):
+    shard = Shard(1, 1)
+    shard.select([str(tmp_path / 'menu.py')])
+    recorder = ShardRecorder(str(tmp_path / 'shard_1.json'), shard)
+    missing = [MissingTranslation(None, 'Save teh file', None, 3, ('Save the file',)),
+               MissingTranslation(None, 'Preferences', None, 4)]
+    recorder.file_validated(str(tmp_path / 'menu.py'), 'en', missing)
+    recorder.close()
+    reporter = reporting.JsonReporter(str(tmp_path / 'report.json'))
+    assert merge_results([str(tmp_path / 'shard_1.json')], reporter)
+    assert [entry.get('suggestions') for entry in reporter.missing_translations] == [['Save the file'], None]
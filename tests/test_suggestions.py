@@ -0,0 +1,71 @@
+import json
+import random
+import sys
+import pytest
+sys.path.extend('../../')
+from pychecktext import lazy_numpy, reporting  # noqa: E402
+from pychecktext.checktext_parser import CallSite  # noqa: E402
+from pychecktext.suggestions import SuggestionIndex  # noqa: E402
+from pychecktext.validator import CatalogIndex, validate_translations  # noqa: E402
+
+msgids = ['Save the file', 'Save all files', 'Open the file', 'Close the window', 'Saved the file',
+          'Quit without saving', 'Delete the file']
+
+
+def test_suggest(numpy_backend):
+    index = SuggestionIndex(msgids)
+    assert len(index) == len(msgids)
+    assert index.suggest('Save teh file') == ['Save the file', 'Saved the file', 'Save all files']
+    assert index.suggest('Save teh file', limit=5) == ['Save the file', 'Saved the file', 'Save all files']
+    assert index.suggest('Save teh file', limit=1) == ['Save the file']
+    # The msgid itself is never suggested
+    assert 'Save the file' not in index.suggest('Save the file')
+    assert index.suggest('Preferences') == []
+    assert index.suggest('') == []
+    assert 'Quit without saving' in index
+    assert 'Quit' not in index
+
+
+def test_suggest_min_score(numpy_backend):
+    assert SuggestionIndex(msgids, min_score=0.9).suggest('Save teh file') == []
+    with pytest.raises(ValueError):
+        SuggestionIndex(msgids, min_score=0)
+
+
+def test_same_suggestions(monkeypatch):
+    """The NumPy and pure python counts rank every msgid alike."""
+    pytest.importorskip('numpy')
+    rng = random.Random(4)
+    words = [''.join(rng.choice('etaoinshrdlu') for _ in range(rng.randint(2, 7))) for _ in range(200)]
+    catalog = [' '.join(rng.choices(words, k=rng.randint(1, 6))) for _ in range(2000)]
+    queries = [msgid[:1] + 'x' + msgid[2:] for msgid in rng.sample(catalog, 100)] + rng.sample(words, 20)
+    index = SuggestionIndex(catalog, common=0.001)
+    found = [index.suggest(query, 5) for query in queries]
+    monkeypatch.setattr(lazy_numpy, 'numpy', None)
+    index = SuggestionIndex(catalog, common=0.001)
+    assert [index.suggest(query, 5) for query in queries] == found
+    assert sum(map(bool, found)) > 100
+
+
+def test_validate_suggestions(tmp_path, capsys):
+    index = CatalogIndex([(None, msgid, None) for msgid in msgids] + [(None, 'One file', 0)], lambda n: int(n != 1))
+    calls = {'menu.py': {'literal_calls': [CallSite('gettext', ('Save teh file',), 3, 4),
+                                           CallSite('gettext', ('Preferences',), 4, 4),
+                                           CallSite('ngettext', ('One file', '{} files'), 5, 4)]}}
+    json_reporter = reporting.JsonReporter(str(tmp_path / 'report.json'))
+    reporting.set_reporter(reporting.MultiReporter([reporting.ConsoleReporter(), json_reporter]))
+    try:
+        validate_translations({'en': index}, calls, suggest=2)
+    finally:
+        reporting.set_reporter(None)
+    json_reporter.close()
+    stdout = capsys.readouterr().out.splitlines()
+    assert stdout[1] == ("msgid 'Save teh file' is missing a translation in language 'en' (menu.py:3), "
+                         "did you mean 'Save the file', 'Saved the file'?")
+    assert stdout[2] == "msgid 'Preferences' is missing a translation in language 'en' (menu.py:4)"
+    # Only a plural form is missing, the msgid itself is in the catalog
+    assert stdout[3] == "msgid 'One file' is missing a translation in language 'en' for plural id 1 (menu.py:5)"
+    with open(str(tmp_path / 'report.json')) as f:
+        report = json.load(f)
+    assert report['missing_translations'][0]['suggestions'] == ['Save the file', 'Saved the file']
+    assert 'suggestions' not in report['missing_translations'][1]
@@ -1,25 +1,21 @@
-import shutil
-import os
 import itertools
 import pytest
 import sys
 import gettext
+import time
 from typing import List, Iterable, Union, Dict
 sys.path.extend('../../')
-from pychecktext.validator import get_translation_object, validate_translations  # noqa: E402
+from pychecktext.checktext_parser import CallSite  # noqa: E402
+from pychecktext.validator import (CatalogIndex, DomainConfig, find_catalogs, get_translation_object,  # noqa: E402
+                                   read_domain_config, split_domains, validate_catalogs, validate_domains,
+                                   validate_translations)
 
 supported_languages = ['en', 'ar', 'ay']
 
 
 @pytest.fixture
-def english_fixture():
-    language = 'en'
-    os.makedirs("./tests/test_module/locale/{}/LC_MESSAGES".format(language), exist_ok=True)
-    shutil.copy("./tests/test_artifacts/{}.mo".format(language), 
-                "./tests/test_module/locale/{}/LC_MESSAGES".format(language))
-    os.rename("./tests/test_module/locale/{0}/LC_MESSAGES/{0}.mo".format(language),
-              "./tests/test_module/locale/{}/LC_MESSAGES/test.mo".format(language))
-    output = get_translation_object("./tests/test_module/locale", "test", [language])
+def english_fixture(install_catalogs):
+    output = get_translation_object(install_catalogs(['en']), "test", ['en'])
     yield output
 
 
@@ -29,18 +25,9 @@ def all_combinations(any_list: List[any]) -> Iterable[Union[str, List[str]]]:
         for i in range(len(any_list)))
 
 
-def copy_languages(languages: List[str]):
-    for language in languages:
-        os.makedirs("./tests/test_module/locale/{}/LC_MESSAGES".format(language), exist_ok=True)
-        shutil.copy("./tests/test_artifacts/{}.mo".format(language), 
-                    "./tests/test_module/locale/{}/LC_MESSAGES".format(language))
-        os.rename("./tests/test_module/locale/{0}/LC_MESSAGES/{0}.mo".format(language),
-                  "./tests/test_module/locale/{0}/LC_MESSAGES/test.mo".format(language))
-
-
 @pytest.mark.parametrize('languages', all_combinations(supported_languages))
-def test_get_translations(cleanup_locale_fixture, languages: List[str]):
-    copy_languages(languages)
+def test_get_translations(cleanup_locale_fixture, install_catalogs, languages: List[str]):
+    install_catalogs(languages)
     output = get_translation_object("./tests/test_module/locale",
                                     "test", languages)
     assert len(output) == len(languages)
@@ -50,8 +37,8 @@ def test_get_translations(cleanup_locale_fixture, languages: List[str]):
         assert info['language'] == lang
 
 
-def test_get_translations_missing(capsys, cleanup_locale_fixture):
-    copy_languages(['ar', 'ay'])
+def test_get_translations_missing(capsys, cleanup_locale_fixture, install_catalogs):
+    install_catalogs(['ar', 'ay'])
     output = get_translation_object("./tests/test_module/locale",
                                     "test", ['ar', 'ay', 'en'])
     stdout = capsys.readouterr().out
@@ -63,6 +50,24 @@ def test_get_translations_missing(capsys, cleanup_locale_fixture):
         assert info['language'] == lang
 
 
+def test_get_translations_threaded(capsys, cleanup_locale_fixture, install_catalogs, monkeypatch):
+    install_catalogs(['ar', 'ay'])
+    languages = ['en', 'ar', 'xx', 'ay']
+    get_translation_object("./tests/test_module/locale", "test", languages, threads=1)
+    serial = capsys.readouterr().out
+    translation = gettext.translation
+
+    def slow_translation(domain, localedir, languages, class_):
+        # Earlier languages finish last
+        time.sleep(0.02 * (3 - ['en', 'ar', 'xx', 'ay'].index(languages[0])))
+        return translation(domain, localedir, languages, class_=class_)
+
+    monkeypatch.setattr(gettext, 'translation', slow_translation)
+    output = get_translation_object("./tests/test_module/locale", "test", languages, threads=4)
+    assert list(output) == ['ar', 'ay']
+    assert capsys.readouterr().out == serial
+
+
 test_calls = [
     {
         'function': 'gettext',
@@ -118,7 +123,8 @@ def test_valid_translations(english_fixture,
                             capsys,
                             call: Dict[str, Union[str, List[str]]]):
     translators = english_fixture
-    validate_translations(translators, {'test.py': {'literal_calls': [call]}})
+    call_site = CallSite(call['function'], tuple(call['args']), 1, 0)
+    validate_translations(translators, {'test.py': {'literal_calls': [call_site]}})
     outputs = capsys.readouterr()
     stdout = outputs.out.splitlines()
     stderr = outputs.err
@@ -129,10 +135,7 @@ def test_valid_translations(english_fixture,
 def test_missing_context(english_fixture,
                          cleanup_locale_fixture,
                          capsys):
-    call = {
-        "function": "pgettext",
-        "args": ["downright_rude", "parrot"]
-    }
+    call = CallSite("pgettext", ("downright_rude", "parrot"), 1, 0)
     translators = english_fixture
     validate_translations(translators, {'test.py': {'literal_calls': [call]}})
     outputs = capsys.readouterr()
@@ -146,10 +149,7 @@ def test_missing_context(english_fixture,
 def test_missing_translation(english_fixture,
                              cleanup_locale_fixture,
                              capsys):
-    call = {
-        "function": "gettext",
-        "args": ["blank"]
-    }
+    call = CallSite("gettext", ("blank",), 1, 0)
     translators = english_fixture
     validate_translations(translators, {'test.py': {'literal_calls': [call]}})
     outputs = capsys.readouterr()
@@ -163,10 +163,7 @@ def test_missing_translation(english_fixture,
 def test_missing_msgid(english_fixture,
                        cleanup_locale_fixture,
                        capsys):
-    call = {
-        "function": "gettext",
-        "args": ["not_the_messiah"]
-    }
+    call = CallSite("gettext", ("not_the_messiah",), 1, 0)
     translators = english_fixture
     validate_translations(translators, {'test.py': {'literal_calls': [call]}})
     outputs = capsys.readouterr()
@@ -175,3 +172,121 @@ def test_missing_msgid(english_fixture,
     assert stderr == ''
     assert len(stdout) == 2
     assert all(test in stdout[1] for test in ['not_the_messiah', 'en'])
+
+
+def test_missing_plural_shared_across_files(capsys):
+    index = CatalogIndex([(None, 'herring', None), (None, 'swallow_singular', 0)], lambda n: int(n != 1))
+    call = CallSite("ngettext", ("swallow_singular", "swallow_plural"), 1, 0)
+    found_call = CallSite("gettext", ("herring",), 1, 0)
+    validate_translations({'en': index}, {'first.py': {'literal_calls': [call, found_call, call]},
+                                          'second.py': {'literal_calls': [call]}})
+    stdout = capsys.readouterr().out.splitlines()
+    assert len(stdout) == 4
+    assert "file 'first.py'" in stdout[0]
+    assert all(test in stdout[1] for test in ['swallow_singular', 'en', 'plural id 1'])
+    assert "file 'second.py'" in stdout[2]
+    assert all(test in stdout[3] for test in ['swallow_singular', 'en', 'plural id 1'])
+
+
+def test_missing_plural_indexes(capsys):
+    index = CatalogIndex([(None, 'swallow_singular', 1), (None, 'herring_singular', 0), (None, 'herring_singular', 1),
+                          (None, 'herring_singular', 2)], lambda n: int(n != 1), 'nplurals=3; plural=n != 1;')
+    calls = [CallSite("ngettext", ("swallow_singular", "swallow_plural"), 1, 0),
+             CallSite("ngettext", ("herring_singular", "herring_plural"), 2, 0)]
+    validate_translations({'en': index}, {'first.py': {'literal_calls': calls}})
+    stdout = capsys.readouterr().out.splitlines()
+    # Every form is checked, even those the rule never selects, and reported together
+    assert stdout[0] == "Plural forms 2 of language en are never selected by its Plural-Forms rule"
+    assert len(stdout) == 3
+    assert all(test in stdout[2] for test in ['swallow_singular', 'en', 'plural ids 0, 2', '(first.py:1)'])
+
+
+def test_catalog_index(english_fixture, cleanup_locale_fixture):
+    index = CatalogIndex.from_translations(english_fixture['en'])
+    assert (None, 'herring', None) in index
+    assert ('polite', 'parrot', None) in index
+    assert ('male', 'french_singular', 1) in index
+    assert (None, 'parrot', None) not in index
+    assert (None, 'blank', None) not in index
+
+
+def test_streamed_calls(capsys):
+    index = CatalogIndex([(None, 'herring', None)], lambda n: int(n != 1))
+    consumed = []
+
+    def stream():
+        for file_name, msgid in [('first.py', 'herring'), ('broken.py', None), ('second.py', 'blank')]:
+            consumed.append(file_name)
+            yield file_name, None if msgid is None else {'literal_calls': [CallSite('gettext', (msgid,), 1, 0)]}
+
+    validate_translations({'en': index}, stream())
+    assert consumed == ['first.py', 'broken.py', 'second.py']
+    stdout = capsys.readouterr().out.splitlines()
+    assert len(stdout) == 3
+    assert "file 'first.py'" in stdout[0]
+    assert "file 'second.py'" in stdout[1]
+    assert 'blank' in stdout[2]
+
+
+def test_validate_catalogs(cleanup_locale_fixture, install_catalogs, capsys):
+    install_catalogs(['ar', 'ay', 'en'])
+    calls = {
+        'first.py': {'literal_calls': [CallSite("gettext", ("herring",), 1, 0),
+                                       CallSite("ngettext", ("swallow_singular", "swallow_plural"), 2, 0)]},
+        'broken.py': None,
+        'second.py': {'literal_calls': [CallSite("gettext", ("not_the_messiah",), 1, 0),
+                                        CallSite("pgettext", ("polite", "parrot"), 3, 0)]}}
+    languages = ['en', 'xx', 'ar', 'ay']
+    validate_translations(get_translation_object("./tests/test_module/locale", "test", languages), calls)
+    serial = capsys.readouterr().out
+    found = find_catalogs("./tests/test_module/locale", "test", languages)
+    assert found == ['en', 'ar', 'ay']
+    validate_catalogs("./tests/test_module/locale", "test", found, calls, workers=2)
+    assert capsys.readouterr().out == serial
+
+
+def test_split_domains():
+    calls = [CallSite("gettext", ("herring",), 1, 0),
+             CallSite("dgettext", ("errors", "oops"), 2, 0),
+             CallSite("dnpgettext", ("errors", "polite", "swallow_singular", "swallow_plural"), 3, 0),
+             CallSite("pgettext", ("polite", "parrot"), 4, 0)]
+    assert split_domains(calls, 'main') == {'main': [calls[0], calls[3]], 'errors': [calls[1], calls[2]]}
+
+
+def test_validate_domains(capsys):
+    main = CatalogIndex([(None, 'herring', None)], lambda n: int(n != 1))
+    errors = CatalogIndex([(None, 'oops', None)], lambda n: int(n != 1))
+    calls = {
+        'first.py': {'literal_calls': [CallSite("gettext", ("herring",), 1, 0),
+                                       CallSite("dgettext", ("errors", "herring"), 2, 0),
+                                       CallSite("dgettext", ("unknown", "herring"), 3, 0)]},
+        'second.py': {'literal_calls': [CallSite("dgettext", ("errors", "oops"), 1, 0),
+                                        CallSite("dgettext", ("errors", "herring"), 2, 0)]}}
+    validate_domains({'main': {'en': main}, 'errors': {'en': errors, 'ar': errors}}, calls, 'main')
+    stdout = capsys.readouterr().out.splitlines()
+    assert stdout == [
+        "Verifying tokens for language en of domain 'main' in file 'first.py'",
+        "Verifying tokens for language en of domain 'errors' in file 'first.py'",
+        "msgid 'herring' is missing a translation in language 'en' of domain 'errors' (first.py:2)",
+        "Verifying tokens for language ar of domain 'errors' in file 'first.py'",
+        "msgid 'herring' is missing a translation in language 'ar' of domain 'errors' (first.py:2)",
+        "Verifying tokens for language en of domain 'errors' in file 'second.py'",
+        "msgid 'herring' is missing a translation in language 'en' of domain 'errors' (second.py:2)",
+        "Verifying tokens for language ar of domain 'errors' in file 'second.py'",
+        "msgid 'herring' is missing a translation in language 'ar' of domain 'errors' (second.py:2)"]
+
+
+def test_read_domain_config(tmp_path):
+    config_path = tmp_path / 'domains.json'
+    config_path.write_text('{"translation_path": "locale", "languages": ["en", "ar"], "default_domain": "main", '
+                           '"domains": {"main": {}, "errors": {"translation_path": "errors", "languages": ["en"]}}}')
+    domains, default_domain = read_domain_config(str(config_path))
+    assert default_domain == 'main'
+    assert domains == {'main': DomainConfig(str(tmp_path / 'locale'), ['en', 'ar']),
+                       'errors': DomainConfig(str(tmp_path / 'errors'), ['en'])}
+    config_path.write_text('{"domains": ["main", "errors"]}')
+    domains, default_domain = read_domain_config(str(config_path), 'locale', ['ay'])
+    assert default_domain is None
+    assert domains == {'main': DomainConfig('locale', ['ay']), 'errors': DomainConfig('locale', ['ay'])}
+    with pytest.raises(ValueError):
+        read_domain_config(str(config_path))
@@ -0,0 +1,134 @@
+import ctypes
+import errno
+import os
+import shutil
+import sys
+import threading
+import pytest
+sys.path.extend('../../')
+from pychecktext.validator import CatalogIndex  # noqa: E402
+from pychecktext.watch import InotifyMonitor, PollingMonitor, Watcher, create_monitor  # noqa: E402
+
+
+@pytest.fixture
+def watch_fixture(cleanup_locale_fixture, install_catalogs):
+    folder = './tests/test_module/watched'
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    install_catalogs(['en'], 'watched')
+    # Watched from the start, test_update adds the ar catalog later
+    os.makedirs("./tests/test_module/locale/ar/LC_MESSAGES", exist_ok=True)
+    with open(os.path.join(folder, 'first.py'), 'w') as f:
+        f.write("print(gettext('herring'))\n")
+    with open(os.path.join(folder, 'second.py'), 'w') as f:
+        f.write("print(gettext('repression'))\n")
+    yield folder
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_update(watch_fixture, install_catalogs, capsys):
+    watcher = Watcher(watch_fixture, {}, './tests/test_module/locale', 'watched', ['en', 'ar'])
+    watcher.start()
+    stdout = capsys.readouterr().out
+    assert "Language file ar is missing in domain 'watched'" in stdout
+    assert 'missing a translation' not in stdout
+
+    changed_file = os.path.join(watch_fixture, 'first.py')
+    with open(changed_file, 'w') as f:
+        f.write("print(gettext('not_the_messiah'))\n")
+    watcher.update([changed_file])
+    stdout = capsys.readouterr().out.splitlines()
+    assert len(stdout) == 3
+    assert "file 'first.py'" in stdout[1]
+    assert "msgid 'not_the_messiah' is missing a translation in language 'en'" in stdout[2]
+
+    install_catalogs(['ar'], 'watched')
+    watcher.update(["./tests/test_module/locale/ar/LC_MESSAGES/watched.mo"])
+    stdout = capsys.readouterr().out
+    assert "Language ar in domain 'watched' found." in stdout
+    assert "language en" not in stdout
+    assert "language ar in file 'second.py'" in stdout
+
+
+def test_source_update_keeps_catalogs(watch_fixture, monkeypatch, capsys):
+    indexed = []
+    from_translations = CatalogIndex.from_translations.__func__
+    monkeypatch.setattr(CatalogIndex, 'from_translations',
+                        classmethod(lambda cls, translator: indexed.append(translator) or
+                                    from_translations(cls, translator)))
+    watcher = Watcher(watch_fixture, {}, './tests/test_module/locale', 'watched', ['en'])
+    watcher.start()
+    assert len(indexed) == 1
+    changed_file = os.path.join(watch_fixture, 'first.py')
+    with open(changed_file, 'w') as f:
+        f.write("print(gettext('not_the_messiah'))\n")
+    watcher.update([changed_file])
+    assert "msgid 'not_the_messiah' is missing a translation in language 'en'" in capsys.readouterr().out
+    # Only a changed catalog is indexed again
+    assert len(indexed) == 1
+    catalog = "./tests/test_module/locale/en/LC_MESSAGES/watched.mo"
+    watcher.update([catalog])
+    assert len(indexed) == 2
+
+
+@pytest.mark.parametrize('monitor_class', [PollingMonitor, InotifyMonitor])
+def test_monitor(watch_fixture, monitor_class):
+    monitor = create_monitor([os.path.abspath(watch_fixture)], interval=0.01)
+    if not isinstance(monitor, monitor_class):
+        monitor.close()
+        if monitor_class is InotifyMonitor:
+            pytest.skip("inotify is not available")
+        monitor = PollingMonitor([os.path.abspath(watch_fixture)], interval=0.01)
+    changed_file = os.path.join(os.path.abspath(watch_fixture), 'first.py')
+
+    def change():
+        with open(changed_file, 'a') as f:
+            f.write("print(gettext('parrot'))\n")
+    timer = threading.Timer(0.1, change)
+    timer.start()
+    try:
+        assert changed_file in monitor.wait()
+    finally:
+        timer.join()
+        monitor.close()
+
+
+@pytest.mark.parametrize('monitor_class', [PollingMonitor, InotifyMonitor])
+def test_monitor_pruning(watch_fixture, monitor_class):
+    for folder in ['.git/objects', 'node_modules/package', 'package']:
+        os.makedirs(os.path.join(watch_fixture, folder))
+        with open(os.path.join(watch_fixture, folder, 'module.py'), 'w') as f:
+            f.write("print(gettext('herring'))\n")
+    watcher = Watcher(watch_fixture, {}, './tests/test_module/locale', 'watched', ['en'], exclude=['node_modules'])
+    roots = [watcher.folder_path, watcher.translation_path]
+    if monitor_class is PollingMonitor:
+        monitor = PollingMonitor(roots, 0.01, watcher._watched)
+        folders = {os.path.dirname(file_path) for file_path in monitor._snapshot}
+    else:
+        monitor = create_monitor(roots, 0.01, watcher._watched)
+        if not isinstance(monitor, InotifyMonitor):
+            monitor.close()
+            pytest.skip("inotify is not available")
+        folders = set(monitor._watches.values())
+    monitor.close()
+    assert os.path.join(watcher.folder_path, 'package') in folders
+    assert os.path.join(watcher.translation_path, 'en', 'LC_MESSAGES') in folders
+    assert not any(os.sep + '.git' in folder or 'node_modules' in folder for folder in folders)
+
+
+def test_inotify_watch_failure(watch_fixture):
+    monitor = create_monitor([os.path.abspath(watch_fixture)])
+    if not isinstance(monitor, InotifyMonitor):
+        monitor.close()
+        pytest.skip("inotify is not available")
+
+    class FullLibc(object):
+        def inotify_add_watch(self, fd, path, mask):
+            ctypes.set_errno(errno.ENOSPC)
+            return -1
+    monitor._libc = FullLibc()
+    try:
+        with pytest.raises(OSError, match='inotify_add_watch failed'):
+            monitor._watch_tree(os.path.abspath(watch_fixture))
+    finally:
+        monitor.close()